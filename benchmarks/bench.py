@@ -0,0 +1,324 @@
+"""
+Benchmark end-to-end com tracking de regressoes.
+
+Suites (cada uma mede o tempo de cada etapa, em segundos):
+- prestashop_gold: run_pipeline._write_gold (passos de main()), com os
+  spans de cada etapa (silver -> dims/facts -> dim_date -> agregado ->
+  CSVs) por engine ("rows_*", "pandas_*"); scale = linhas de encomenda
+- phc_documents: phc_analytics.pipeline.run.run_pipeline sobre documentos
+  sinteticos, com os spans que devolve (modelacao, quality gate, analytics,
+  persistencia); scale = documentos
+- odoo_sync: prestashop_to_odoo.sync contra o StubOdooServer (XML-RPC real
+  em 127.0.0.1, tests/odoo_stub.py); scale / 100 orders
+
+Cada (suite, scale) corre num subprocesso proprio: o pico de RSS
+(ru_maxrss) reportado e so dessa execucao.
+
+Uso:
+    python benchmarks/bench.py                         # escalas default + compara
+    python benchmarks/bench.py --scales 1e3,1e5 --suites prestashop_gold
+    python benchmarks/bench.py --update-baseline       # grava baseline.json
+
+Resultados em JSON (--output, default benchmarks/results/latest.json).
+Comparacao com benchmarks/baseline.json: uma etapa regride quando fica mais
+de --tolerance (default 100%: 2x o tempo) acima do baseline e pelo menos --min-seconds
+mais lenta (ruido em etapas de ms). Cada caso corre --repeat vezes (default
+3) e fica o minimo de cada etapa. Exit code 1 se houver regressoes.
+O baseline depende da maquina: regenerar com --update-baseline na maquina
+de referencia quando uma alteracao muda os tempos de proposito.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+for p in (REPO_ROOT, REPO_ROOT / "src", REPO_ROOT / "tests"):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from phc_analytics.utils.spans import SpanRecorder, peak_rss_mb  # noqa: E402
+
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+DEFAULT_TOLERANCE = 1.0
+DEFAULT_MIN_SECONDS = 0.05
+DEFAULT_REPEAT = 3
+
+Stages = Dict[str, float]
+
+
+class StageTimer:
+    """Acumula o tempo (perf_counter) de cada etapa, pela ordem de execucao."""
+
+    def __init__(self) -> None:
+        self.stages: Stages = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+
+
+def _span_stages(spans: SpanRecorder, prefix: str = "") -> Stages:
+    return {prefix + s.name: s.wall_seconds for s in spans.spans}
+
+
+def bench_prestashop_gold(scale: int, out_dir: Path) -> Stages:
+    import run_pipeline as rp
+    from phc_analytics.staging.synthetic import SyntheticConfig, raw_payloads
+
+    n_orders = max(1, scale // 3)
+    cfg = SyntheticConfig(
+        n_customers=max(1, n_orders // 10), n_products=500, n_orders=n_orders
+    )
+    t = StageTimer()
+    with t.stage("generate"):
+        raw = raw_payloads(cfg)
+
+    # o proprio run_pipeline mede as etapas (spans), por engine
+    stages = dict(t.stages)
+    for engine in rp.ENGINES:
+        spans = SpanRecorder(pipeline=f"prestashop_gold_{engine}")
+        rp._write_gold(*raw, out_dir / engine, engine=engine, spans=spans)
+        stages.update(_span_stages(spans, prefix=f"{engine}_"))
+    return stages
+
+
+def bench_phc_documents(scale: int, out_dir: Path) -> Stages:
+    import pandas as pd
+
+    from phc_analytics.pipeline.run import run_pipeline
+    from phc_analytics.staging.documents import generate_documents
+
+    t = StageTimer()
+    with t.stage("generate"):
+        raw = pd.concat(generate_documents(scale, n_clients=max(5, scale // 100)))
+
+    out = run_pipeline(out_dir=str(out_dir), raw=raw)
+    return {**t.stages, **{s["name"]: s["wall_seconds"] for s in out["spans"]}}
+
+
+def bench_odoo_sync(scale: int, out_dir: Path) -> Stages:
+    from odoo_stub import StubOdooServer
+    from phc_analytics.integrations.odoo.client import OdooClient, OdooConfig
+    from phc_analytics.pipelines.prestashop_to_odoo import sync
+    from phc_analytics.staging.synthetic import SyntheticConfig, raw_payloads
+
+    n_orders = max(1, scale // 100)
+    cfg = SyntheticConfig(
+        n_customers=max(1, n_orders // 2),
+        n_products=min(500, max(1, n_orders)),
+        n_orders=n_orders,
+    )
+    t = StageTimer()
+    with t.stage("generate"):
+        customers, products, orders = (
+            payload[key]
+            for payload, key in zip(
+                raw_payloads(cfg), ("customers", "products", "orders")
+            )
+        )
+
+    with StubOdooServer() as server:
+        odoo = OdooClient(
+            OdooConfig(url=server.url, db="stub", login="bench", password="x")
+        )
+        with t.stage("authenticate"):
+            odoo.authenticate()
+        with t.stage("sync_batched"):
+            sync(odoo, customers, products, orders, batched=True)
+        # 2a passagem: tudo igual -> no-op writes saltados
+        with t.stage("resync_unchanged"):
+            sync(odoo, customers, products, orders, batched=True)
+    return t.stages
+
+
+SUITES: Dict[str, Callable[[int, Path], Stages]] = {
+    "prestashop_gold": bench_prestashop_gold,
+    "phc_documents": bench_phc_documents,
+    "odoo_sync": bench_odoo_sync,
+}
+
+
+def run_case(suite: str, scale: int) -> Dict[str, Any]:
+    """Corre 1 (suite, scale) neste processo; ver run_isolated."""
+    with tempfile.TemporaryDirectory() as tmp:
+        stages = SUITES[suite](scale, Path(tmp))
+    return {
+        "stages": {k: round(v, 6) for k, v in stages.items()},
+        "total_seconds": round(sum(stages.values()), 6),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(suite: str, scale: int) -> Dict[str, Any]:
+    """run_case num subprocesso (RSS por execucao, sem caches partilhadas)."""
+    proc = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--worker", suite, str(scale)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{suite} @ {scale} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def best_of(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Junta repeticoes do mesmo caso: minimo por etapa (o ruido so acrescenta
+    tempo) e maximo do pico de RSS.
+    """
+    stages = {
+        name: min(run["stages"][name] for run in runs) for name in runs[0]["stages"]
+    }
+    rss = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+    return {
+        "stages": stages,
+        "total_seconds": round(sum(stages.values()), 6),
+        "peak_rss_mb": max(rss) if rss else None,
+        "repeat": len(runs),
+    }
+
+
+def run_all(
+    suites: List[str],
+    scales: List[int],
+    repeat: int = DEFAULT_REPEAT,
+    isolated: bool = True,
+) -> Dict[str, Any]:
+    if repeat < 1:
+        raise ValueError("repeat must be >= 1")
+    run = run_isolated if isolated else run_case
+    results: Dict[str, Dict[str, Any]] = {}
+    for suite in suites:
+        for scale in scales:
+            case = best_of([run(suite, scale) for _ in range(repeat)])
+            results.setdefault(suite, {})[str(scale)] = case
+            print(
+                f"{suite:>16} {scale:>10,}  {case['total_seconds']:>8.3f} s  "
+                f"peak RSS {case['peak_rss_mb'] or 0:>7.1f} MB",
+                file=sys.stderr,
+            )
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> List[str]:
+    """
+    Regressoes de current vs baseline (mesma suite/scale/etapa).
+
+    Tempo: > baseline * (1 + tolerance) e pelo menos min_seconds a mais.
+    Memoria: peak RSS > baseline * (1 + tolerance).
+    Casos/etapas que so existem de um dos lados sao ignorados.
+    """
+    regressions: List[str] = []
+    for suite, scales in current.get("results", {}).items():
+        for scale, case in scales.items():
+            base = baseline.get("results", {}).get(suite, {}).get(scale)
+            if base is None:
+                continue
+            for stage, seconds in case["stages"].items():
+                ref = base["stages"].get(stage)
+                if ref is None:
+                    continue
+                if seconds > ref * (1 + tolerance) and seconds - ref >= min_seconds:
+                    regressions.append(
+                        f"{suite}@{scale} {stage}: {seconds:.3f}s vs baseline {ref:.3f}s"
+                        f" (+{(seconds / ref - 1) * 100 if ref else float('inf'):.0f}%)"
+                    )
+            rss, ref_rss = case.get("peak_rss_mb"), base.get("peak_rss_mb")
+            if rss and ref_rss and rss > ref_rss * (1 + tolerance):
+                regressions.append(
+                    f"{suite}@{scale} peak_rss_mb: {rss:.1f} vs baseline {ref_rss:.1f}"
+                )
+    return regressions
+
+
+def _parse_scales(value: str) -> List[int]:
+    return [int(float(v)) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="PHC Analytics benchmark suite")
+    p.add_argument("--suites", default=",".join(SUITES))
+    p.add_argument("--scales", type=_parse_scales, default=list(DEFAULT_SCALES))
+    p.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    p.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    p.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS)
+    p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    p.add_argument("--update-baseline", action="store_true")
+    p.add_argument(
+        "--worker", nargs=2, metavar=("SUITE", "SCALE"), help=argparse.SUPPRESS
+    )
+    args = p.parse_args(argv)
+
+    if args.worker:
+        suite, scale = args.worker
+        print(json.dumps(run_case(suite, int(scale))))
+        return 0
+
+    suites = [s for s in args.suites.split(",") if s]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        raise ValueError(f"Unknown suites {sorted(unknown)} (expected {list(SUITES)})")
+
+    report = run_all(suites, args.scales, repeat=args.repeat)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results: {args.output}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline} (run with --update-baseline)")
+        return 0
+    regressions = compare(
+        report,
+        json.loads(args.baseline.read_text()),
+        tolerance=args.tolerance,
+        min_seconds=args.min_seconds,
+    )
+    for r in regressions:
+        print(f"REGRESSION {r}")
+    if not regressions:
+        print(f"OK: no regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
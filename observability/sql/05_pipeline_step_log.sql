@@ -0,0 +1,37 @@
+-- Observability: pipeline step log
+-- Contract:
+--  - One row per executed step of a pipeline run (pipeline_run_log.run_id)
+--  - Written by the orchestrator when the step finishes (success or failed)
+--  - A failed step is the last row of its run (fail-fast orchestration)
+--  - Read-only consumers (analytics / monitoring / 07_health_step_regression)
+create schema if not exists analytics;
+create table if not exists analytics.pipeline_step_log (
+    run_id uuid not null references analytics.pipeline_run_log (run_id),
+    step_order int not null,
+    step_name text not null,
+    status text not null check (status in ('success', 'failed')),
+    started_at timestamptz not null,
+    finished_at timestamptz not null,
+    duration_seconds numeric(12, 3) not null,
+    rows_processed bigint,
+    bytes_read bigint,
+    bytes_written bigint,
+    error_message text,
+    created_at timestamptz not null default now(),
+    primary key (run_id, step_order)
+);
+-- rolling history per step (health regression check)
+create index if not exists pipeline_step_log_step_started_idx
+    on analytics.pipeline_step_log (step_name, started_at desc);
+comment on table analytics.pipeline_step_log is 'Operational step-level log for analytics pipelines (one row per executed step).';
+comment on column analytics.pipeline_step_log.run_id is 'Pipeline execution this step belongs to (analytics.pipeline_run_log).';
+comment on column analytics.pipeline_step_log.step_order is 'Position of the step in the run (1-based, registry order).';
+comment on column analytics.pipeline_step_log.step_name is 'Logical step name (Step.name).';
+comment on column analytics.pipeline_step_log.status is 'Step status: success or failed.';
+comment on column analytics.pipeline_step_log.started_at is 'Timestamp when the step started.';
+comment on column analytics.pipeline_step_log.finished_at is 'Timestamp when the step finished.';
+comment on column analytics.pipeline_step_log.duration_seconds is 'Step runtime in seconds (monotonic clock of the orchestrator).';
+comment on column analytics.pipeline_step_log.rows_processed is 'Rows processed reported by the step.';
+comment on column analytics.pipeline_step_log.bytes_read is 'Optional bytes read reported by the step (NULL when not reported).';
+comment on column analytics.pipeline_step_log.bytes_written is 'Optional bytes written reported by the step (NULL when not reported).';
+comment on column analytics.pipeline_step_log.error_message is 'Short error description when status = failed (no secrets).';
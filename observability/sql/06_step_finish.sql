@@ -0,0 +1,60 @@
+-- Observability: record a finished pipeline step (INSERT)
+-- Contract:
+--  - inserts exactly 1 row in analytics.pipeline_step_log
+--  - the run (run_id) must exist in analytics.pipeline_run_log
+--
+-- Required psql vars:
+--   - run_id (uuid)
+--   - step_order (int)
+--   - step_name (text)
+--   - status (success|failed)
+--   - started_at, finished_at (ISO 8601 timestamptz)
+--   - duration_seconds (numeric)
+-- Optional psql vars (pass '' for NULL):
+--   - rows_processed, bytes_read, bytes_written (bigint)
+--   - error_message (text)
+--
+-- NOTE: SQL-only (no psql meta-commands), same as 03_run_finish.sql.
+with ins as (
+    insert into analytics.pipeline_step_log (
+        run_id,
+        step_order,
+        step_name,
+        status,
+        started_at,
+        finished_at,
+        duration_seconds,
+        rows_processed,
+        bytes_read,
+        bytes_written,
+        error_message
+    )
+    values (
+        (:'run_id')::uuid,
+        (:'step_order')::int,
+        btrim(:'step_name'),
+        :'status',
+        (:'started_at')::timestamptz,
+        (:'finished_at')::timestamptz,
+        round((:'duration_seconds')::numeric, 3),
+        nullif(btrim(:'rows_processed'), '')::bigint,
+        nullif(btrim(:'bytes_read'), '')::bigint,
+        nullif(btrim(:'bytes_written'), '')::bigint,
+        case
+            when :'error_message' is null
+            or btrim(:'error_message') = '' then null
+            else btrim(:'error_message')
+        end
+    )
+    returning run_id,
+        step_order,
+        step_name,
+        status,
+        duration_seconds
+)
+select run_id::text,
+    step_order,
+    step_name,
+    status,
+    duration_seconds
+from ins;
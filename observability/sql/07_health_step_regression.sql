@@ -0,0 +1,87 @@
+-- Observability: step duration regression check
+-- Contract (health-gate style, same as 04_health_last_run.sql):
+--   - Returns 0 rows when healthy
+--   - Returns 1 row per step whose latest successful duration is above the
+--     rolling p95 of its previous successful runs
+--
+-- Required psql vars:
+--   - pipeline_name (text)
+--   - environment   (text)   e.g. local, ci, prod
+-- Optional psql vars (pass '' for the default):
+--   - window_runs (int)          previous runs in the p95 window; default 20
+--   - min_history (int)          runs needed before judging a step; default 5
+--   - tolerance_pct (numeric)    slack above p95 in %; default 0
+--   - min_delta_seconds (numeric) ignore regressions smaller than this
+--                                 (noise on short steps); default 1
+with params as (
+    select btrim(:'pipeline_name') as pipeline_name,
+        btrim(:'environment') as environment,
+        case
+            when :'window_runs' is null
+            or btrim(:'window_runs') = '' then 20
+            else (:'window_runs')::int
+        end as window_runs,
+        case
+            when :'min_history' is null
+            or btrim(:'min_history') = '' then 5
+            else (:'min_history')::int
+        end as min_history,
+        case
+            when :'tolerance_pct' is null
+            or btrim(:'tolerance_pct') = '' then 0
+            else (:'tolerance_pct')::numeric
+        end as tolerance_pct,
+        case
+            when :'min_delta_seconds' is null
+            or btrim(:'min_delta_seconds') = '' then 1
+            else (:'min_delta_seconds')::numeric
+        end as min_delta_seconds
+),
+step_runs as (
+    -- successful executions of each step, newest first
+    select s.run_id,
+        s.step_name,
+        s.started_at,
+        s.duration_seconds,
+        row_number() over (
+            partition by s.step_name
+            order by s.started_at desc
+        ) as rn
+    from analytics.pipeline_step_log s
+        join analytics.pipeline_run_log r on r.run_id = s.run_id
+        join params p on r.pipeline_name = p.pipeline_name
+        and r.environment = p.environment
+    where s.status = 'success'
+),
+latest as (
+    select *
+    from step_runs
+    where rn = 1
+),
+history as (
+    select sr.step_name,
+        count(*) as history_runs,
+        percentile_cont(0.95) within group (
+            order by sr.duration_seconds
+        ) as p95_seconds
+    from step_runs sr
+        join params p on sr.rn between 2 and p.window_runs + 1
+    group by sr.step_name
+)
+select 'STEP_DURATION_REGRESSION' as code,
+    'Step duration above rolling p95 of previous runs' as message,
+    p.pipeline_name,
+    p.environment,
+    l.step_name,
+    l.run_id::text as run_id,
+    l.started_at,
+    l.duration_seconds,
+    round(h.p95_seconds::numeric, 3) as p95_seconds,
+    h.history_runs
+from latest l
+    join history h on h.step_name = l.step_name
+    join params p on true
+where h.history_runs >= p.min_history
+    and l.duration_seconds > h.p95_seconds * (1 + p.tolerance_pct / 100.0)
+    and l.duration_seconds - h.p95_seconds >= p.min_delta_seconds
+order by l.step_name;
@@ -7,7 +7,9 @@ Goal:
 
 Design constraints:
 - No new Python dependencies.
-- Use `psql` via subprocess so the runner works anywhere psql is available.
+- SQL files run on the shared pooled connection provider
+  (phc_analytics.storage.pg_pool) when psycopg2 is installed; otherwise
+  `psql` via subprocess, so the runner works anywhere psql is available.
 - Keep this file self-contained and explicit (portfolio-friendly).
 
 Usage examples:
@@ -16,9 +18,12 @@ Usage examples:
   export DATABASE_URL='postgresql://...'
   python orchestration/run_pipeline.py health --pipeline phc_analytics --env local --max-age-minutes 60
 
-  # Start + finish a run (no steps yet; reserved for Sprint 19 expansion)
+  # Start + finish a run (one analytics.pipeline_step_log row per step)
   python orchestration/run_pipeline.py run --pipeline phc_analytics --env local --rows 0
 
+  # Health + step duration regressions (latest run above rolling p95)
+  python orchestration/run_pipeline.py health --check-steps --step-window-runs 20
+
 Notes:
 - This is an MVP scaffold. Sprint 19 will add real "steps" and a step registry.
 """
@@ -30,19 +35,32 @@ import re
 import os
 import subprocess
 import sys
+import time
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 
 
+from orchestration.steps.contracts import Step, StepResult
 from orchestration.steps.registry import get_steps
+
+try:  # optional: pooled connections (psycopg2); fallback is psql
+    from src.phc_analytics.storage.pg_pool import get_pool
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        from phc_analytics.storage.pg_pool import get_pool
+    except ImportError:
+        get_pool = None  # type: ignore[assignment]
 REPO_ROOT = Path(__file__).resolve().parents[1]
 OBS_SQL_DIR = REPO_ROOT / "observability" / "sql"
 
 SQL_RUN_START = OBS_SQL_DIR / "02_run_start.sql"
 SQL_RUN_FINISH = OBS_SQL_DIR / "03_run_finish.sql"
 SQL_HEALTH_LAST_RUN = OBS_SQL_DIR / "04_health_last_run.sql"
+SQL_STEP_FINISH = OBS_SQL_DIR / "06_step_finish.sql"
+SQL_HEALTH_STEP_REGRESSION = OBS_SQL_DIR / "07_health_step_regression.sql"
 
 
 @dataclass(frozen=True)
@@ -99,6 +117,70 @@ def _run_psql_file(
     return (proc.stdout or "").strip()
 
 
+# psql variable interpolation :'name' -> psycopg2 named parameter
+_PSQL_VAR_RE = re.compile(r":'(\w+)'")
+
+
+def _psql_to_pyformat(sql_text: str) -> str:
+    """
+    Translate a psql script into a single psycopg2 statement.
+
+    - drops psql meta-command lines (\\if, \\set, \\echo, ...): variables are
+      checked by the parameter binding instead (missing var -> error)
+    - :'name' -> %(name)s (bound as a quoted literal, same as psql)
+    """
+    lines = [ln for ln in sql_text.splitlines() if not ln.lstrip().startswith("\\")]
+    sql = "\n".join(lines).replace("%", "%%")
+    return _PSQL_VAR_RE.sub(lambda m: f"%({m.group(1)})s", sql)
+
+
+def _format_rows(rows: list[tuple[Any, ...]]) -> str:
+    """Rows as psql -qAt prints them: '|'-separated, NULL as empty."""
+    return "\n".join(
+        "|".join("" if v is None else str(v) for v in row) for row in rows
+    )
+
+
+def _run_pooled_sql_file(
+    database_url: str, sql_file: Path, *, vars: dict[str, str]
+) -> str:
+    """Execute a psql-style .sql file on a pooled connection (1 transaction)."""
+    _require_file(sql_file)
+    sql = _psql_to_pyformat(sql_file.read_text(encoding="utf-8"))
+    needed = set(_PSQL_VAR_RE.findall(sql_file.read_text(encoding="utf-8")))
+    missing = sorted(needed - set(vars))
+    if missing:
+        raise RuntimeError(f"SQL failed ({sql_file.name}): missing vars {missing}")
+
+    try:
+        with get_pool(database_url).transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, vars)
+                rows = cur.fetchall() if cur.description else []
+    except Exception as exc:
+        raise RuntimeError(f"SQL failed ({sql_file.name}): {exc}") from exc
+    return _format_rows(rows)
+
+
+def run_sql_file(
+    database_url: str,
+    sql_file: Path,
+    *,
+    vars: dict[str, str],
+    quiet: bool = False,
+) -> str:
+    """
+    Execute an observability/orchestration .sql file and return its output.
+
+    Uses the shared connection pool when available (no process per call,
+    one connection reused across run_start / steps / run_finish); falls
+    back to psql otherwise.
+    """
+    if get_pool is not None:
+        return _run_pooled_sql_file(database_url, sql_file, vars=vars)
+    return _run_psql_file(database_url, sql_file, vars=vars, quiet=quiet)
+
+
 _RUN_ID_RE = re.compile(
     r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b",
     re.IGNORECASE,
@@ -115,13 +197,23 @@ def _extract_run_id(psql_stdout: str) -> str:
     return m.group(0)
 
 
-def cmd_health(ctx: RunContext, max_age_minutes: int) -> int:
+def cmd_health(
+    ctx: RunContext,
+    max_age_minutes: int,
+    check_steps: bool = False,
+    step_window_runs: Optional[int] = None,
+    step_tolerance_pct: Optional[float] = None,
+) -> int:
     """
     Health check contract:
     - 0 rows => healthy (exit 0)
     - 1+ rows => unhealthy/stale (exit 2)
+
+    check_steps also runs 07_health_step_regression.sql: steps whose latest
+    successful duration is above the rolling p95 of their previous runs
+    (None => SQL defaults) are reported as unhealthy rows too.
     """
-    out = _run_psql_file(
+    out = run_sql_file(
         ctx.database_url,
         SQL_HEALTH_LAST_RUN,
         vars={
@@ -131,6 +223,21 @@ def cmd_health(ctx: RunContext, max_age_minutes: int) -> int:
         },
         quiet=True,
     )
+    if check_steps:
+        steps_out = run_sql_file(
+            ctx.database_url,
+            SQL_HEALTH_STEP_REGRESSION,
+            vars={
+                "pipeline_name": ctx.pipeline_name,
+                "environment": ctx.environment,
+                "window_runs": _opt(step_window_runs),
+                "min_history": "",
+                "tolerance_pct": _opt(step_tolerance_pct),
+                "min_delta_seconds": "",
+            },
+            quiet=True,
+        )
+        out = "\n".join(part for part in (out.strip(), steps_out.strip()) if part)
 
     # If healthy, the query contract returns 0 rows -> stdout empty in -qAt mode.
     if not out.strip():
@@ -142,21 +249,116 @@ def cmd_health(ctx: RunContext, max_age_minutes: int) -> int:
     return 2
 
 
+def _opt(value: Any) -> str:
+    """psql var for an optional value ('' => NULL / SQL default)."""
+    return "" if value is None else str(value)
+
+
+def _step_result(step: Step, out: Any) -> StepResult:
+    """Normalize a step return value (int rows or StepResult)."""
+    if isinstance(out, StepResult):
+        result = out
+    else:
+        result = StepResult(name=step.name, rows_processed=int(out or 0))
+    if result.rows_processed < 0:
+        raise RuntimeError(
+            f"Step {step.name} returned negative rows: {result.rows_processed}"
+        )
+    return result
+
+
+def _write_step_row(
+    ctx: RunContext,
+    run_id: str,
+    step_order: int,
+    step: Step,
+    *,
+    status: str,
+    started_at: datetime,
+    duration: float,
+    result: Optional[StepResult] = None,
+    error_message: str = "",
+) -> None:
+    """Insert one analytics.pipeline_step_log row (06_step_finish.sql)."""
+    run_sql_file(
+        ctx.database_url,
+        SQL_STEP_FINISH,
+        vars={
+            "run_id": run_id,
+            "step_order": str(step_order),
+            "step_name": step.name,
+            "status": status,
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_seconds": f"{duration:.3f}",
+            "rows_processed": _opt(result and result.rows_processed),
+            "bytes_read": _opt(result and result.bytes_read),
+            "bytes_written": _opt(result and result.bytes_written),
+            "error_message": error_message,
+        },
+        quiet=True,
+    )
+
+
+def run_step(ctx: RunContext, run_id: str, step_order: int, step: Step) -> StepResult:
+    """
+    Execute one step and write its analytics.pipeline_step_log row.
+
+    - success: the row is written; a failing write fails the run
+    - failure: a failed row is written (best effort) and the step's own
+      exception is re-raised, so it is what lands in pipeline_run_log.
+      A failing write is only reported on stderr (e.g. 05 not applied).
+    """
+    started_at = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    try:
+        result = _step_result(step, step.run(ctx))
+    except Exception as exc:
+        try:
+            _write_step_row(
+                ctx,
+                run_id,
+                step_order,
+                step,
+                status="failed",
+                started_at=started_at,
+                duration=time.perf_counter() - t0,
+                error_message=str(exc)[:240],
+            )
+        except Exception as log_exc:
+            print(
+                f"WARNING: could not write step row for {step.name}: {log_exc}",
+                file=sys.stderr,
+            )
+        raise
+
+    _write_step_row(
+        ctx,
+        run_id,
+        step_order,
+        step,
+        status="success",
+        started_at=started_at,
+        duration=time.perf_counter() - t0,
+        result=result,
+    )
+    return result
+
+
 def cmd_run(ctx: RunContext, rows_processed: Optional[int], dry_run: bool) -> int:
     """
     Run contract (MVP):
     - create a run_id row as "started"
-    - (Sprint 19) run real steps
+    - run the registry steps in order, one pipeline_step_log row per step
+      (stops at the first failed step)
     - finalize row as success/failed
-
-    For now: no steps. This is a scaffold to wire in step execution next.
     """
     if dry_run:
         print("DRY RUN: skipping database writes")
         return 0
 
     # 1) start run
-    start_out = _run_psql_file(
+    start_out = run_sql_file(
         ctx.database_url,
         SQL_RUN_START,
         vars={
@@ -172,13 +374,8 @@ def cmd_run(ctx: RunContext, rows_processed: Optional[int], dry_run: bool) -> in
     error_message = ""
     try:
         total_rows = 0
-        for step in get_steps():
-            n = step.run(ctx)
-            if n is None:
-                n = 0
-            if n < 0:
-                raise RuntimeError(f"Step {step.name} returned negative rows: {n}")
-            total_rows += int(n)
+        for step_order, step in enumerate(get_steps(), start=1):
+            total_rows += run_step(ctx, run_id, step_order, step).rows_processed
     except Exception as exc:  # pragma: no cover
         status = "failed"
         error_message = str(exc)[:240]
@@ -190,7 +387,7 @@ def cmd_run(ctx: RunContext, rows_processed: Optional[int], dry_run: bool) -> in
             "rows_processed": str(total_rows) if rows_processed is None else str(rows_processed),
             "error_message": error_message,
         }
-        _run_psql_file(ctx.database_url, SQL_RUN_FINISH, vars=finish_vars, quiet=False)
+        run_sql_file(ctx.database_url, SQL_RUN_FINISH, vars=finish_vars, quiet=False)
 
     return 0 if status == "success" else 1
 
@@ -211,6 +408,17 @@ def _parse_args(argv: list[str]) -> argparse.Namespace:
 
     p_health = sub.add_parser("health", help="Run health check (last run freshness).")
     p_health.add_argument("--max-age-minutes", type=int, default=1440)
+    p_health.add_argument(
+        "--check-steps",
+        action="store_true",
+        help="Also flag steps slower than the rolling p95 of previous runs.",
+    )
+    p_health.add_argument(
+        "--step-window-runs", type=int, default=None, help="p95 window (default 20)."
+    )
+    p_health.add_argument(
+        "--step-tolerance-pct", type=float, default=None, help="Slack above p95 in %%."
+    )
 
     p_run = sub.add_parser("run", help="Start+finish a run (MVP scaffold).")
     p_run.add_argument(
@@ -235,6 +443,8 @@ def main(argv: list[str]) -> int:
     _require_file(SQL_RUN_START)
     _require_file(SQL_RUN_FINISH)
     _require_file(SQL_HEALTH_LAST_RUN)
+    _require_file(SQL_STEP_FINISH)
+    _require_file(SQL_HEALTH_STEP_REGRESSION)
 
     ctx = RunContext(
         database_url=args.database_url,
@@ -243,7 +453,13 @@ def main(argv: list[str]) -> int:
     )
 
     if args.command == "health":
-        return cmd_health(ctx, args.max_age_minutes)
+        return cmd_health(
+            ctx,
+            args.max_age_minutes,
+            check_steps=args.check_steps,
+            step_window_runs=args.step_window_runs,
+            step_tolerance_pct=args.step_tolerance_pct,
+        )
 
     if args.command == "run":
         return cmd_run(ctx, args.rows, args.dry_run)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Protocol
+from typing import TYPE_CHECKING, Optional, Protocol, Union
 
 if TYPE_CHECKING:
     from orchestration.run_pipeline import RunContext
@@ -12,8 +12,11 @@ class Step(Protocol):
 
     name: str
 
-    def run(self, ctx: "RunContext") -> int:
-        """Execute step and return rows_processed (>=0)."""
+    def run(self, ctx: "RunContext") -> Union[int, "StepResult"]:
+        """
+        Execute step and return rows_processed (>=0), or a StepResult when
+        the step also knows its I/O volume.
+        """
         ...
 
 
@@ -21,3 +24,5 @@ class Step(Protocol):
 class StepResult:
     name: str
     rows_processed: int
+    bytes_read: Optional[int] = None
+    bytes_written: Optional[int] = None
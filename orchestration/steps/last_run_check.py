@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import subprocess
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -34,23 +33,19 @@ class LastRunCheck:
         if not sql_path.exists():
             raise RuntimeError(f"health SQL not found: {sql_path}")
 
-        cmd = [
-            "psql",
+        # Same runner as run_start/run_finish: pooled connection, psql fallback
+        from orchestration.run_pipeline import run_sql_file
+
+        out = run_sql_file(
             ctx.database_url,
-            "-qAt",  # quiet | unaligned | tuples-only
-            "-v",
-            "ON_ERROR_STOP=1",  # fail hard on SQL error
-            "-v",
-            f"pipeline_name={ctx.pipeline_name}",
-            "-v",
-            f"environment={ctx.environment}",
-            "-v",
-            f"max_age_minutes={self.max_age_minutes}",
-            "-f",
-            str(sql_path),
-        ]
-
-        out = subprocess.check_output(cmd, text=True).strip()
+            sql_path,
+            vars={
+                "pipeline_name": ctx.pipeline_name,
+                "environment": ctx.environment,
+                "max_age_minutes": str(self.max_age_minutes),
+            },
+            quiet=True,
+        ).strip()
         code = int(out) if out else 0
 
         if code != 1:
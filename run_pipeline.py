@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from datetime import date, datetime
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
+import argparse
 import csv
-from typing import Any, Dict, Iterable, List
+import tracemalloc
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+import pandas as pd
 
 from src.phc_analytics.integrations.prestashop.client import PrestaShopClient, PrestaShopConfig
 from src.phc_analytics.transformations.prestashop_normalize import (
+    iter_normalized_customers,
     normalize_customers,
     normalize_products,
     normalize_orders,
@@ -17,7 +23,29 @@ from src.phc_analytics.transformations.dim_product import build_dim_product
 from src.phc_analytics.transformations.dim_date import generate_dim_date
 from src.phc_analytics.transformations.fact_orders_enrich import enrich_orders_with_date
 from src.phc_analytics.transformations.fact_order_lines_enrich import enrich_order_lines
-from src.phc_analytics.transformations.agg_sales_by_product import agg_sales_by_product
+from src.phc_analytics.transformations.agg_sales_by_product import (
+    agg_sales_by_product,
+    update_sales_by_product,
+)
+from src.phc_analytics.transformations.prestashop_normalize_df import (
+    normalize_customers_df,
+    normalize_products_df,
+    normalize_orders_df,
+    normalize_order_lines_df,
+)
+from src.phc_analytics.transformations.gold_incremental import rebuild_gold_incremental
+from src.phc_analytics.utils.date_keys import date_from_key, to_date_key
+from src.phc_analytics.utils.spans import SpanRecorder, peak_rss_mb
+from src.phc_analytics.transformations.star_schema_df import (
+    build_dim_customer_df,
+    build_dim_product_df,
+    enrich_orders_with_date_df,
+    enrich_order_lines_df,
+    agg_sales_by_product_df,
+)
+
+# Implementacoes da gold layer: "rows" (listas de dicts) ou "pandas" (DataFrames)
+ENGINES = ("rows", "pandas")
 
 
 def write_csv(path: Path, rows: List[Dict[str, Any]]) -> None:
@@ -40,62 +68,364 @@ def write_csv(path: Path, rows: List[Dict[str, Any]]) -> None:
         w.writerows(rows)
 
 
+def write_csv_df(path: Path, df: pd.DataFrame) -> None:
+    """
+    Versao DataFrame de write_csv: mesmo ficheiro byte a byte
+    (header + linhas, terminador \\r\\n do modulo csv, vazio se nao ha linhas).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if df.empty:
+        path.write_text("")
+        return
+
+    df.to_csv(path, index=False, lineterminator="\r\n", encoding="utf-8")
+
+
+class CsvAppender:
+    """
+    write_csv por partes (modo streaming): header com as colunas da 1a linha
+    escrita, chunks seguintes acrescentados. Sem linhas -> ficheiro vazio.
+    O ficheiro final e igual ao de write_csv com todas as linhas.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.rows_written = 0
+        self._file: Optional[TextIO] = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=list(rows[0].keys()))
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+        self.rows_written += len(rows)
+
+    def close(self) -> None:
+        if self._file is None:
+            write_csv(self.path, [])
+        else:
+            self._file.close()
+            self._file = None
+
+
 def _extract_date_keys_from_orders(orders: List[Dict[str, Any]]) -> List[int]:
     """
     Extrai as chaves de data (YYYYMMDD) a partir de orders.created_at.
     """
-    keys: List[int] = []
-    for o in orders:
-        created_at = o["created_at"]  # ISO string
-        k = int(datetime.fromisoformat(created_at).strftime("%Y%m%d"))
-        keys.append(k)
-    return keys
+    return [to_date_key(o["created_at"]) for o in orders]  # ISO string
 
 
-def main() -> None:
-    # 1) SOURCE (Bronze): obter raw payloads (mock por agora)
-    client = PrestaShopClient(PrestaShopConfig(base_url="https://mock"))
-    raw_customers = client.get_customers_mock()
-    raw_products = client.get_products_mock()
-    raw_orders = client.get_orders_mock()
+def _gold_rows(
+    raw_customers: Dict[str, Any],
+    raw_products: Dict[str, Any],
+    raw_orders: Dict[str, Any],
+    spans: Optional[SpanRecorder] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """spans: se definido, regista o tempo/memoria de cada etapa (ex: benchmarks)."""
+    spans = spans if spans is not None else SpanRecorder(pipeline="prestashop_gold")
 
     # 2) SILVER: normalizar + validar (Data Quality / contrato)
-    customers_silver = normalize_customers(raw_customers)
-    products_silver = normalize_products(raw_products)
-    orders_silver = normalize_orders(raw_orders)
-    order_lines_silver = normalize_order_lines(raw_orders)
+    with spans.span("silver"):
+        customers_silver = normalize_customers(raw_customers)
+        products_silver = normalize_products(raw_products)
+        orders_silver = normalize_orders(raw_orders)
+        order_lines_silver = normalize_order_lines(raw_orders)
 
     # 3) GOLD: dims + facts (Star Schema)
-    dim_customer = build_dim_customer(customers_silver)
-    dim_product = build_dim_product(products_silver)
+    with spans.span("dim_customer"):
+        dim_customer = build_dim_customer(customers_silver)
+    with spans.span("dim_product"):
+        dim_product = build_dim_product(products_silver)
 
-    fact_orders = enrich_orders_with_date(orders_silver)
-    fact_order_lines = enrich_order_lines(order_lines_silver, orders_silver)
+    with spans.span("fact_orders"):
+        fact_orders = enrich_orders_with_date(orders_silver)
+    with spans.span("fact_order_lines"):
+        fact_order_lines = enrich_order_lines(order_lines_silver, orders_silver)
 
     # dim_date: derivada das datas existentes nas orders
-    date_keys = _extract_date_keys_from_orders(orders_silver)
-    min_key, max_key = min(date_keys), max(date_keys)
+    with spans.span("dim_date"):
+        date_keys = _extract_date_keys_from_orders(orders_silver)
+        dim_date_rows = generate_dim_date(date_from_key(min(date_keys)), date_from_key(max(date_keys)))
 
-    # converter YYYYMMDD -> date
-    min_date = date(min_key // 10000, (min_key // 100) % 100, min_key % 100)
-    max_date = date(max_key // 10000, (max_key // 100) % 100, max_key % 100)
+    # 4) SERVING: agregados para consumo
+    with spans.span("agg_sales_by_product"):
+        agg_by_product = agg_sales_by_product(fact_order_lines, dim_product)
 
-    dim_date_rows = generate_dim_date(min_date, max_date)
+    return {
+        "dim_customer": dim_customer,
+        "dim_product": dim_product,
+        "dim_date": dim_date_rows,
+        "fact_orders": fact_orders,
+        "fact_order_lines": fact_order_lines,
+        "agg_sales_by_product": agg_by_product,
+    }
+
+
+def _gold_pandas(
+    raw_customers: Dict[str, Any],
+    raw_products: Dict[str, Any],
+    raw_orders: Dict[str, Any],
+    spans: Optional[SpanRecorder] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Mesmos passos (e spans) que _gold_rows, em DataFrames (merge/groupby vetorizados)."""
+    spans = spans if spans is not None else SpanRecorder(pipeline="prestashop_gold")
+
+    with spans.span("silver"):
+        customers_silver = normalize_customers_df(raw_customers)
+        products_silver = normalize_products_df(raw_products)
+        orders_silver = normalize_orders_df(raw_orders)
+        order_lines_silver = normalize_order_lines_df(raw_orders)
+
+    with spans.span("dim_customer"):
+        dim_customer = build_dim_customer_df(customers_silver)
+    with spans.span("dim_product"):
+        dim_product = build_dim_product_df(products_silver)
+    with spans.span("fact_orders"):
+        fact_orders = enrich_orders_with_date_df(orders_silver)
+    with spans.span("fact_order_lines"):
+        fact_order_lines = enrich_order_lines_df(order_lines_silver, orders_silver)
+
+    with spans.span("dim_date"):
+        date_keys = fact_orders["order_date_key"]
+        dim_date_rows = generate_dim_date(
+            date_from_key(int(date_keys.min())), date_from_key(int(date_keys.max()))
+        )
+
+    with spans.span("agg_sales_by_product"):
+        agg_by_product = agg_sales_by_product_df(fact_order_lines, dim_product)
+
+    return {
+        "dim_customer": dim_customer,
+        "dim_product": dim_product,
+        "dim_date": pd.DataFrame(dim_date_rows),
+        "fact_orders": fact_orders,
+        "fact_order_lines": fact_order_lines,
+        "agg_sales_by_product": agg_by_product,
+    }
+
+
+def _chunks(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _items(raw: Any, key: str) -> Iterable[Dict[str, Any]]:
+    """Payload ({"orders": [...]}) ou os items ja extraidos (lista/gerador)."""
+    return raw[key] if isinstance(raw, dict) else raw
 
-    # 4) SERVING: agregados para consumo
-    agg_by_product = agg_sales_by_product(fact_order_lines, dim_product)
 
-    # 5) OUTPUTS
-    out_dir = Path("out")
-    write_csv(out_dir / "dim_customer.csv", dim_customer)
+def run_gold_rows_chunked(
+    raw_customers: Any, raw_products: Any, raw_orders: Any, out_dir: Path, chunk_size: int
+) -> Dict[str, int]:
+    """
+    Modo streaming de _gold_rows: escreve os mesmos 6 CSVs com memoria limitada.
+
+    - dim_customer: escrito por chunks
+    - dim_product: fica em memoria (lookup do agregado; dimensao pequena)
+    - orders: janelas de chunk_size orders -> silver -> fact_orders /
+      fact_order_lines acrescentados ao CSV; so ficam em memoria o min/max
+      do date_key (dim_date) e os acumuladores de agg_sales_by_product
+    - raw_orders pode ser um gerador (ex: PrestaShopClient.stream_items)
+
+    Cada order traz as suas linhas, por isso o join linha -> order e local ao
+    chunk. Devolve o numero de linhas escritas por ficheiro.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+
+    written: Dict[str, int] = {}
+
+    dim_customer = CsvAppender(out_dir / "dim_customer.csv")
+    try:
+        for chunk in _chunks(iter_normalized_customers(_items(raw_customers, "customers")), chunk_size):
+            dim_customer.write(build_dim_customer(chunk))
+    finally:
+        dim_customer.close()
+    written["dim_customer"] = dim_customer.rows_written
+
+    dim_product = build_dim_product(normalize_products(raw_products))
     write_csv(out_dir / "dim_product.csv", dim_product)
+    written["dim_product"] = len(dim_product)
+    prod_by_key = {p["product_key"]: p for p in dim_product}
+
+    agg: Dict[int, Dict[str, Any]] = {}
+    min_key: Optional[int] = None
+    max_key: Optional[int] = None
+
+    fact_orders_csv = CsvAppender(out_dir / "fact_orders.csv")
+    fact_lines_csv = CsvAppender(out_dir / "fact_order_lines.csv")
+    try:
+        for raw_chunk in _chunks(_items(raw_orders, "orders"), chunk_size):
+            orders_silver = normalize_orders(raw_chunk)
+            fact_orders = enrich_orders_with_date(orders_silver)
+            fact_order_lines = enrich_order_lines(normalize_order_lines(raw_chunk), orders_silver)
+
+            keys = [o["order_date_key"] for o in fact_orders]
+            min_key = min(keys) if min_key is None else min(min_key, *keys)
+            max_key = max(keys) if max_key is None else max(max_key, *keys)
+            update_sales_by_product(agg, fact_order_lines, prod_by_key)
+
+            fact_orders_csv.write(fact_orders)
+            fact_lines_csv.write(fact_order_lines)
+    finally:
+        fact_orders_csv.close()
+        fact_lines_csv.close()
+    written["fact_orders"] = fact_orders_csv.rows_written
+    written["fact_order_lines"] = fact_lines_csv.rows_written
+
+    if min_key is None or max_key is None:
+        raise ValueError("No orders to build dim_date")  # como min([]) no batch
+    dim_date_rows = generate_dim_date(date_from_key(min_key), date_from_key(max_key))
     write_csv(out_dir / "dim_date.csv", dim_date_rows)
-    write_csv(out_dir / "fact_orders.csv", fact_orders)
-    write_csv(out_dir / "fact_order_lines.csv", fact_order_lines)
-    write_csv(out_dir / "agg_sales_by_product.csv", agg_by_product)
+    written["dim_date"] = len(dim_date_rows)
+
+    write_csv(out_dir / "agg_sales_by_product.csv", list(agg.values()))
+    written["agg_sales_by_product"] = len(agg)
+    return written
+
+
+@dataclass
+class RunReport:
+    """Resumo de uma execucao do pipeline (memoria em MB)."""
+
+    engine: str
+    chunk_size: Optional[int]
+    peak_rss_mb: Optional[float]
+    peak_traced_mb: Optional[float] = None
+
+
+def main(
+    engine: str = "rows",
+    out_dir: Path = Path("out"),
+    chunk_size: Optional[int] = None,
+    trace_memory: bool = False,
+    changed_orders: Optional[Iterable[int]] = None,
+) -> RunReport:
+    """
+    Pipeline end-to-end (mock PrestaShop -> CSVs em out_dir).
+
+    engine:
+    - "rows":   transformacoes linha a linha (listas de dicts)
+    - "pandas": versao colunar (prestashop_normalize_df + star_schema_df);
+                mesmos CSVs, bem mais rapida em volumes grandes
+
+    chunk_size: se definido, modo streaming (run_gold_rows_chunked, engine
+    "rows"): orders processadas em janelas de chunk_size, memoria limitada.
+
+    changed_orders: se definido, modo incremental (rebuild_gold_incremental):
+    dims regeneradas, facts/agregado/dim_date existentes em out_dir atualizados
+    so para essas orders (ex: prestashop_to_raw.iter_changed_ids desde o
+    watermark "since" de run_prestashop_to_raw).
+
+    Reporta o pico de memoria: RSS do processo (inclui imports) e, com
+    trace_memory=True, o pico das alocacoes Python via tracemalloc
+    (mais preciso, mas torna a execucao ~2x mais lenta).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r} (expected one of {ENGINES})")
+    if chunk_size is not None and engine != "rows":
+        raise ValueError("chunk_size (streaming mode) requires engine='rows'")
+    if changed_orders is not None and (engine != "rows" or chunk_size is not None):
+        raise ValueError("changed_orders (incremental mode) requires engine='rows' without chunk_size")
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        _run(engine, out_dir, chunk_size, changed_orders)
+        peak_traced = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    report = RunReport(engine, chunk_size, peak_rss_mb(), peak_traced)
+    mode = f"chunk_size={chunk_size}" if chunk_size else "batch"
+    if changed_orders is not None:
+        mode = "incremental"
+    memory = f"peak RSS {report.peak_rss_mb:.1f} MB" if report.peak_rss_mb is not None else "peak RSS n/a"
+    if report.peak_traced_mb is not None:
+        memory += f", peak traced {report.peak_traced_mb:.1f} MB"
+    print(f"OK: pipeline generated CSVs in {out_dir} (engine={engine}, {mode}; {memory})")
+    return report
+
+
+def _run(
+    engine: str, out_dir: Path, chunk_size: Optional[int], changed_orders: Optional[Iterable[int]] = None
+) -> None:
+    # 1) SOURCE (Bronze): obter raw payloads (mock por agora)
+    client = PrestaShopClient(PrestaShopConfig(base_url="https://mock"))
+    raw_customers = client.get_customers_mock()
+    raw_products = client.get_products_mock()
+    raw_orders = client.get_orders_mock()
+
+    _write_gold(raw_customers, raw_products, raw_orders, out_dir, engine, chunk_size, changed_orders)
+
+
+def _write_gold(
+    raw_customers: Any,
+    raw_products: Any,
+    raw_orders: Any,
+    out_dir: Path,
+    engine: str = "rows",
+    chunk_size: Optional[int] = None,
+    changed_orders: Optional[Iterable[int]] = None,
+    spans: Optional[SpanRecorder] = None,
+) -> None:
+    """
+    Passos 2-5 de main() sobre raw payloads ja obtidos.
+
+    spans (modo batch): etapas de _gold_rows/_gold_pandas + "write_csv".
+    """
+    spans = spans if spans is not None else SpanRecorder(pipeline="prestashop_gold")
 
-    print("OK: pipeline generated CSVs in ./out")
+    # 2-4) SILVER + GOLD + SERVING, 5) OUTPUTS
+    if changed_orders is not None:
+        dim_product = build_dim_product(normalize_products(raw_products))
+        write_csv(out_dir / "dim_customer.csv", build_dim_customer(normalize_customers(raw_customers)))
+        write_csv(out_dir / "dim_product.csv", dim_product)
+        rebuild_gold_incremental(out_dir, changed_orders, raw_orders, dim_product)
+    elif chunk_size is not None:
+        run_gold_rows_chunked(raw_customers, raw_products, raw_orders, out_dir, chunk_size)
+    elif engine == "pandas":
+        frames = _gold_pandas(raw_customers, raw_products, raw_orders, spans)
+        with spans.span("write_csv"):
+            for name, df in frames.items():
+                write_csv_df(out_dir / f"{name}.csv", df)
+    else:
+        tables = _gold_rows(raw_customers, raw_products, raw_orders, spans)
+        with spans.span("write_csv"):
+            for name, rows in tables.items():
+                write_csv(out_dir / f"{name}.csv", rows)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="PHC Analytics pipeline (mock PrestaShop -> CSVs)")
+    parser.add_argument("--engine", choices=ENGINES, default="rows")
+    parser.add_argument("--out-dir", type=Path, default=Path("out"))
+    parser.add_argument(
+        "--chunk-size", type=int, default=None, help="streaming mode: process orders in windows of N"
+    )
+    parser.add_argument("--trace-memory", action="store_true", help="also report tracemalloc peak")
+    parser.add_argument(
+        "--changed-orders",
+        type=lambda v: [int(i) for i in v.split(",") if i.strip()],
+        default=None,
+        help="incremental mode: comma-separated prestashop_order_ids to rebuild in the existing outputs",
+    )
+    args = parser.parse_args()
+    main(
+        engine=args.engine,
+        out_dir=args.out_dir,
+        chunk_size=args.chunk_size,
+        trace_memory=args.trace_memory,
+        changed_orders=args.changed_orders,
+    )
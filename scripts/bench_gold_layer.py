@@ -0,0 +1,72 @@
+"""
+Benchmark: gold layer linha a linha (listas de dicts) vs DataFrames.
+
+Uso:
+    python scripts/bench_gold_layer.py                 # 1e5, 1e6 linhas
+    python scripts/bench_gold_layer.py 100000 10000000
+
+Para cada tamanho gera orders sinteticas (staging.synthetic), corre o
+silver (normalize_*) e o gold (dims + facts + agregado) das duas
+implementacoes e confirma que dao o mesmo resultado.
+Tempos em segundos; 1e7 linhas precisa de ~10 GB de RAM (dicts Python).
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+import run_pipeline  # noqa: E402
+from phc_analytics.staging.synthetic import SyntheticConfig, raw_payloads  # noqa: E402
+
+LINES_PER_ORDER = 3  # media (1 + Poisson)
+
+
+def synthetic_raw(n_lines: int, seed: int = 7) -> Tuple[Dict[str, Any], ...]:
+    """Payloads raw (customers, products, orders) com ~n_lines linhas de encomenda."""
+    n_orders = max(1, n_lines // LINES_PER_ORDER)
+    cfg = SyntheticConfig(
+        n_customers=max(1, n_orders // 10),
+        n_products=500,
+        n_orders=n_orders,
+        mean_lines_per_order=LINES_PER_ORDER,
+        seed=seed,
+    )
+    return raw_payloads(cfg)
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def bench(n_lines: int) -> Dict[str, float]:
+    raw = synthetic_raw(n_lines)
+    t_rows, rows = _timed(lambda: run_pipeline._gold_rows(*raw))
+    t_pandas, frames = _timed(lambda: run_pipeline._gold_pandas(*raw))
+    for name, table in rows.items():
+        if frames[name].to_dict("records") != table:
+            raise AssertionError(f"{name}: pandas output differs from rows output")
+    return {"lines": n_lines, "rows_s": t_rows, "pandas_s": t_pandas}
+
+
+def main(argv: List[str]) -> None:
+    sizes = [int(float(a)) for a in argv] or [100_000, 1_000_000]
+    print(f"{'lines':>12} {'rows (s)':>10} {'pandas (s)':>11} {'speedup':>8}")
+    for n in sizes:
+        r = bench(n)
+        print(
+            f"{r['lines']:>12,} {r['rows_s']:>10.2f} {r['pandas_s']:>11.2f} "
+            f"{r['rows_s'] / r['pandas_s']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
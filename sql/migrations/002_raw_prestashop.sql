@@ -0,0 +1,34 @@
+-- ============================================================
+-- PHC_Analytics
+-- Raw PrestaShop landing tables (pipelines/prestashop_to_raw.py)
+-- Notes:
+--   * Safe to re-run (IF NOT EXISTS)
+--   * Loaded via COPY into a temp table + INSERT ... ON CONFLICT
+--     DO UPDATE ... WHERE payload IS DISTINCT FROM EXCLUDED.payload
+-- ============================================================
+CREATE SCHEMA IF NOT EXISTS raw;
+CREATE TABLE IF NOT EXISTS raw.prestashop_orders (
+  order_id TEXT PRIMARY KEY,
+  payload JSONB NOT NULL,
+  source_updated_at TIMESTAMPTZ NULL,
+  ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+COMMENT ON TABLE raw.prestashop_orders IS 'Raw PrestaShop orders payloads (JSONB, upsert by order_id)';
+CREATE TABLE IF NOT EXISTS raw.prestashop_customers (
+  customer_id TEXT PRIMARY KEY,
+  payload JSONB NOT NULL,
+  source_updated_at TIMESTAMPTZ NULL,
+  ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+COMMENT ON TABLE raw.prestashop_customers IS 'Raw PrestaShop customers payloads (JSONB, upsert by customer_id)';
+CREATE TABLE IF NOT EXISTS raw.prestashop_products (
+  product_id TEXT PRIMARY KEY,
+  payload JSONB NOT NULL,
+  source_updated_at TIMESTAMPTZ NULL,
+  ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+COMMENT ON TABLE raw.prestashop_products IS 'Raw PrestaShop products payloads (JSONB, upsert by product_id)';
+-- Incremental extraction: source_updated_at range scans
+CREATE INDEX IF NOT EXISTS ix_prestashop_orders_source_updated_at ON raw.prestashop_orders (source_updated_at);
+CREATE INDEX IF NOT EXISTS ix_prestashop_customers_source_updated_at ON raw.prestashop_customers (source_updated_at);
+CREATE INDEX IF NOT EXISTS ix_prestashop_products_source_updated_at ON raw.prestashop_products (source_updated_at);
@@ -0,0 +1,32 @@
+-- ============================================================
+-- PHC_Analytics
+-- Incremental load state (storage/watermarks.py)
+-- Notes:
+--   * Safe to re-run (IF NOT EXISTS)
+--   * watermark_ts is timestamptz (never compared as text)
+--   * Written with INSERT ... ON CONFLICT (entity_name): advance only
+-- ============================================================
+CREATE SCHEMA IF NOT EXISTS staging;
+CREATE TABLE IF NOT EXISTS staging.etl_watermarks (
+  entity_name TEXT PRIMARY KEY,
+  watermark_ts TIMESTAMPTZ NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+COMMENT ON TABLE staging.etl_watermarks IS 'Last source_updated_at loaded per entity (incremental extraction)';
+-- Older bootstrap kept watermark_ts as text: convert in place
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM information_schema.columns
+    WHERE table_schema = 'staging'
+      AND table_name = 'etl_watermarks'
+      AND column_name = 'watermark_ts'
+      AND data_type IN ('text', 'character varying')
+  ) THEN
+    ALTER TABLE staging.etl_watermarks
+      ALTER COLUMN watermark_ts TYPE TIMESTAMPTZ
+      USING NULLIF(watermark_ts, '')::timestamptz;
+  END IF;
+END
+$$;
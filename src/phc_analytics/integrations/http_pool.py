@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+import http.client
+import queue
+import threading
+import time
+
+
+class ConnectionPool:
+    """
+    LIFO pool of persistent (keep-alive) http.client connections to one host.
+
+    - acquire(): warmest idle connection, or a new one from `factory`
+    - release(): back to the pool; closed instead when `size` are already idle
+    - discard(): close a connection left in an unknown state (errors)
+
+    The pool never blocks: extra concurrent callers get a temporary
+    connection. Thread-safe.
+    """
+
+    def __init__(
+        self, factory: Callable[[], http.client.HTTPConnection], size: int = 4
+    ) -> None:
+        if size <= 0:
+            raise ValueError("size must be > 0")
+        self._factory = factory
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(
+            maxsize=size
+        )
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.connections_opened += 1
+            return self._factory()
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def discard(self, conn: http.client.HTTPConnection) -> None:
+        conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[http.client.HTTPConnection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            self.discard(conn)
+            raise
+        self.release(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter (thread-safe).
+
+    - rate_per_second: sustained request rate
+    - burst: max tokens accumulated while idle (requests allowed back-to-back)
+
+    acquire() reserves a token and sleeps (outside the lock) until it is due,
+    so concurrent workers are spread evenly instead of bursting together.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be > 0")
+        if burst <= 0:
+            raise ValueError("burst must be > 0")
+        self._rate = float(rate_per_second)
+        self._burst = float(burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take 1 token; returns the seconds waited."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            self._tokens -= 1.0
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
@@ -1,10 +1,85 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+    cast,
+)
+import http.client
 import os
+import threading
 import xmlrpc.client
 
+from ..resilience import CircuitBreaker, RetryPolicy, call_with_retry
+from .transport import PooledTransport
+
+T = TypeVar("T")
+
+# Methods with no side effects: safe to re-send after an ambiguous failure
+# (timeout / connection reset after the request may have been processed).
+_SAFE_TO_RESEND = frozenset(
+    {
+        "version",
+        "authenticate",
+        "search",
+        "search_read",
+        "search_count",
+        "read",
+        "read_group",
+        "fields_get",
+        "name_search",
+        "default_get",
+    }
+)
+
+# Gateway answers that mean the request never reached Odoo.
+_RETRYABLE_HTTP_STATUS = frozenset({429, 502, 503})
+
+# Faults raised when Odoo rolled the transaction back (concurrent update):
+# the call had no effect and can be re-sent as-is.
+_RETRYABLE_FAULT_MARKERS = (
+    "could not serialize access",
+    "deadlock detected",
+    "SerializationFailure",
+    "TransactionRollbackError",
+)
+
+
+def is_retryable_error(exc: BaseException, method: str = "") -> bool:
+    """
+    Classify an execute_kw / authenticate failure as retryable or fatal.
+
+    Retryable:
+      - connection refused (nothing was sent)
+      - HTTP 429/502/503 from a proxy in front of Odoo
+      - serialization / deadlock faults (transaction rolled back)
+      - timeouts, resets and 504 only for read-only methods: a create/write
+        may already have been applied, re-sending it could duplicate data
+    Fatal: any other Fault (access, validation, missing record...).
+    """
+    if isinstance(exc, xmlrpc.client.Fault):
+        text = str(exc.faultString)
+        return any(marker in text for marker in _RETRYABLE_FAULT_MARKERS)
+    if isinstance(exc, xmlrpc.client.ProtocolError):
+        if exc.errcode in _RETRYABLE_HTTP_STATUS:
+            return True
+        return exc.errcode == 504 and method in _SAFE_TO_RESEND
+    if isinstance(exc, ConnectionRefusedError):
+        return True
+    if isinstance(exc, (OSError, http.client.HTTPException)):
+        return method in _SAFE_TO_RESEND
+    return False
+
 
 @dataclass(frozen=True)
 class OdooConfig:
@@ -20,6 +95,18 @@ class OdooConfig:
     XML-RPC endpoints:
       - /xmlrpc/2/common  (auth, version)
       - /xmlrpc/2/object  (execute_kw)
+
+    Transport:
+      - timeout_seconds: socket timeout per call (connect + read)
+      - pool_size: max idle keep-alive connections kept per host
+      - gzip: accept gzip responses + gzip-encode large requests
+
+    Resilience (see is_retryable_error):
+      - max_retries: retries per call on retryable errors (0 = none)
+      - retry_backoff_seconds / retry_max_backoff_seconds: jittered
+        exponential backoff between retries
+      - circuit_failure_threshold: consecutive retryable failures that open
+        the circuit (calls then fail fast for circuit_reset_seconds)
     """
 
     url: str
@@ -27,6 +114,20 @@ class OdooConfig:
     login: str
     password: str
     timeout_seconds: int = 20
+    pool_size: int = 4
+    gzip: bool = False
+    max_retries: int = 3
+    retry_backoff_seconds: float = 0.5
+    retry_max_backoff_seconds: float = 30.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+
+    def retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(
+            max_attempts=self.max_retries + 1,
+            base_delay_seconds=self.retry_backoff_seconds,
+            max_delay_seconds=self.retry_max_backoff_seconds,
+        )
 
     def validate(self) -> None:
         if not self.url or not self.url.startswith(("http://", "https://")):
@@ -39,6 +140,43 @@ class OdooConfig:
             raise ValueError("password is required (set ODOO_PASSWORD)")
         if self.timeout_seconds <= 0:
             raise ValueError("timeout_seconds must be > 0")
+        if self.pool_size <= 0:
+            raise ValueError("pool_size must be > 0")
+        if self.max_retries < 0:
+            raise ValueError("max_retries must be >= 0")
+        self.retry_policy().validate()
+        if self.circuit_failure_threshold <= 0:
+            raise ValueError("circuit_failure_threshold must be > 0")
+        if self.circuit_reset_seconds < 0:
+            raise ValueError("circuit_reset_seconds must be >= 0")
+
+
+@dataclass(frozen=True)
+class ExecuteCall:
+    """One independent execute_kw call (input of OdooClient.map_execute)."""
+
+    model: str
+    method: str
+    args: Sequence[Any]
+    kwargs: Optional[Dict[str, Any]] = None
+
+
+@dataclass(frozen=True)
+class ExecuteResult:
+    """Outcome of one ExecuteCall: either value or error is set."""
+
+    call: ExecuteCall
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.value
 
 
 class OdooClient:
@@ -52,13 +190,25 @@ class OdooClient:
     def __init__(self, cfg: OdooConfig) -> None:
         cfg.validate()
         self._cfg = cfg
+        # One pooled keep-alive transport shared by both endpoints (same host).
+        self._transport = PooledTransport(
+            use_https=cfg.url.startswith("https://"),
+            timeout_seconds=cfg.timeout_seconds,
+            pool_size=cfg.pool_size,
+            gzip=cfg.gzip,
+        )
         self._common = xmlrpc.client.ServerProxy(
-            f"{cfg.url}/xmlrpc/2/common", allow_none=True
+            f"{cfg.url}/xmlrpc/2/common", transport=self._transport, allow_none=True
         )
         self._models = xmlrpc.client.ServerProxy(
-            f"{cfg.url}/xmlrpc/2/object", allow_none=True
+            f"{cfg.url}/xmlrpc/2/object", transport=self._transport, allow_none=True
         )
         self._uid: Optional[int] = None
+        self._retry = cfg.retry_policy()
+        self._breaker = CircuitBreaker(
+            failure_threshold=cfg.circuit_failure_threshold,
+            reset_timeout_seconds=cfg.circuit_reset_seconds,
+        )
 
     @classmethod
     def from_env(cls) -> "OdooClient":
@@ -69,12 +219,20 @@ class OdooClient:
           - ODOO_LOGIN
           - ODOO_PASSWORD
           - ODOO_TIMEOUT_SECONDS (optional)
+          - ODOO_POOL_SIZE (optional)
+          - ODOO_GZIP (optional, 1/true)
+          - ODOO_MAX_RETRIES (optional)
+          - ODOO_RETRY_BACKOFF_SECONDS (optional)
         """
         url = os.getenv("ODOO_URL", "").strip()
         db = os.getenv("ODOO_DB", "").strip()
         login = os.getenv("ODOO_LOGIN", "").strip()
         password = os.getenv("ODOO_PASSWORD", "").strip()
         timeout_s = int(os.getenv("ODOO_TIMEOUT_SECONDS", "20"))
+        pool_size = int(os.getenv("ODOO_POOL_SIZE", "4"))
+        use_gzip = os.getenv("ODOO_GZIP", "").strip().lower() in ("1", "true", "yes")
+        max_retries = int(os.getenv("ODOO_MAX_RETRIES", "3"))
+        backoff_s = float(os.getenv("ODOO_RETRY_BACKOFF_SECONDS", "0.5"))
         return cls(
             OdooConfig(
                 url=url,
@@ -82,19 +240,36 @@ class OdooClient:
                 login=login,
                 password=password,
                 timeout_seconds=timeout_s,
+                pool_size=pool_size,
+                gzip=use_gzip,
+                max_retries=max_retries,
+                retry_backoff_seconds=backoff_s,
             )
         )
 
+    def _call(self, method: str, fn: Callable[[], T]) -> T:
+        """Run one RPC with retries/backoff behind the client's circuit breaker."""
+        return call_with_retry(
+            fn,
+            policy=self._retry,
+            is_retryable=lambda exc: is_retryable_error(exc, method),
+            breaker=self._breaker,
+            what=f"Odoo {method}",
+        )
+
     def version(self) -> Dict[str, Any]:
-        v = self._common.version()
+        v = self._call("version", lambda: self._common.version())
         if isinstance(v, dict):
             return cast(Dict[str, Any], v)
         # Fallback for unexpected XML-RPC payloads
         return {"raw": v}
 
     def authenticate(self) -> int:
-        uid_any = self._common.authenticate(
-            self._cfg.db, self._cfg.login, self._cfg.password, {}
+        uid_any = self._call(
+            "authenticate",
+            lambda: self._common.authenticate(
+                self._cfg.db, self._cfg.login, self._cfg.password, {}
+            ),
         )
         if not uid_any:
             raise RuntimeError(
@@ -113,6 +288,15 @@ class OdooClient:
 
         return self._uid
 
+    def close(self) -> None:
+        """Close pooled keep-alive connections."""
+        self._transport.close()
+
+    @property
+    def target(self) -> str:
+        """Odoo instance this client writes to (url + db); no credentials."""
+        return f"{self._cfg.url.rstrip('/')}/{self._cfg.db}"
+
     @property
     def uid(self) -> int:
         if self._uid is None:
@@ -128,16 +312,60 @@ class OdooClient:
     ) -> Any:
         if kwargs is None:
             kwargs = {}
-        return self._models.execute_kw(
-            self._cfg.db,
-            self.uid,
-            self._cfg.password,
-            model,
+        uid = self.uid
+        return self._call(
             method,
-            list(args),
-            kwargs,
+            lambda: self._models.execute_kw(
+                self._cfg.db,
+                uid,
+                self._cfg.password,
+                model,
+                method,
+                list(args),
+                kwargs,
+            ),
         )
 
+    def map_execute(
+        self,
+        calls: Iterable[Union[ExecuteCall, Sequence[Any]]],
+        max_workers: Optional[int] = None,
+        per_model_limit: Optional[int] = None,
+    ) -> List[ExecuteResult]:
+        """
+        Fan out independent execute_kw calls over a bounded thread pool.
+
+        - max_workers: pool size (default: cfg.pool_size, one socket per worker)
+        - per_model_limit: max in-flight calls per model (default: max_workers)
+        - results come back in input order; a failing call does not abort the
+          others, its exception is returned in ExecuteResult.error
+
+        Only for calls that do not depend on each other (e.g. per-chunk creates,
+        per-order reads/writes).
+        """
+        items = [ExecuteCall(*c) if isinstance(c, (list, tuple)) else c for c in calls]
+        if not items:
+            return []
+        workers = max(1, int(max_workers or self._cfg.pool_size))
+        limit = max(1, int(per_model_limit or workers))
+        _ = self.uid  # authenticate once, before the fan-out
+        gates = {m: threading.BoundedSemaphore(limit) for m in {c.model for c in items}}
+
+        def _one(call: ExecuteCall) -> ExecuteResult:
+            with gates[call.model]:
+                try:
+                    value = self.execute_kw(
+                        call.model, call.method, call.args, call.kwargs
+                    )
+                except Exception as exc:
+                    return ExecuteResult(call, error=exc)
+            return ExecuteResult(call, value=value)
+
+        if workers == 1 or len(items) == 1:
+            return [_one(c) for c in items]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_one, items))
+
     # ---- Convenience helpers ----
 
     def search_read(
@@ -163,24 +391,76 @@ class OdooClient:
             },
         )
 
+    def search_read_iter(
+        self,
+        model: str,
+        domain: Optional[List[Any]] = None,
+        fields: Optional[List[str]] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream a whole domain in chunks of `chunk_size` records.
+
+        Keyset pagination on id ("id > last_id", order "id asc") instead of a
+        growing offset: each page is an index range scan on the server and
+        only one chunk is held in memory on the client.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be > 0")
+        domain = list(domain or [])
+        fields = list(fields or ["id"])
+        if "id" not in fields:
+            fields.append("id")
+
+        last_id = 0
+        while True:
+            rows = self.search_read(
+                model,
+                domain=[("id", ">", last_id)] + domain,
+                fields=fields,
+                limit=chunk_size,
+                order="id asc",
+            )
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last_id = int(rows[-1]["id"])
+
     def create(self, model: str, values: Dict[str, Any]) -> int:
         return int(self.execute_kw(model, "create", [values]))
 
+    def create_many(self, model: str, values_list: List[Dict[str, Any]]) -> List[int]:
+        """
+        Multi-record create (1 RPC for N records).
+        Odoo returns the new ids in the same order as values_list.
+        """
+        if not values_list:
+            return []
+        ids = self.execute_kw(model, "create", [list(values_list)])
+        if isinstance(ids, int):
+            return [ids]
+        return [int(i) for i in ids]
+
     def write(self, model: str, ids: List[int], values: Dict[str, Any]) -> bool:
         return bool(self.execute_kw(model, "write", [ids, values]))
 
-    def list_installed_modules(self, limit: int = 500) -> List[str]:
-        rows = self.search_read(
+    def list_installed_modules(self, limit: Optional[int] = None) -> List[str]:
+        names: List[str] = []
+        for rows in self.search_read_iter(
             "ir.module.module",
             domain=[("state", "=", "installed")],
             fields=["name"],
-            limit=limit,
-        )
-        return sorted(r["name"] for r in rows if "name" in r)
+            chunk_size=500,
+        ):
+            names.extend(r["name"] for r in rows if "name" in r)
+        names.sort()
+        return names[:limit] if limit else names
 
     def healthcheck(self) -> Dict[str, Any]:
         v = self.version()
-        mods = self.list_installed_modules(limit=300)
+        mods = self.list_installed_modules()
         return {
             "ok": True,
             "url": self._cfg.url,
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+import http.client
+import ssl
+import threading
+import xmlrpc.client
+
+from ..http_pool import ConnectionPool
+
+# Requests above this size (bytes) are gzip-encoded when gzip is enabled.
+GZIP_THRESHOLD_BYTES = 1400
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """
+    XML-RPC transport with a pool of persistent (keep-alive) HTTP connections.
+
+    Why:
+      - the default ServerProxy transport keeps a single connection, is not
+        thread-safe and ignores any timeout (socket blocks forever);
+      - sync jobs issue tens of thousands of small execute_kw calls, so
+        TCP/TLS setup per call dominates the latency.
+
+    Behaviour:
+      - up to `pool_size` idle connections are kept per host (LIFO, so the
+        warmest socket is reused first); extra concurrent callers open a
+        temporary connection that is closed when the pool is full
+      - `timeout_seconds` is applied to every socket (connect + read)
+      - gzip=True: accept gzip responses and gzip-encode large requests
+      - stale keep-alive sockets are retried once (stdlib Transport.request)
+    """
+
+    def __init__(
+        self,
+        *,
+        use_https: bool = False,
+        timeout_seconds: float = 20,
+        pool_size: int = 4,
+        gzip: bool = False,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        super().__init__()
+        if pool_size <= 0:
+            raise ValueError("pool_size must be > 0")
+        self._use_https = use_https
+        self._timeout = timeout_seconds
+        self._pool_size = pool_size
+        self._ssl_context = ssl_context
+        self._pools: Dict[str, ConnectionPool] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.accept_gzip_encoding = gzip
+        self.encode_threshold = GZIP_THRESHOLD_BYTES if gzip else None
+        self.connections_opened = 0
+
+    # ---- pool ----
+
+    def _pool(self, host: Any) -> ConnectionPool:
+        key = str(host)
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = ConnectionPool(
+                    lambda: self._new_connection(host), size=self._pool_size
+                )
+            return self._pools[key]
+
+    def _new_connection(self, host: Any) -> http.client.HTTPConnection:
+        chost, self._extra_headers, _x509 = self.get_host_info(host)
+        with self._lock:
+            self.connections_opened += 1
+        if self._use_https:
+            return http.client.HTTPSConnection(
+                chost, timeout=self._timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(chost, timeout=self._timeout)
+
+    # ---- xmlrpc.client.Transport hooks ----
+
+    def make_connection(self, host: Any) -> http.client.HTTPConnection:
+        # single_request hands over the pooled connection via thread-local state
+        conn = getattr(self._local, "conn", None)
+        return conn if conn is not None else self._new_connection(host)
+
+    def single_request(
+        self, host: Any, handler: str, request_body: bytes, verbose: bool = False
+    ) -> Any:
+        pool = self._pool(host)
+        conn = pool.acquire()
+        self._local.conn = conn
+        try:
+            self.send_request(host, handler, request_body, verbose)
+            resp = conn.getresponse()
+            if resp.status == 200:
+                self.verbose = verbose
+                result = self.parse_response(resp)
+                pool.release(conn)
+                return result
+        except xmlrpc.client.Fault:
+            # Fault is raised after the body was fully read: socket is reusable.
+            pool.release(conn)
+            raise
+        except Exception:
+            # Unexpected errors leave the connection in an unknown state.
+            pool.discard(conn)
+            raise
+        finally:
+            self._local.conn = None
+
+        # Error response: drain (to keep the socket) or drop the connection.
+        if resp.getheader("content-length", ""):
+            resp.read()
+            pool.release(conn)
+        else:
+            pool.discard(conn)
+        raise xmlrpc.client.ProtocolError(
+            str(host) + handler, resp.status, resp.reason, dict(resp.getheaders())
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            pools: List[ConnectionPool] = list(self._pools.values())
+            self._pools = {}
+        for pool in pools:
+            pool.close()
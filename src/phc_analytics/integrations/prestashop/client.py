@@ -1,11 +1,60 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+import gzip
+import http.client
 import json
 import os
-import urllib.request
-import urllib.error
+import threading
+import urllib.parse
+import zlib
+
+from ..http_pool import ConnectionPool, TokenBucket
+from ..resilience import CircuitBreaker, RetryPolicy, TransientError, call_with_retry
+from .streaming import iter_json_items
+
+# Paginacao da API (limit=offset,count)
+DEFAULT_PAGE_SIZE = 100
+
+# Limite superior do intervalo filter[date_upd]=[since,FAR_FUTURE]
+_FAR_FUTURE = "2999-12-31 23:59:59"
+
+# Tamanho dos blocos lidos do socket em stream_items
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Respostas HTTP transitorias (rate limit / loja ou proxy em baixo)
+RETRYABLE_HTTP_STATUS = frozenset({429, 500, 502, 503, 504})
+
+T = TypeVar("T")
+
+
+def _ps_datetime(ts: str) -> str:
+    """
+    Converte um timestamp ISO (ex: watermark "1970-01-01T00:00:00Z")
+    para o formato dos filtros PrestaShop: "YYYY-MM-DD HH:MM:SS".
+
+    PrestaShop guarda date_upd em hora local da loja (sem timezone);
+    mantemos a hora "de parede" do watermark e descartamos o offset.
+    """
+    parsed = datetime.fromisoformat(ts.strip().replace("Z", "+00:00"))
+    return parsed.replace(tzinfo=None).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _iter_body(resp: http.client.HTTPResponse, encoding: str) -> Iterator[bytes]:
+    """Body da resposta em blocos (descomprime gzip de forma incremental)."""
+    inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding == "gzip" else None
+    while True:
+        chunk = resp.read(STREAM_CHUNK_BYTES)
+        if not chunk:
+            break
+        yield inflate.decompress(chunk) if inflate else chunk
+    if inflate:
+        yield inflate.flush()
 
 
 @dataclass(frozen=True)
@@ -16,12 +65,56 @@ class PrestaShopConfig:
     - base_url: URL base da loja / endpoint (ex: https://example.com)
     - api_key: chave/token para autenticar (pode ser vazio no modo mock)
     - timeout_seconds: timeout de rede (segundos)
+    - pool_size: ligacoes keep-alive mantidas abertas para o host
+    - max_workers: paginas pedidas em paralelo (1 = sequencial)
+    - rate_limit_per_second: teto de pedidos/s (token bucket; 0 = sem limite)
+    - rate_limit_burst: pedidos seguidos permitidos apos periodo parado
+    - gzip: pedir respostas comprimidas (Accept-Encoding: gzip)
+    - max_retries: repeticoes por pedido em erros transitorios (0 = nenhuma)
+    - retry_backoff_seconds / retry_max_backoff_seconds: espera exponencial
+      com jitter entre repeticoes
+    - circuit_failure_threshold: falhas transitorias seguidas que abrem o
+      circuito (pedidos falham logo durante circuit_reset_seconds)
     """
+
     base_url: str
     api_key: str = ""
     timeout_seconds: int = 20
+    pool_size: int = 4
+    max_workers: int = 1
+    rate_limit_per_second: float = 0.0
+    rate_limit_burst: int = 1
+    gzip: bool = True
+    max_retries: int = 3
+    retry_backoff_seconds: float = 0.5
+    retry_max_backoff_seconds: float = 30.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+
+    def retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(
+            max_attempts=self.max_retries + 1,
+            base_delay_seconds=self.retry_backoff_seconds,
+            max_delay_seconds=self.retry_max_backoff_seconds,
+        )
 
     def validate(self) -> None:
+        if self.pool_size <= 0:
+            raise ValueError("pool_size must be > 0")
+        if self.max_workers <= 0:
+            raise ValueError("max_workers must be > 0")
+        if self.rate_limit_per_second < 0:
+            raise ValueError("rate_limit_per_second must be >= 0")
+        if self.rate_limit_burst <= 0:
+            raise ValueError("rate_limit_burst must be > 0")
+        if self.max_retries < 0:
+            raise ValueError("max_retries must be >= 0")
+        self.retry_policy().validate()
+        if self.circuit_failure_threshold <= 0:
+            raise ValueError("circuit_failure_threshold must be > 0")
+        if self.circuit_reset_seconds < 0:
+            raise ValueError("circuit_reset_seconds must be >= 0")
+
         # MOCK mode: allow empty base_url when api_key is empty (no real HTTP calls)
         if not self.api_key and not self.base_url:
             if self.timeout_seconds <= 0:
@@ -48,6 +141,19 @@ class PrestaShopClient:
     def __init__(self, config: PrestaShopConfig) -> None:
         config.validate()
         self._cfg = config
+        # Ligacoes criadas so no 1o pedido real (modo mock nao abre sockets)
+        self._pool: Optional[ConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._limiter: Optional[TokenBucket] = (
+            TokenBucket(config.rate_limit_per_second, burst=config.rate_limit_burst)
+            if config.rate_limit_per_second > 0
+            else None
+        )
+        self._retry = config.retry_policy()
+        self._breaker = CircuitBreaker(
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout_seconds=config.circuit_reset_seconds,
+        )
 
     @classmethod
     def from_env(cls) -> "PrestaShopClient":
@@ -58,34 +164,328 @@ class PrestaShopClient:
         - PRESTASHOP_BASE_URL
         - PRESTASHOP_API_KEY
         - PRESTASHOP_TIMEOUT_SECONDS (opcional)
+        - PRESTASHOP_POOL_SIZE (opcional)
+        - PRESTASHOP_MAX_WORKERS (opcional)
+        - PRESTASHOP_RATE_LIMIT_PER_SECOND (opcional; 0 = sem limite)
+        - PRESTASHOP_RATE_LIMIT_BURST (opcional)
+        - PRESTASHOP_MAX_RETRIES (opcional)
+        - PRESTASHOP_RETRY_BACKOFF_SECONDS (opcional)
         """
         base_url = os.getenv("PRESTASHOP_BASE_URL", "").strip()
         api_key = os.getenv("PRESTASHOP_API_KEY", "").strip()
         timeout_s = int(os.getenv("PRESTASHOP_TIMEOUT_SECONDS", "20"))
-        return cls(PrestaShopConfig(base_url=base_url, api_key=api_key, timeout_seconds=timeout_s))
+        return cls(
+            PrestaShopConfig(
+                base_url=base_url,
+                api_key=api_key,
+                timeout_seconds=timeout_s,
+                pool_size=int(os.getenv("PRESTASHOP_POOL_SIZE", "4")),
+                max_workers=int(os.getenv("PRESTASHOP_MAX_WORKERS", "1")),
+                rate_limit_per_second=float(
+                    os.getenv("PRESTASHOP_RATE_LIMIT_PER_SECOND", "0")
+                ),
+                rate_limit_burst=int(os.getenv("PRESTASHOP_RATE_LIMIT_BURST", "1")),
+                max_retries=int(os.getenv("PRESTASHOP_MAX_RETRIES", "3")),
+                retry_backoff_seconds=float(
+                    os.getenv("PRESTASHOP_RETRY_BACKOFF_SECONDS", "0.5")
+                ),
+            )
+        )
+
+    # ---- HTTP (keep-alive pool) ----
+
+    def _connection_pool(self) -> ConnectionPool:
+        with self._pool_lock:
+            if self._pool is None:
+                parts = urllib.parse.urlsplit(self._cfg.base_url)
+                timeout = self._cfg.timeout_seconds
+                if parts.scheme == "https":
+
+                    def factory() -> http.client.HTTPConnection:
+                        return http.client.HTTPSConnection(
+                            parts.netloc, timeout=timeout
+                        )
+
+                else:
+
+                    def factory() -> http.client.HTTPConnection:
+                        return http.client.HTTPConnection(parts.netloc, timeout=timeout)
+
+                self._pool = ConnectionPool(factory, size=self._cfg.pool_size)
+            return self._pool
+
+    @property
+    def connections_opened(self) -> int:
+        return self._pool.connections_opened if self._pool else 0
+
+    def close(self) -> None:
+        """Fecha as ligacoes keep-alive abertas."""
+        if self._pool is not None:
+            self._pool.close()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Accept": "application/json"}
+        if self._cfg.gzip:
+            headers["Accept-Encoding"] = "gzip"
+        # Autenticacao: depende do modo. Mantemos header generico sem assumir formato.
+        if self._cfg.api_key:
+            headers["Authorization"] = f"Bearer {self._cfg.api_key}"
+        return headers
+
+    def _url(self, path: str) -> Tuple[str, str]:
+        base = urllib.parse.urlsplit(self._cfg.base_url)
+        target = base.path.rstrip("/") + "/" + path.lstrip("/")
+        return target, f"{base.scheme}://{base.netloc}{target}"
+
+    def _call(self, fn: Callable[[], T], url: str) -> T:
+        """Retries/backoff para TransientError, atras do circuit breaker."""
+        return call_with_retry(
+            fn,
+            policy=self._retry,
+            is_retryable=lambda exc: isinstance(exc, TransientError),
+            breaker=self._breaker,
+            what=url,
+        )
+
+    def _open(
+        self, path: str
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        1 tentativa de GET numa ligacao keep-alive do pool.
+
+        - respeita o rate limit (token bucket) antes de cada pedido
+        - rede/timeout e HTTP 429/5xx -> TransientError (GET pode repetir-se)
+        - restantes HTTP >= 400 -> RuntimeError (fatal, nao repete)
+        """
+        target, url = self._url(path)
+        if self._limiter is not None:
+            self._limiter.acquire()
+
+        pool = self._connection_pool()
+        # 2 tentativas: um socket keep-alive parado pode ter sido fechado pelo servidor
+        for attempt in (0, 1):
+            conn = pool.acquire()
+            try:
+                conn.request("GET", target, headers=self._headers())
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError) as e:
+                pool.discard(conn)
+                if attempt:
+                    raise TransientError(f"Network error calling {url}") from e
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                pool.discard(conn)
+                raise TransientError(f"Network error calling {url}") from e
+            break
+
+        if resp.status < 400:
+            return conn, resp
+        pool.discard(conn)
+        if resp.status in RETRYABLE_HTTP_STATUS:
+            raise TransientError(f"HTTP error {resp.status} calling {url}")
+        raise RuntimeError(f"HTTP error {resp.status} calling {url}")
+
+    @contextmanager
+    def _response(
+        self, path: str, retry: bool = True
+    ) -> Iterator[Tuple[http.client.HTTPResponse, str]]:
+        """
+        Abre um GET (com retries, salvo retry=False) e devolve (resposta, url).
+
+        A ligacao so volta ao pool se o body foi lido ate ao fim; caso
+        contrario (erro, stream abandonado) e' fechada. Erros de rede a meio
+        do body -> TransientError (sem expor o api_key).
+        """
+        _, url = self._url(path)
+        if retry:
+            conn, resp = self._call(lambda: self._open(path), url)
+        else:
+            conn, resp = self._open(path)
+
+        pool = self._connection_pool()
+        try:
+            yield resp, url
+        except (OSError, http.client.HTTPException) as e:
+            pool.discard(conn)
+            raise TransientError(f"Network error calling {url}") from e
+        except BaseException:
+            pool.discard(conn)
+            raise
+
+        if resp.will_close or not resp.isclosed():
+            pool.discard(conn)
+        else:
+            pool.release(conn)
 
     def _request(self, path: str) -> Dict[str, Any]:
         """
-        Faz um GET simples. Ainda nao e' o endpoint final (depende da API real).
-        Mantemos aqui apenas para estrutura.
+        GET que le o body inteiro e devolve o JSON descodificado.
+        O pedido inteiro (incluindo a leitura do body) e' repetido em erros
+        transitorios. Para payloads grandes usar stream_items.
         """
-        url = self._cfg.base_url.rstrip("/") + "/" + path.lstrip("/")
-        req = urllib.request.Request(url, method="GET")
-        # Autenticacao: depende do modo. Mantemos header generico sem assumir formato.
-        if self._cfg.api_key:
-            req.add_header("Authorization", f"Bearer {self._cfg.api_key}")
+        _, url = self._url(path)
+        return self._call(lambda: self._request_once(path), url)
 
+    def _request_once(self, path: str) -> Dict[str, Any]:
+        with self._response(path, retry=False) as (resp, url):
+            body = resp.read()
+            encoding = resp.getheader("Content-Encoding", "")
+
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        raw = body.decode("utf-8", errors="replace")
         try:
-            with urllib.request.urlopen(req, timeout=self._cfg.timeout_seconds) as resp:
-                raw = resp.read().decode("utf-8", errors="replace")
-                return json.loads(raw) if raw else {}
-        except urllib.error.HTTPError as e:
-            raise RuntimeError(f"HTTP error {e.code} calling {url}") from e
-        except urllib.error.URLError as e:
-            raise RuntimeError(f"Network error calling {url}") from e
+            return json.loads(raw) if raw else {}
         except json.JSONDecodeError as e:
             raise RuntimeError(f"Invalid JSON returned by {url}") from e
 
+    def stream_items(
+        self, resource: str, since: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Gera os items de um recurso 1 a 1, descodificados direto do socket.
+
+        Um unico pedido (sem paginacao) com o body lido em blocos de
+        STREAM_CHUNK_BYTES e descomprimido/descodificado incrementalmente:
+        a memoria fica limitada ao item atual, independentemente do tamanho
+        do payload. O gerador pode ser passado direto a normalize_* ou
+        _normalize_records.
+
+        So a abertura do pedido e' repetida em erros transitorios: depois do
+        1o item entregue, uma falha de rede sobe como TransientError.
+        """
+        path = self._page_query(resource, since)
+        with self._response(path) as (resp, url):
+            chunks = _iter_body(resp, resp.getheader("Content-Encoding", ""))
+            try:
+                for item in iter_json_items(chunks, resource):
+                    if isinstance(item, dict):
+                        yield item
+            except (ValueError, zlib.error) as e:
+                raise RuntimeError(f"Invalid JSON returned by {url}") from e
+
+    # ---- Extracao incremental (paginada) ----
+
+    def _page_query(
+        self,
+        resource: str,
+        since: Optional[str],
+        offset: Optional[int] = None,
+        page_size: Optional[int] = None,
+    ) -> str:
+        params = {
+            "output_format": "JSON",
+            "display": "full",
+            "sort": "[id_ASC]",
+        }
+        if page_size is not None:
+            params["limit"] = f"{offset or 0},{page_size}"
+        if since:
+            params["filter[date_upd]"] = f"[{_ps_datetime(since)},{_FAR_FUTURE}]"
+            params["date"] = "1"
+        return f"/api/{resource}?{urllib.parse.urlencode(params)}"
+
+    def fetch_page(
+        self,
+        resource: str,
+        offset: int,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        since: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """1 pagina (limit=offset,count); [] quando nao ha mais resultados."""
+        payload = self._request(self._page_query(resource, since, offset, page_size))
+        # PrestaShop devolve [] (lista vazia) quando nao ha resultados
+        items = payload.get(resource) if isinstance(payload, dict) else None
+        return list(items or [])
+
+    def iter_pages(
+        self,
+        resource: str,
+        since: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Gera paginas (listas de items) de um recurso da API PrestaShop.
+
+        - resource: "customers" | "products" | "orders"
+        - since: watermark ISO; so devolve items com date_upd >= since
+          (intervalo inclusivo: o limite e' recarregado, o UPSERT e' idempotente)
+        - paginacao: limit=offset,count com sort=[id_ASC] (ordem estavel)
+        - max_workers > 1: janela deslizante de paginas pedidas em paralelo
+          (default: cfg.max_workers); as paginas saem sempre por ordem
+
+        Para quando uma pagina vem vazia ou incompleta.
+        """
+        if page_size <= 0:
+            raise ValueError("page_size must be > 0")
+        workers = int(max_workers or self._cfg.max_workers)
+
+        if workers <= 1:
+            offset = 0
+            while True:
+                items = self.fetch_page(resource, offset, page_size, since)
+                if not items:
+                    return
+                yield items
+                if len(items) < page_size:
+                    return
+                offset += page_size
+
+        # Paralelo: mantem `workers` paginas em voo; ao consumir uma, pede a
+        # seguinte. Pedidos alem do fim devolvem [] e sao descartados.
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending: Deque["Future[List[Dict[str, Any]]]"] = deque()
+            next_offset = 0
+            for _ in range(workers):
+                pending.append(
+                    pool.submit(
+                        self.fetch_page, resource, next_offset, page_size, since
+                    )
+                )
+                next_offset += page_size
+            try:
+                while pending:
+                    items = pending.popleft().result()
+                    if not items:
+                        return
+                    yield items
+                    if len(items) < page_size:
+                        return
+                    pending.append(
+                        pool.submit(
+                            self.fetch_page, resource, next_offset, page_size, since
+                        )
+                    )
+                    next_offset += page_size
+            finally:
+                for f in pending:
+                    f.cancel()
+
+    def iter_customers(
+        self,
+        since: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        return self.iter_pages("customers", since, page_size, max_workers)
+
+    def iter_products(
+        self,
+        since: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        return self.iter_pages("products", since, page_size, max_workers)
+
+    def iter_orders(
+        self,
+        since: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        return self.iter_pages("orders", since, page_size, max_workers)
+
     # ---- MVP methods (stubs) ----
 
     def get_customers(self) -> Dict[str, Any]:
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Optional
+
+# Compacta o buffer quando a parte ja consumida passa este tamanho
+_COMPACT_AT = 1 << 16
+
+# Tamanho maximo (caracteres) de 1 valor JSON em buffer: acima disto o
+# payload e tratado como truncado/malformado em vez de ler o stream todo
+MAX_VALUE_CHARS = 1 << 26
+
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """
+    Buffer de texto alimentado por chunks de bytes (UTF-8 incremental).
+
+    So guarda em memoria o item JSON a ser descodificado no momento
+    (mais o resto do ultimo chunk lido), nunca o payload inteiro.
+    """
+
+    def __init__(
+        self, chunks: Iterable[bytes], max_value_chars: int = MAX_VALUE_CHARS
+    ) -> None:
+        self._chunks = iter(chunks)
+        self.max_value_chars = max_value_chars
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._json = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Le mais 1 chunk; False quando o stream acabou."""
+        if self.eof:
+            return False
+        if self.pos > _COMPACT_AT:
+            self.buf = self.buf[self.pos :]
+            self.pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+        self.buf += self._decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> Optional[str]:
+        """Proximo caracter que nao e' espaco (sem consumir); None no fim."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char: str) -> None:
+        got = self.peek()
+        if got != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, got {got!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """
+        Descodifica 1 valor JSON completo a partir da posicao atual.
+
+        Se o valor acabar no fim do buffer (ex: numero cortado a meio de um
+        chunk) le mais antes de aceitar.
+
+        Valor incompleto: so volta a tentar o parse quando o texto pendente
+        duplicar (custo linear no tamanho do item, nao quadratico). Acima de
+        max_value_chars -> ValueError, sem ler o resto do stream.
+        """
+        self.peek()
+        need = 0  # caracteres pendentes exigidos antes do proximo parse
+        while True:
+            pending = len(self.buf) - self.pos
+            if pending > self.max_value_chars:
+                raise ValueError(
+                    f"JSON value at offset {self.pos} exceeds "
+                    f"{self.max_value_chars} chars (truncated or malformed payload?)"
+                )
+            if pending < need and self._fill():
+                continue
+            try:
+                obj, end = self._json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                need = 2 * max(pending, 1)
+                self._fill()
+                continue
+            if end < len(self.buf) or self.eof:
+                self.pos = end
+                return obj
+            if not self._fill():
+                self.pos = end
+                return obj
+
+
+def iter_json_items(
+    chunks: Iterable[bytes], key: str, max_value_chars: int = MAX_VALUE_CHARS
+) -> Iterator[Any]:
+    """
+    Gera, 1 a 1, os items do array `key` de um payload JSON em streaming.
+
+    Formatos aceites (webservice PrestaShop com output_format=JSON):
+        {"orders": [ {...}, {...} ]}   -> cada order
+        []  /  {}                      -> nada (PrestaShop sem resultados)
+
+    Outras chaves do objeto de topo sao lidas e descartadas.
+    JSON invalido -> ValueError (json.JSONDecodeError); 1 valor com mais de
+    max_value_chars caracteres -> ValueError.
+    """
+    r = _Reader(chunks, max_value_chars)
+    first = r.peek()
+    if first is None:
+        return
+    if first == "[":
+        # Lista de topo (PrestaShop devolve [] quando nao ha resultados)
+        yield from _iter_array(r)
+        return
+
+    r.expect("{")
+    if r.peek() == "}":
+        return
+    while True:
+        name = r.value()
+        if not isinstance(name, str):
+            raise ValueError(f"Expected object key at offset {r.pos}")
+        r.expect(":")
+        if name == key and r.peek() == "[":
+            yield from _iter_array(r)
+        else:
+            r.value()
+
+        sep = r.peek()
+        if sep == "}":
+            return
+        r.expect(",")
+
+
+def _iter_array(r: _Reader) -> Iterator[Any]:
+    r.expect("[")
+    if r.peek() == "]":
+        r.pos += 1
+        return
+    while True:
+        yield r.value()
+        if r.peek() == "]":
+            r.pos += 1
+            return
+        r.expect(",")
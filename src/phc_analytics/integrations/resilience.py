@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+import random
+import threading
+import time
+
+T = TypeVar("T")
+
+
+class TransientError(RuntimeError):
+    """
+    Remote call failed for a reason that may go away on its own
+    (network error, timeout, HTTP 429/5xx). Safe to retry.
+    """
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the remote end while the circuit is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Per-call retry with jittered exponential backoff.
+
+    - max_attempts: total attempts, first call included (1 = no retries)
+    - base_delay_seconds: backoff cap of the 1st retry, doubled each retry
+    - max_delay_seconds: upper bound of any single backoff
+
+    "Full jitter": each wait is uniform in [0, cap], so clients that failed
+    together do not retry together.
+    """
+
+    max_attempts: int = 4
+    base_delay_seconds: float = 0.5
+    max_delay_seconds: float = 30.0
+
+    def validate(self) -> None:
+        if self.max_attempts <= 0:
+            raise ValueError("max_attempts must be > 0")
+        if self.base_delay_seconds < 0:
+            raise ValueError("base_delay_seconds must be >= 0")
+        if self.max_delay_seconds < self.base_delay_seconds:
+            raise ValueError("max_delay_seconds must be >= base_delay_seconds")
+
+    def backoff(self, retry: int, rng: Optional[random.Random] = None) -> float:
+        """Wait before retry number `retry` (1-based)."""
+        cap = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** (retry - 1)))
+        return (rng or random).uniform(0.0, cap)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker (thread-safe).
+
+    - closed: calls go through; `failure_threshold` retryable failures in a
+      row open the circuit
+    - open: calls fail fast with CircuitOpenError for `reset_timeout_seconds`
+    - half-open: one trial call is let through; success closes the circuit,
+      failure opens it again
+
+    Fatal errors (4xx, business faults) count as success: the remote end
+    answered, it is just the request that is wrong.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be > 0")
+        if reset_timeout_seconds < 0:
+            raise ValueError("reset_timeout_seconds must be >= 0")
+        self._threshold = failure_threshold
+        self._reset_timeout = reset_timeout_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and self._clock() - self._opened_at >= self._reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self, what: str = "remote call") -> None:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self._reset_timeout:
+                    raise CircuitOpenError(f"Circuit open, not calling {what}")
+                self._state = self.HALF_OPEN
+            if self._trial_in_flight:
+                raise CircuitOpenError(f"Circuit half-open, not calling {what}")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self._threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    *,
+    policy: RetryPolicy,
+    is_retryable: Callable[[BaseException], bool],
+    breaker: Optional[CircuitBreaker] = None,
+    what: str = "remote call",
+    sleep: Callable[[float], None] = time.sleep,
+    rng: Optional[random.Random] = None,
+) -> T:
+    """
+    Run fn() with retries for errors `is_retryable` accepts.
+
+    Fatal errors and the last retryable error are re-raised as-is; an open
+    circuit (before or between attempts) raises CircuitOpenError chained to
+    the last error seen.
+    """
+    last: Optional[BaseException] = None
+    for attempt in range(1, policy.max_attempts + 1):
+        if breaker is not None:
+            try:
+                breaker.before_call(what)
+            except CircuitOpenError as exc:
+                raise exc from last
+        try:
+            result = fn()
+        except Exception as exc:
+            retryable = is_retryable(exc)
+            if breaker is not None:
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if not retryable or attempt == policy.max_attempts:
+                raise
+            last = exc
+            sleep(policy.backoff(attempt, rng))
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
+    raise AssertionError("unreachable")  # pragma: no cover
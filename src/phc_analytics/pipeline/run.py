@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import argparse
-from typing import Any, Dict
+import logging
+from typing import Any, Dict, Optional
+
+import pandas as pd
 
 from phc_analytics.staging.documents import load_documents_mock
 from phc_analytics.models.fact_documents import build_fact_documents
@@ -11,57 +14,86 @@ from phc_analytics.analytics.kpis import kpis_top_cards
 from phc_analytics.analytics.timeseries import faturacao_mensal
 from phc_analytics.quality.checks import run_quality_gate_fact_documents
 from phc_analytics.storage.writer import write_parquet, write_csv
+from phc_analytics.utils.spans import SpanRecorder
 
 
-def run_pipeline(out_dir: str = "out", partition_fact: bool = False) -> Dict[str, Any]:
+def run_pipeline(
+    out_dir: str = "out",
+    partition_fact: bool = False,
+    trace_memory: bool = False,
+    log_spans: bool = False,
+    raw: Optional[pd.DataFrame] = None,
+) -> Dict[str, Any]:
     """Run the local (mock) analytics pipeline.
 
     Notes:
-    - This runner currently uses mock ingestion (load_documents_mock).
+    - This runner currently uses mock ingestion (load_documents_mock);
+      pass `raw` to run the same stages on other documents (e.g.
+      staging.documents.generate_documents in benchmarks).
     - Output is persisted to Parquet/CSV via storage.writer.
+    - Each numbered stage is measured as a span (wall/CPU time, rows in/out,
+      peak memory delta); see utils.spans. The result carries them under
+      "spans". log_spans=True also logs one JSON line per stage on the
+      "phc_analytics.spans" logger; trace_memory=True adds tracemalloc peaks
+      (slower).
     """
+    spans = SpanRecorder(
+        pipeline="documents", log_json=log_spans, trace_memory=trace_memory
+    )
 
     # 1) Ingestion
-    raw = load_documents_mock()
+    with spans.span("ingestion") as s:
+        if raw is None:
+            raw = load_documents_mock()
+        s.rows_out = len(raw)
 
     # 2) Modeling (star schema)
-    fact = build_fact_documents(raw)
-    dim_clients = build_dim_clients(raw)
-    dim_time = build_dim_time(raw)
+    with spans.span("modeling", rows_in=len(raw)) as s:
+        fact = build_fact_documents(raw)
+        dim_clients = build_dim_clients(raw)
+        dim_time = build_dim_time(raw)
+        s.rows_out = len(fact) + len(dim_clients) + len(dim_time)
 
     # 3) Quality gate
-    quality_results = run_quality_gate_fact_documents(fact)
-    if not all(r.ok for r in quality_results):
-        raise ValueError("Quality gate failed")
+    with spans.span("quality_gate", rows_in=len(fact)) as s:
+        quality_results = run_quality_gate_fact_documents(fact)
+        if not all(r.ok for r in quality_results):
+            raise ValueError("Quality gate failed")
+        s.rows_out = len(fact)
 
     # 4) Analytics
-    kpis = kpis_top_cards(raw)
-    monthly = faturacao_mensal(raw)
+    with spans.span("analytics", rows_in=len(raw)) as s:
+        kpis = kpis_top_cards(raw)
+        monthly = faturacao_mensal(raw)
+        s.rows_out = len(monthly)
 
     # 5) Persistence (Parquet + CSV)
     written = []
-
-    # FACT: optionally partitioned by year_month
-    if partition_fact:
-        if "year_month" not in fact.columns:
-            raise ValueError(
-                "partition_fact=True requires fact_documents to have column 'year_month'"
-            )
-        written.append(
-            write_parquet(
-                fact, out_dir, "fact_documents", partition_cols=["year_month"]
+    with spans.span(
+        "persistence", rows_in=len(fact) + len(dim_clients) + len(dim_time)
+    ) as s:
+        # FACT: optionally partitioned by year_month
+        if partition_fact:
+            if "year_month" not in fact.columns:
+                raise ValueError(
+                    "partition_fact=True requires fact_documents to have column 'year_month'"
+                )
+            written.append(
+                write_parquet(
+                    fact, out_dir, "fact_documents", partition_cols=["year_month"]
+                )
             )
-        )
-    else:
-        written.append(write_parquet(fact, out_dir, "fact_documents"))
+        else:
+            written.append(write_parquet(fact, out_dir, "fact_documents"))
 
-    # DIMs: not partitioned (small)
-    written.append(write_parquet(dim_clients, out_dir, "dim_clients"))
-    written.append(write_parquet(dim_time, out_dir, "dim_time"))
+        # DIMs: not partitioned (small)
+        written.append(write_parquet(dim_clients, out_dir, "dim_clients"))
+        written.append(write_parquet(dim_time, out_dir, "dim_time"))
 
-    # CSVs (debug/share)
-    written.append(write_csv(fact, out_dir, "fact_documents"))
-    written.append(write_csv(dim_clients, out_dir, "dim_clients"))
+        # CSVs (debug/share)
+        written.append(write_csv(fact, out_dir, "fact_documents"))
+        written.append(write_csv(dim_clients, out_dir, "dim_clients"))
+        s.rows_out = sum(w.rows for w in written)
 
     return {
         "fact_documents": fact,
@@ -70,6 +102,7 @@ def run_pipeline(out_dir: str = "out", partition_fact: bool = False) -> Dict[str
         "kpis": kpis,
         "monthly": monthly,
         "written": written,
+        "spans": spans.as_dicts(),
     }
 
 
@@ -83,12 +116,29 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Partition fact_documents by year_month when writing Parquet",
     )
+    p.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also measure per-stage tracemalloc peaks (slower)",
+    )
+    p.add_argument(
+        "--log-spans",
+        action="store_true",
+        help="Log one JSON line per stage (logger phc_analytics.spans) to stderr",
+    )
     return p
 
 
 if __name__ == "__main__":
     args = _build_arg_parser().parse_args()
-    out = run_pipeline(out_dir=args.out_dir, partition_fact=args.partition_fact)
+    if args.log_spans:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+    out = run_pipeline(
+        out_dir=args.out_dir,
+        partition_fact=args.partition_fact,
+        trace_memory=args.trace_memory,
+        log_spans=args.log_spans,
+    )
     print("PIPELINE OK")
     for r in out["written"]:
         # Be tolerant to minor schema differences in write result objects.
@@ -96,3 +146,9 @@ if __name__ == "__main__":
         path = getattr(r, "path", "")
         rows = getattr(r, "rows", "")
         print(f"- {str(kind).upper()} {path} rows={rows}")
+    for sp in out["spans"]:
+        print(
+            f"- STAGE {sp['name']:<12} wall={sp['wall_seconds']:.3f}s "
+            f"cpu={sp['cpu_seconds']:.3f}s rows_in={sp['rows_in']} "
+            f"rows_out={sp['rows_out']}"
+        )
@@ -1,9 +1,25 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import argparse
+import hashlib
+import json
 
-from src.phc_analytics.integrations.odoo.client import OdooClient, build_local_client
+from src.phc_analytics.integrations.odoo.client import (
+    ExecuteCall,
+    ExecuteResult,
+    OdooClient,
+    build_local_client,
+)
 from src.phc_analytics.integrations.prestashop.client import PrestaShopClient
+from src.phc_analytics.storage.checkpoints import (
+    DEFAULT_CHECKPOINT_PATH,
+    CheckpointStore,
+    record_hash,
+)
+
+# Tamanho de pagina / chunk para o modo batched (search_read paginado + create multi-record).
+DEFAULT_CHUNK_SIZE = 500
 
 
 def _build_prestashop_client() -> PrestaShopClient:
@@ -36,11 +52,220 @@ def _ensure_custom_fields_exist_admin_only() -> None:
     return
 
 
+# Casas decimais usadas ao comparar floats (ex: list_price) na detecao de no-op
+_VALUE_FLOAT_DIGITS = 6
+
+
+def _norm_value(v: Any) -> Any:
+    """
+    Forma canonica de um valor Odoo/PrestaShop para comparacao:
+    - False/None/"" -> None (Odoo devolve False em campos vazios)
+    - many2one [id, "name"] -> id
+    - numeros -> float arredondado; strings sem espacos nas pontas
+    """
+    if v is None or v is False:
+        return None
+    if isinstance(v, (list, tuple)) and len(v) == 2 and isinstance(v[0], int):
+        return v[0]
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return round(float(v), _VALUE_FLOAT_DIGITS)
+    if isinstance(v, str):
+        return v.strip() or None
+    return v
+
+
+def values_hash(values: Dict[str, Any]) -> str:
+    """Hash normalizado de um dict de valores (independente da ordem das chaves)."""
+    canon = {k: _norm_value(v) for k, v in values.items()}
+    raw = json.dumps(canon, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _needs_write(current: Dict[str, Any], values: Dict[str, Any]) -> bool:
+    """
+    True se algum valor a enviar difere do que o Odoo ja tem.
+    `current` = registo lido do Odoo (search_read) com pelo menos os campos de `values`.
+    """
+    return values_hash(values) != values_hash({k: current.get(k) for k in values})
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _search_read_all(
+    odoo: OdooClient,
+    model: str,
+    domain: List[Any],
+    fields: List[str],
+    page_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Todas as linhas do domain (ordem "id asc"), paginadas por keyset no id.
+    """
+    out: List[Dict[str, Any]] = []
+    for rows in odoo.search_read_iter(model, domain, fields, chunk_size=page_size):
+        out.extend(rows)
+    return out
+
+
+def _unwrap_all(results: List[ExecuteResult], what: str) -> List[Any]:
+    """
+    Valores de um map_execute; se alguma chamada falhou, levanta RuntimeError
+    com a contagem e a primeira excecao como causa.
+    """
+    failed = [r for r in results if not r.ok]
+    if failed:
+        first = failed[0]
+        raise RuntimeError(
+            f"{len(failed)}/{len(results)} {what} calls failed "
+            f"(first: {first.call.model}.{first.call.method}: {first.error})"
+        ) from first.error
+    return [r.value for r in results]
+
+
+def _write_grouped(
+    odoo: OdooClient,
+    model: str,
+    updates: List[Tuple[int, Dict[str, Any]]],
+    max_workers: int = 1,
+) -> None:
+    """
+    Agrupa updates com valores identicos num unico write (ids=[...]).
+    A ordem dos writes respeita a primeira ocorrencia de cada grupo; se o mesmo
+    id aparecer em varios grupos, os writes ficam em serie para manter a ordem.
+    """
+    groups: Dict[Tuple[Tuple[str, Any], ...], List[int]] = {}
+    for rec_id, vals in updates:
+        key = tuple(sorted(vals.items()))
+        groups.setdefault(key, []).append(rec_id)
+
+    calls = [
+        ExecuteCall(model, "write", [ids, dict(key)]) for key, ids in groups.items()
+    ]
+    disjoint = len({i for ids in groups.values() for i in ids}) == sum(
+        len(ids) for ids in groups.values()
+    )
+    _unwrap_all(
+        odoo.map_execute(calls, max_workers=max_workers if disjoint else 1),
+        f"{model}.write",
+    )
+
+
+def _upsert_customers_batched(
+    odoo: OdooClient,
+    customers: List[Dict[str, Any]],
+    chunk_size: int,
+    max_workers: int = 1,
+) -> Dict[str, int]:
+    """
+    Modo batched do upsert_customers:
+      1) pre-fetch (paginado) de todos os partners com x_prestashop_customer_id
+      2) pre-fetch por email apenas dos customers que nao ficaram ligados
+      3) decisao create/update/skip em memoria (skip: valores iguais aos do Odoo)
+      4) creates multi-record por chunk + writes agrupados por valores
+         (em paralelo com max_workers > 1)
+    """
+    # Deduplicar por ps_id (ultimo payload vence)
+    wanted: Dict[int, Dict[str, Any]] = {}
+    for c in customers:
+        ps_id = int(c["prestashop_customer_id"])
+        wanted[ps_id] = {
+            "name": _full_name(c),
+            "email": (c.get("email") or "").strip().lower(),
+        }
+
+    # 1) chave forte: x_prestashop_customer_id (primeiro id vence, como limit=1 "id asc")
+    by_ps_id: Dict[int, Dict[str, Any]] = {}
+    for row in _search_read_all(
+        odoo,
+        "res.partner",
+        domain=[("x_prestashop_customer_id", "!=", False)],
+        fields=["id", "name", "email", "x_prestashop_customer_id"],
+        page_size=chunk_size,
+    ):
+        ps = row.get("x_prestashop_customer_id")
+        if ps:
+            by_ps_id.setdefault(int(ps), row)
+
+    # 2) fallback: email (so para quem ainda nao tem ligacao)
+    emails = sorted(
+        {
+            v["email"]
+            for ps_id, v in wanted.items()
+            if ps_id not in by_ps_id and v["email"]
+        }
+    )
+    by_email: Dict[str, int] = {}
+    for chunk in _chunks(emails, chunk_size):
+        for row in _search_read_all(
+            odoo,
+            "res.partner",
+            domain=[("email", "in", chunk)],
+            fields=["id", "email"],
+            page_size=chunk_size,
+        ):
+            if row.get("email"):
+                by_email.setdefault(str(row["email"]), int(row["id"]))
+
+    # 3) decidir em memoria
+    updates: List[Tuple[int, Dict[str, Any]]] = []
+    to_create: List[Dict[str, Any]] = []
+    skipped = 0
+    for ps_id, vals in wanted.items():
+        if ps_id in by_ps_id:
+            current = by_ps_id[ps_id]
+            if _needs_write(current, vals):
+                updates.append((int(current["id"]), vals))
+            else:
+                skipped += 1
+        elif vals["email"] and vals["email"] in by_email:
+            updates.append(
+                (by_email[vals["email"]], {**vals, "x_prestashop_customer_id": ps_id})
+            )
+        else:
+            to_create.append({**vals, "x_prestashop_customer_id": ps_id})
+
+    # 4) aplicar
+    _write_grouped(odoo, "res.partner", updates, max_workers=max_workers)
+    new_ids = _unwrap_all(
+        odoo.map_execute(
+            [
+                ExecuteCall("res.partner", "create", [chunk])
+                for chunk in _chunks(to_create, chunk_size)
+            ],
+            max_workers=max_workers,
+        ),
+        "res.partner.create",
+    )
+    created = sum(len(ids) for ids in new_ids)
+
+    return {"created": created, "updated": len(updates), "skipped": skipped}
+
+
 def upsert_customers(
-    odoo: OdooClient, customers: List[Dict[str, Any]]
+    odoo: OdooClient,
+    customers: List[Dict[str, Any]],
+    batched: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int = 1,
 ) -> Dict[str, int]:
+    """
+    Upsert de customers PrestaShop -> res.partner.
+
+    batched=False: 1 a 4 RPCs por customer (comportamento original).
+    batched=True:  pre-fetch paginado + decisao em memoria + RPCs por chunk;
+                   max_workers > 1 envia os chunks em paralelo (map_execute).
+
+    Partners ja ligados cujos valores (name, email) sao iguais aos do Odoo
+    nao recebem write (evita carga e churn de write_date): contam em "skipped".
+    """
+    if batched:
+        return _upsert_customers_batched(odoo, customers, chunk_size, max_workers)
+
     created = 0
     updated = 0
+    skipped = 0
 
     for c in customers:
         ps_id = int(c["prestashop_customer_id"])
@@ -56,8 +281,11 @@ def upsert_customers(
         )
 
         if existing:
-            pid = existing[0]["id"]
-            odoo.write("res.partner", [pid], {"name": name, "email": email})
+            vals = {"name": name, "email": email}
+            if not _needs_write(existing[0], vals):
+                skipped += 1
+                continue
+            odoo.write("res.partner", [existing[0]["id"]], vals)
             updated += 1
             continue
 
@@ -84,12 +312,19 @@ def upsert_customers(
         odoo.write("res.partner", [pid], {"x_prestashop_customer_id": ps_id})
         created += 1
 
-    return {"created": created, "updated": updated}
+    return {"created": created, "updated": updated, "skipped": skipped}
 
 
 def upsert_products(odoo: OdooClient, products: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Upsert de products PrestaShop -> product.template.
+
+    Templates ja ligados com name/SKU/preco iguais aos do Odoo nao recebem
+    write: contam em "skipped".
+    """
     created = 0
     updated = 0
+    skipped = 0
 
     for p in products:
         ps_id = int(p["prestashop_product_id"])
@@ -101,15 +336,23 @@ def upsert_products(odoo: OdooClient, products: List[Dict[str, Any]]) -> Dict[st
         existing = odoo.search_read(
             "product.template",
             domain=[("x_prestashop_product_id", "=", ps_id)],
-            fields=["id", "name", "default_code", "x_prestashop_product_id"],
+            fields=[
+                "id",
+                "name",
+                "default_code",
+                "list_price",
+                "x_prestashop_product_id",
+            ],
             limit=1,
         )
 
         vals = {"name": name, "default_code": sku, "list_price": price}
 
         if existing:
-            pid = existing[0]["id"]
-            odoo.write("product.template", [pid], vals)
+            if not _needs_write(existing[0], vals):
+                skipped += 1
+                continue
+            odoo.write("product.template", [existing[0]["id"]], vals)
             updated += 1
             continue
 
@@ -136,55 +379,137 @@ def upsert_products(odoo: OdooClient, products: List[Dict[str, Any]]) -> Dict[st
         odoo.write("product.template", [pid], {"x_prestashop_product_id": ps_id})
         created += 1
 
-    return {"created": created, "updated": updated}
+    return {"created": created, "updated": updated, "skipped": skipped}
+
+
+class OdooRefResolver:
+    """
+    Cache run-scoped: x_prestashop_*_id -> id Odoo.
 
+    - preload(): carrega o mapa completo (search_read paginado)
+    - prefetch(ids): carrega so os ids desconhecidos, em batches ("in")
+    - get(id): serve da memoria; num miss faz fetch do id e guarda o resultado
 
-def _get_product_variant_id_by_ps_product_id(
-    odoo: OdooClient, ps_product_id: int
-) -> int:
+    Ids inexistentes no Odoo tambem ficam em cache (negativo) para nao
+    repetir o search_read a cada linha.
+    """
+
+    def __init__(
+        self,
+        odoo: OdooClient,
+        model: str,
+        ps_field: str,
+        label: str,
+        value_field: str = "id",
+        batch_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        self._odoo = odoo
+        self._model = model
+        self._ps_field = ps_field
+        self._label = label
+        self._value_field = value_field
+        self._batch_size = batch_size
+        self._cache: Dict[int, Optional[int]] = {}
+        self._complete = False
+        self.hits = 0
+        self.misses = 0
+        self.rpc_calls = 0
+
+    def _value(self, row: Dict[str, Any]) -> Optional[int]:
+        v = row.get(self._value_field)
+        if isinstance(v, list):  # many2one -> [id, display_name]
+            v = v[0] if v else None
+        return int(v) if v else None
+
+    def _load(self, domain: List[Any]) -> None:
+        fields = sorted({"id", self._ps_field, self._value_field})
+        for rows in self._odoo.search_read_iter(
+            self._model, domain, fields, chunk_size=self._batch_size
+        ):
+            self.rpc_calls += 1
+            for row in rows:
+                ps = row.get(self._ps_field)
+                if ps and self._cache.get(int(ps)) is None:
+                    self._cache[int(ps)] = self._value(row)
+
+    def preload(self) -> int:
+        self._load([(self._ps_field, "!=", False)])
+        self._complete = True
+        return len(self._cache)
+
+    def prefetch(self, ps_ids: Iterable[int]) -> None:
+        if self._complete:
+            return
+        unknown = sorted({int(i) for i in ps_ids} - set(self._cache))
+        for chunk in _chunks(unknown, self._batch_size):
+            self._load([(self._ps_field, "in", chunk)])
+            for i in chunk:
+                self._cache.setdefault(i, None)
+
+    def find(self, ps_id: int) -> Optional[int]:
+        ps_id = int(ps_id)
+        if ps_id in self._cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.prefetch([ps_id])
+            self._cache.setdefault(ps_id, None)
+        return self._cache[ps_id]
+
+    def remember(self, ps_id: int, value: int) -> None:
+        self._cache[int(ps_id)] = int(value)
+
+    def get(self, ps_id: int) -> int:
+        value = self.find(ps_id)
+        if value is None:
+            raise RuntimeError(
+                f"{self._label} not found in Odoo for {self._ps_field}={ps_id}"
+            )
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached": len(self._cache),
+            "rpc_calls": self.rpc_calls,
+        }
+
+
+def product_variant_resolver(odoo: OdooClient, **kwargs: Any) -> OdooRefResolver:
     """
     Odoo: sale.order.line espera product_id (product.product), não product.template.
     Estratégia:
       - encontrar product.template via x_prestashop_product_id
-      - ir buscar o seu product_variant_id (campo many2one -> product.product)
+      - usar o seu product_variant_id (campo many2one -> product.product)
     """
-    rows = odoo.search_read(
+    return OdooRefResolver(
+        odoo,
         "product.template",
-        domain=[("x_prestashop_product_id", "=", int(ps_product_id))],
-        fields=["id", "name", "product_variant_id"],
-        limit=1,
+        "x_prestashop_product_id",
+        label="Product variant",
+        value_field="product_variant_id",
+        **kwargs,
     )
-    if not rows:
-        raise RuntimeError(
-            f"Product not found in Odoo for prestashop_product_id={ps_product_id}"
-        )
 
-    pv = rows[0].get("product_variant_id")
-    if not pv or not isinstance(pv, list) or not pv[0]:
-        raise RuntimeError(
-            f"Missing product_variant_id for product.template id={rows[0]['id']}"
-        )
-    return int(pv[0])
+
+def partner_resolver(odoo: OdooClient, **kwargs: Any) -> OdooRefResolver:
+    return OdooRefResolver(
+        odoo, "res.partner", "x_prestashop_customer_id", label="Customer", **kwargs
+    )
 
 
-def _find_partner_id_by_ps_customer_id(odoo: OdooClient, ps_customer_id: int) -> int:
-    rows = odoo.search_read(
-        "res.partner",
-        domain=[("x_prestashop_customer_id", "=", int(ps_customer_id))],
-        fields=["id", "name", "x_prestashop_customer_id"],
-        limit=1,
+def order_resolver(odoo: OdooClient, **kwargs: Any) -> OdooRefResolver:
+    return OdooRefResolver(
+        odoo, "sale.order", "x_prestashop_order_id", label="Order", **kwargs
     )
-    if not rows:
-        raise RuntimeError(
-            f"Customer not found in Odoo for prestashop_customer_id={ps_customer_id}"
-        )
-    return int(rows[0]["id"])
 
 
 def _replace_order_lines_idempotent(
     odoo: OdooClient,
     so_id: int,
     payload_lines: List[Dict[str, Any]],
+    products: Optional[OdooRefResolver] = None,
 ) -> Tuple[int, int]:
     """
     Idempotência:
@@ -193,6 +518,7 @@ def _replace_order_lines_idempotent(
 
     Retorna (deleted_count, created_count).
     """
+    products = products or product_variant_resolver(odoo)
     so = odoo.search_read(
         "sale.order",
         domain=[("id", "=", so_id)],
@@ -210,7 +536,7 @@ def _replace_order_lines_idempotent(
         ps_prod_id = int(ln["prestashop_product_id"])
         qty = float(ln["quantity"])
         unit_price = float(ln["unit_price"])
-        product_id = _get_product_variant_id_by_ps_product_id(odoo, ps_prod_id)
+        product_id = products.get(ps_prod_id)
 
         odoo.create(
             "sale.order.line",
@@ -226,7 +552,239 @@ def _replace_order_lines_idempotent(
     return deleted, created
 
 
-def upsert_orders(odoo: OdooClient, orders: List[Dict[str, Any]]) -> Dict[str, int]:
+# Casas decimais usadas para comparar qty/preco (evita falsos "changed" por float).
+_LINE_FLOAT_DIGITS = 6
+
+
+def _line_values(ln: Dict[str, Any], products: OdooRefResolver) -> Dict[str, Any]:
+    return {
+        "product_id": products.get(int(ln["prestashop_product_id"])),
+        "product_uom_qty": float(ln["quantity"]),
+        "price_unit": float(ln["unit_price"]),
+    }
+
+
+def _line_key(product_id: int, qty: float, price: float) -> Tuple[int, float, float]:
+    return (
+        int(product_id),
+        round(float(qty), _LINE_FLOAT_DIGITS),
+        round(float(price), _LINE_FLOAT_DIGITS),
+    )
+
+
+def _diff_order_lines(
+    existing: List[Dict[str, Any]], wanted: List[Dict[str, Any]]
+) -> Tuple[List[Any], Dict[str, int]]:
+    """
+    Diff minimo entre linhas Odoo (existing) e linhas do payload (wanted).
+
+    1) match exato (produto, qty, preco)      -> kept (sem comando)
+    2) mesmo produto, qty/preco diferentes   -> changed (1, id, vals)
+    3) sobra do payload                      -> added   (0, 0, vals)
+    4) sobra no Odoo                         -> removed (2, id, 0)
+
+    Retorna (comandos one2many, contadores).
+    """
+    pending: Dict[Tuple[int, float, float], List[int]] = {}
+    by_product: Dict[int, List[int]] = {}
+    for row in existing:
+        pv = row.get("product_id")
+        product_id = int(pv[0] if isinstance(pv, list) else pv or 0)
+        key = _line_key(
+            product_id, row.get("product_uom_qty") or 0.0, row.get("price_unit") or 0.0
+        )
+        pending.setdefault(key, []).append(int(row["id"]))
+        by_product.setdefault(product_id, []).append(int(row["id"]))
+
+    used: set = set()
+    unmatched: List[Dict[str, Any]] = []
+    kept = 0
+    for vals in wanted:
+        ids = pending.get(
+            _line_key(vals["product_id"], vals["product_uom_qty"], vals["price_unit"])
+        )
+        if ids:
+            used.add(ids.pop(0))
+            kept += 1
+        else:
+            unmatched.append(vals)
+
+    commands: List[Any] = []
+    changed = added = 0
+    for vals in unmatched:
+        free = [i for i in by_product.get(vals["product_id"], []) if i not in used]
+        if free:
+            used.add(free[0])
+            commands.append(
+                (
+                    1,
+                    free[0],
+                    {
+                        "product_uom_qty": vals["product_uom_qty"],
+                        "price_unit": vals["price_unit"],
+                    },
+                )
+            )
+            changed += 1
+        else:
+            commands.append((0, 0, vals))
+            added += 1
+
+    removed = 0
+    for row in existing:
+        if int(row["id"]) not in used:
+            commands.append((2, int(row["id"]), 0))
+            removed += 1
+
+    return commands, {
+        "kept": kept,
+        "changed": changed,
+        "added": added,
+        "removed": removed,
+    }
+
+
+_LINE_FIELDS = ["id", "product_id", "product_uom_qty", "price_unit"]
+
+
+def _upsert_orders_reconciled(
+    odoo: OdooClient,
+    orders: List[Dict[str, Any]],
+    products: OdooRefResolver,
+    partners: OdooRefResolver,
+    sale_orders: OdooRefResolver,
+    chunk_size: int,
+    max_workers: int,
+) -> Dict[str, Any]:
+    """
+    Idempotencia por diff (alternativa ao unlink + recreate), por fases:
+      1) em memoria: resolver partner/produtos e separar novas vs existentes
+      2) novas: create multi-record por chunk, ja com as linhas (0, 0, vals)
+      3) existentes: 1 search_read das linhas atuais por order
+      4) diff minimo contra o payload -> 1 write em sale.order com comandos
+         one2many (so se houver diferencas)
+
+    As chamadas de cada fase sao independentes entre si e vao via
+    map_execute (paralelas com max_workers > 1).
+    Encomenda sem alteracoes = 1 leitura, 0 escritas.
+    Orders repetidas no input: o ultimo payload vence.
+    """
+    lines = {"kept": 0, "changed": 0, "added": 0, "removed": 0}
+    new_orders: Dict[int, Dict[str, Any]] = {}
+    existing: Dict[int, List[Dict[str, Any]]] = {}
+
+    # 1) decidir em memoria
+    for o in orders:
+        ps_order_id = int(o["prestashop_order_id"])
+        partner_id = partners.get(int(o["prestashop_customer_id"]))
+        wanted = [_line_values(ln, products) for ln in (o.get("lines") or [])]
+        so_id = sale_orders.find(ps_order_id)
+        if so_id is None:
+            new_orders[ps_order_id] = {
+                "partner_id": partner_id,
+                "x_prestashop_order_id": ps_order_id,
+                "order_line": [(0, 0, vals) for vals in wanted],
+            }
+        else:
+            existing[so_id] = wanted
+
+    # 2) novas encomendas (com linhas) por chunk
+    ps_ids = list(new_orders)
+    chunks = _chunks(ps_ids, chunk_size)
+    created_ids = _unwrap_all(
+        odoo.map_execute(
+            [
+                ExecuteCall("sale.order", "create", [[new_orders[i] for i in chunk]])
+                for chunk in chunks
+            ],
+            max_workers=max_workers,
+        ),
+        "sale.order.create",
+    )
+    for chunk, ids in zip(chunks, created_ids):
+        for ps_order_id, so_id in zip(chunk, ids):
+            sale_orders.remember(ps_order_id, so_id)
+            lines["added"] += len(new_orders[ps_order_id]["order_line"])
+
+    # 3) ler linhas atuais das existentes
+    so_ids = list(existing)
+    current = _unwrap_all(
+        odoo.map_execute(
+            [
+                ExecuteCall(
+                    "sale.order.line",
+                    "search_read",
+                    [[("order_id", "=", so_id)]],
+                    {"fields": _LINE_FIELDS},
+                )
+                for so_id in so_ids
+            ],
+            max_workers=max_workers,
+        ),
+        "sale.order.line.search_read",
+    )
+
+    # 4) diff + writes so onde ha diferencas
+    writes: List[ExecuteCall] = []
+    for so_id, rows in zip(so_ids, current):
+        commands, counts = _diff_order_lines(rows, existing[so_id])
+        for k, v in counts.items():
+            lines[k] += v
+        if commands:
+            writes.append(
+                ExecuteCall("sale.order", "write", [[so_id], {"order_line": commands}])
+            )
+    _unwrap_all(odoo.map_execute(writes, max_workers=max_workers), "sale.order.write")
+
+    return {
+        "orders_created": len(new_orders),
+        "orders_updated": len(existing),
+        "lines_deleted": lines["removed"],
+        "lines_created": lines["added"],
+        "lines_kept": lines["kept"],
+        "lines_changed": lines["changed"],
+        "product_cache": products.stats(),
+        "partner_cache": partners.stats(),
+    }
+
+
+def upsert_orders(
+    odoo: OdooClient,
+    orders: List[Dict[str, Any]],
+    products: Optional[OdooRefResolver] = None,
+    partners: Optional[OdooRefResolver] = None,
+    reconcile_lines: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int = 1,
+) -> Dict[str, Any]:
+    """
+    Upsert de orders (sale.order) + linhas.
+
+    products/partners: resolvers run-scoped; se nao forem passados, sao criados
+    aqui e pre-carregados em batch com os ids referidos por estas orders.
+
+    reconcile_lines=False: apaga e recria todas as linhas (N+2 RPCs por order).
+    reconcile_lines=True:  diff contra as linhas existentes, 1 write por order
+                           (0 se nada mudou); encomendas novas sao criadas
+                           ja com as linhas, em chunks. max_workers > 1
+                           paraleliza as chamadas independentes.
+    """
+    products = products or product_variant_resolver(odoo)
+    partners = partners or partner_resolver(odoo)
+    sale_orders = order_resolver(odoo)
+    partners.prefetch(int(o["prestashop_customer_id"]) for o in orders)
+    products.prefetch(
+        int(ln["prestashop_product_id"])
+        for o in orders
+        for ln in (o.get("lines") or [])
+    )
+    sale_orders.prefetch(int(o["prestashop_order_id"]) for o in orders)
+
+    if reconcile_lines:
+        return _upsert_orders_reconciled(
+            odoo, orders, products, partners, sale_orders, chunk_size, max_workers
+        )
+
     created = 0
     updated = 0
     lines_deleted = 0
@@ -237,24 +795,20 @@ def upsert_orders(odoo: OdooClient, orders: List[Dict[str, Any]]) -> Dict[str, i
         ps_customer_id = int(o["prestashop_customer_id"])
         payload_lines = o.get("lines") or []
 
-        partner_id = _find_partner_id_by_ps_customer_id(odoo, ps_customer_id)
+        partner_id = partners.get(ps_customer_id)
+        so_id = sale_orders.find(ps_order_id)
 
-        existing = odoo.search_read(
-            "sale.order",
-            domain=[("x_prestashop_order_id", "=", ps_order_id)],
-            fields=["id", "name", "x_prestashop_order_id"],
-            limit=1,
-        )
-
-        if existing:
-            so_id = existing[0]["id"]
+        if so_id is not None:
             updated += 1
         else:
             so_id = odoo.create("sale.order", {"partner_id": partner_id})
             odoo.write("sale.order", [so_id], {"x_prestashop_order_id": ps_order_id})
+            sale_orders.remember(ps_order_id, so_id)
             created += 1
 
-        d, c = _replace_order_lines_idempotent(odoo, int(so_id), payload_lines)
+        d, c = _replace_order_lines_idempotent(
+            odoo, int(so_id), payload_lines, products=products
+        )
         lines_deleted += d
         lines_created += c
 
@@ -263,40 +817,232 @@ def upsert_orders(odoo: OdooClient, orders: List[Dict[str, Any]]) -> Dict[str, i
         "orders_updated": updated,
         "lines_deleted": lines_deleted,
         "lines_created": lines_created,
+        "lines_kept": 0,
+        "lines_changed": 0,
+        "product_cache": products.stats(),
+        "partner_cache": partners.stats(),
     }
 
 
-def run(use_mock: bool = True) -> Dict[str, Any]:
-    _ensure_custom_fields_exist_admin_only()
+def _merge_counts(total: Dict[str, Any], part: Dict[str, Any]) -> None:
+    """Soma contadores int; o resto (ex: stats de cache run-scoped) fica o ultimo."""
+    for k, v in part.items():
+        if isinstance(v, int) and not isinstance(v, bool):
+            total[k] = int(total.get(k, 0)) + v
+        else:
+            total[k] = v
 
-    odoo = build_local_client()
 
-    prestashop = _build_prestashop_client()
+def _sync_checkpointed(
+    store: Optional[CheckpointStore],
+    entity: str,
+    records: List[Dict[str, Any]],
+    key_field: str,
+    push: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+    chunk_size: int,
+) -> Dict[str, Any]:
+    """
+    Envia `records` em chunks com checkpoint duravel por chunk.
+
+    - ordem deterministica (por key_field) -> chunks iguais entre runs
+    - retoma no chunk seguinte ao ultimo confirmado, se o input for o mesmo
+      (fingerprint = hash das chaves + hashes de conteudo, por ordem)
+    - dentro de cada chunk so envia registos cujo hash mudou desde o
+      ultimo envio com sucesso (ou nunca enviados)
+    - o checkpoint + hashes do chunk so sao gravados depois do push correr
+      sem erros: um crash a meio repete apenas esse chunk (upserts idempotentes)
 
-    if use_mock:
-        raw_customers = prestashop.get_customers_mock()
-        raw_products = prestashop.get_products_mock()
-        raw_orders = prestashop.get_orders_mock()
-    else:
-        raw_customers = prestashop.get_customers()
-        raw_products = prestashop.get_products()
-        raw_orders = prestashop.get_orders()
-
-    customers = (
-        raw_customers.get("customers", []) if isinstance(raw_customers, dict) else []
+    store=None: sem estado, envia tudo (mesmo comportamento de antes).
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be > 0")
+
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        by_key[str(int(r[key_field]))] = r  # duplicados: vence o ultimo
+    keys = sorted(by_key, key=int)
+    chunks = _chunks(keys, chunk_size)
+
+    result: Dict[str, Any] = {
+        "records": len(keys),
+        "chunks": len(chunks),
+        "chunks_resumed": 0,
+        "skipped_unchanged": 0,
+    }
+    if store is None:
+        for chunk in chunks:
+            _merge_counts(result, push([by_key[k] for k in chunk]))
+        return result
+
+    hashes = {k: record_hash(by_key[k]) for k in keys}
+    fingerprint = hashlib.sha256(
+        "\n".join(f"{k}:{hashes[k]}" for k in keys).encode("utf-8")
+    ).hexdigest()
+    start = store.start(entity, fingerprint, len(chunks))
+    result["chunks_resumed"] = min(start, len(chunks))
+
+    for i, chunk in enumerate(chunks):
+        if i < start:
+            continue
+        pushed = store.get_hashes(entity, chunk)
+        todo = [k for k in chunk if pushed.get(k) != hashes[k]]
+        result["skipped_unchanged"] += len(chunk) - len(todo)
+        if todo:
+            _merge_counts(result, push([by_key[k] for k in todo]))
+        store.commit_chunk(entity, i, {k: hashes[k] for k in todo})
+
+    store.finish(entity)
+    return result
+
+
+def sync(
+    odoo: OdooClient,
+    customers: List[Dict[str, Any]],
+    products: List[Dict[str, Any]],
+    orders: List[Dict[str, Any]],
+    checkpoints: Optional[CheckpointStore] = None,
+    batched: bool = False,
+    reconcile_lines: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int = 1,
+) -> Dict[str, Any]:
+    """
+    customers -> products -> orders, por chunks, com checkpoint opcional.
+
+    Com `checkpoints`, um rerun depois de um crash retoma no chunk seguinte
+    ao ultimo confirmado e salta registos iguais ao ultimo envio.
+    Nota: um registo alterado/apagado a mao no Odoo nao e' detetado pelo
+    hash de origem; usar checkpoints.reset() (run(reset_checkpoints=True))
+    para forcar um full resync.
+    """
+    r1 = _sync_checkpointed(
+        checkpoints,
+        "customers",
+        customers,
+        "prestashop_customer_id",
+        lambda chunk: upsert_customers(
+            odoo, chunk, batched=batched, chunk_size=chunk_size, max_workers=max_workers
+        ),
+        chunk_size,
     )
-    products = (
-        raw_products.get("products", []) if isinstance(raw_products, dict) else []
+    r2 = _sync_checkpointed(
+        checkpoints,
+        "products",
+        products,
+        "prestashop_product_id",
+        lambda chunk: upsert_products(odoo, chunk),
+        chunk_size,
     )
-    orders = raw_orders.get("orders", []) if isinstance(raw_orders, dict) else []
 
-    r1 = upsert_customers(odoo, customers)
-    r2 = upsert_products(odoo, products)
-    r3 = upsert_orders(odoo, orders)
+    # Resolvers run-scoped (criados depois de customers/products existirem)
+    product_refs = product_variant_resolver(odoo)
+    partner_refs = partner_resolver(odoo)
+    r3 = _sync_checkpointed(
+        checkpoints,
+        "orders",
+        orders,
+        "prestashop_order_id",
+        lambda chunk: upsert_orders(
+            odoo,
+            chunk,
+            products=product_refs,
+            partners=partner_refs,
+            reconcile_lines=reconcile_lines,
+            chunk_size=chunk_size,
+            max_workers=max_workers,
+        ),
+        chunk_size,
+    )
 
     return {"customers": r1, "products": r2, "orders": r3}
 
 
+def run(
+    use_mock: bool = True,
+    batched: bool = False,
+    reconcile_lines: bool = False,
+    max_workers: int = 1,
+    checkpoint_path: Optional[str] = None,
+    reset_checkpoints: bool = False,
+) -> Dict[str, Any]:
+    """
+    checkpoint_path: ficheiro SQLite com o progresso do sync (opt-in; None =
+    sem estado, envia tudo). O estado fica associado ao url/db do Odoo.
+    reset_checkpoints: esquece o estado deste Odoo antes de comecar (full
+    resync, ex.: depois de editar registos no Odoo ou de um reset da DB).
+    """
+    if reset_checkpoints and not checkpoint_path:
+        raise ValueError("reset_checkpoints requires checkpoint_path")
+
+    _ensure_custom_fields_exist_admin_only()
+
+    odoo = build_local_client()
+
+    prestashop = _build_prestashop_client()
+    store: Optional[CheckpointStore] = None
+    try:
+        if use_mock:
+            raw_customers = prestashop.get_customers_mock()
+            raw_products = prestashop.get_products_mock()
+            raw_orders = prestashop.get_orders_mock()
+        else:
+            raw_customers = prestashop.get_customers()
+            raw_products = prestashop.get_products()
+            raw_orders = prestashop.get_orders()
+
+        customers = (
+            raw_customers.get("customers", [])
+            if isinstance(raw_customers, dict)
+            else []
+        )
+        products = (
+            raw_products.get("products", []) if isinstance(raw_products, dict) else []
+        )
+        orders = raw_orders.get("orders", []) if isinstance(raw_orders, dict) else []
+
+        if checkpoint_path:
+            store = CheckpointStore(checkpoint_path, target=odoo.target)
+            if reset_checkpoints:
+                store.reset()
+        return sync(
+            odoo,
+            customers,
+            products,
+            orders,
+            checkpoints=store,
+            batched=batched,
+            reconcile_lines=reconcile_lines,
+            max_workers=max_workers,
+        )
+    finally:
+        if store is not None:
+            store.close()
+        odoo.close()
+        prestashop.close()
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="PrestaShop -> Odoo sync")
+    p.add_argument(
+        "--checkpoint-path",
+        nargs="?",
+        const=DEFAULT_CHECKPOINT_PATH,
+        default=None,
+        help=f"Resume/skip state in SQLite (default file: {DEFAULT_CHECKPOINT_PATH})",
+    )
+    p.add_argument(
+        "--reset-checkpoints",
+        action="store_true",
+        help="Forget the stored state for this Odoo url/db first (full resync)",
+    )
+    return p
+
+
 if __name__ == "__main__":
-    out = run(use_mock=True)
+    args = _build_arg_parser().parse_args()
+    out = run(
+        use_mock=True,
+        checkpoint_path=args.checkpoint_path,
+        reset_checkpoints=args.reset_checkpoints,
+    )
     print("PIPELINE RESULT:", out)
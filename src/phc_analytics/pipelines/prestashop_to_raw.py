@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Tuple
-import psycopg2
-import psycopg2.extras
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import io
+import json
 
 from phc_analytics.integrations.prestashop.client import (
+    DEFAULT_PAGE_SIZE,
     PrestaShopClient,
     PrestaShopConfig,
 )
-from phc_analytics.storage.watermarks import WatermarkManager
+from phc_analytics.storage.pg_pool import PgPool, get_pool
+from phc_analytics.storage.watermarks import Timestamp, WatermarkManager, parse_ts
 
 
 @dataclass(frozen=True)
@@ -18,86 +23,199 @@ class RawRecord:
 
     record_id: str
     payload: Dict[str, Any]
-    source_updated_at: Optional[str]  # keep as ISO string for now (bootstrap)
+    source_updated_at: Optional[datetime]  # parsed, timezone-aware (UTC)
 
 
-def _normalize_records(
+def _iter_records(
     items: Iterable[Dict[str, Any]], id_key: str, updated_at_key: str
-) -> List[RawRecord]:
-    out: List[RawRecord] = []
+) -> Iterator[RawRecord]:
+    """Lazy variant of _normalize_records (items may be a streaming generator)."""
     for it in items:
         if not isinstance(it, dict):
             continue
         rid = str(it.get(id_key) or "").strip()
         if not rid:
             continue
-        updated = it.get(updated_at_key)
-        out.append(
-            RawRecord(
-                record_id=rid,
-                payload=it,
-                source_updated_at=str(updated) if updated is not None else None,
-            )
-        )
-    return out
+        try:
+            updated = parse_ts(it.get(updated_at_key))
+        except ValueError as exc:
+            raise ValueError(f"{updated_at_key} of record {rid}: {exc}") from None
+        yield RawRecord(record_id=rid, payload=it, source_updated_at=updated)
 
 
-def _max_source_updated_at(records: List[RawRecord]) -> Optional[str]:
-    # Bootstrap: compare lexicographically; later we should parse to datetime.
-    vals = [r.source_updated_at for r in records if r.source_updated_at]
-    return max(vals) if vals else None
+def _normalize_records(
+    items: Iterable[Dict[str, Any]], id_key: str, updated_at_key: str
+) -> List[RawRecord]:
+    return list(_iter_records(items, id_key, updated_at_key))
 
 
-def upsert_raw_orders(dsn: str, records: List[RawRecord]) -> None:
+class _Tally:
+    """Iterable pass-through that counts the items consumed."""
+
+    def __init__(self, items: Iterable[Dict[str, Any]]) -> None:
+        self._items = items
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for it in self._items:
+            self.count += 1
+            yield it
+
+
+def _track(records: Iterable[RawRecord], tally: Dict[str, Any]) -> Iterator[RawRecord]:
     """
-    TODO: Implement UPSERT into raw.prestashop_orders:
-      - order_id (text PK) <- record_id
-      - payload (jsonb)
-      - source_updated_at (timestamptz)
-      - ingested_at (timestamptz default now)
+    Pass-through that counts records and keeps max(source_updated_at).
+
+    Ids are not kept (memory stays bounded on backfills): the ids loaded by
+    a run are read back from the raw table with iter_changed_ids.
     """
-    if not records:
-        return
+    for r in records:
+        tally["loaded"] += 1
+        ts = r.source_updated_at
+        # datetimes com timezone: offsets / formatos mistos comparam bem
+        if ts and (tally["max_ts"] is None or ts > tally["max_ts"]):
+            tally["max_ts"] = ts
+        yield r
 
-    rows = [
-        (
-            r.record_id,
-            psycopg2.extras.Json(r.payload),
-            r.source_updated_at,
+
+@dataclass(frozen=True)
+class RawTable:
+    """Target raw table: text PK column + payload jsonb + source_updated_at."""
+
+    name: str
+    key_column: str
+
+
+RAW_TABLES: Dict[str, RawTable] = {
+    "prestashop_orders": RawTable("raw.prestashop_orders", "order_id"),
+    "prestashop_customers": RawTable("raw.prestashop_customers", "customer_id"),
+    "prestashop_products": RawTable("raw.prestashop_products", "product_id"),
+}
+
+# Rows per COPY buffer: bounds client memory, the server sees one stream.
+COPY_BUFFER_ROWS = 10_000
+
+
+def _csv_buffers(
+    records: Iterable[RawRecord], rows_per_buffer: int = COPY_BUFFER_ROWS
+) -> Iterator[Tuple[io.StringIO, int]]:
+    """
+    Build CSV buffers (record_id, payload, source_updated_at) incrementally.
+
+    None -> empty unquoted field, which COPY ... (FORMAT csv) reads as NULL.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    n = 0
+    for r in records:
+        writer.writerow(
+            [
+                r.record_id,
+                json.dumps(r.payload, separators=(",", ":"), default=str),
+                r.source_updated_at.isoformat() if r.source_updated_at else None,
+            ]
         )
-        for r in records
-    ]
-
-    sql = """
-    INSERT INTO raw.prestashop_orders (order_id, payload, source_updated_at)
-    VALUES %s
-    ON CONFLICT (order_id)
-    DO UPDATE SET
-        payload = EXCLUDED.payload,
-        source_updated_at = EXCLUDED.source_updated_at,
-        ingested_at = now()
+        n += 1
+        if n >= rows_per_buffer:
+            buf.seek(0)
+            yield buf, n
+            buf = io.StringIO()
+            writer = csv.writer(buf, lineterminator="\n")
+            n = 0
+    if n:
+        buf.seek(0)
+        yield buf, n
+
+
+def copy_upsert_raw(
+    conn: Any,
+    table: RawTable,
+    records: Iterable[RawRecord],
+    rows_per_buffer: int = COPY_BUFFER_ROWS,
+) -> int:
     """
+    Bulk UPSERT into a raw.* table on an open connection (caller commits).
 
-    with psycopg2.connect(dsn) as conn:
-        with conn.cursor() as cur:
-            psycopg2.extras.execute_values(
-                cur,
-                sql,
-                rows,
-                template="(%s, %s::jsonb, %s::timestamptz)",
-                page_size=1000,
+    1) COPY records into a temp staging table (CSV, buffered in chunks)
+    2) one INSERT ... SELECT DISTINCT ON (key) ... ON CONFLICT DO UPDATE
+       WHERE payload IS DISTINCT FROM EXCLUDED.payload
+       -> duplicates in the batch: last one wins; unchanged rows are not
+          rewritten (no ingested_at churn / dead tuples)
+
+    Returns the number of rows inserted or updated.
+    """
+    tmp = "_raw_load_" + table.name.replace(".", "_")
+    copied = 0
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {tmp}")
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE {tmp} (
+                seq bigserial,
+                record_id text NOT NULL,
+                payload jsonb NOT NULL,
+                source_updated_at timestamptz
+            ) ON COMMIT DROP
+            """
+        )
+        for buf, n in _csv_buffers(records, rows_per_buffer):
+            cur.copy_expert(
+                f"COPY {tmp} (record_id, payload, source_updated_at) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buf,
             )
-        conn.commit()
+            copied += n
+        if not copied:
+            cur.execute(f"DROP TABLE {tmp}")
+            return 0
+
+        cur.execute(
+            f"""
+            INSERT INTO {table.name} AS t ({table.key_column}, payload, source_updated_at)
+            SELECT DISTINCT ON (record_id) record_id, payload, source_updated_at
+            FROM {tmp}
+            ORDER BY record_id, seq DESC
+            ON CONFLICT ({table.key_column})
+            DO UPDATE SET
+                payload = EXCLUDED.payload,
+                source_updated_at = EXCLUDED.source_updated_at,
+                ingested_at = now()
+            WHERE t.payload IS DISTINCT FROM EXCLUDED.payload
+            """
+        )
+        affected = int(cur.rowcount)
+        cur.execute(f"DROP TABLE {tmp}")
+    return affected
+
+
+def _upsert_raw(dsn: str, entity_name: str, records: Iterable[RawRecord]) -> int:
+    with get_pool(dsn).transaction() as conn:
+        return copy_upsert_raw(conn, RAW_TABLES[entity_name], records)
 
 
-def upsert_raw_customers(dsn: str, records: List[RawRecord]) -> None:
-    """TODO: Implement UPSERT into raw.prestashop_customers (customer_id PK)."""
-    raise NotImplementedError
+def upsert_raw_orders(dsn: str, records: Iterable[RawRecord]) -> int:
+    """UPSERT into raw.prestashop_orders (order_id PK) via COPY."""
+    return _upsert_raw(dsn, "prestashop_orders", records)
 
 
-def upsert_raw_products(dsn: str, records: List[RawRecord]) -> None:
-    """TODO: Implement UPSERT into raw.prestashop_products (product_id PK)."""
-    raise NotImplementedError
+def upsert_raw_customers(dsn: str, records: Iterable[RawRecord]) -> int:
+    """UPSERT into raw.prestashop_customers (customer_id PK) via COPY."""
+    return _upsert_raw(dsn, "prestashop_customers", records)
+
+
+def upsert_raw_products(dsn: str, records: Iterable[RawRecord]) -> int:
+    """UPSERT into raw.prestashop_products (product_id PK) via COPY."""
+    return _upsert_raw(dsn, "prestashop_products", records)
+
+
+@contextmanager
+def _entity_transaction(pool: PgPool, shared: Any) -> Iterator[Any]:
+    """Transacao da entidade: a partilhada (atomic) ou uma propria do pool."""
+    if shared is not None:
+        yield shared
+        return
+    with pool.transaction() as conn:
+        yield conn
 
 
 def run_prestashop_to_raw(
@@ -105,61 +223,137 @@ def run_prestashop_to_raw(
     dsn: str,
     prestashop_base_url: str,
     prestashop_api_key: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    stream: bool = False,
+    pool: Optional[PgPool] = None,
+    atomic: bool = False,
 ) -> Dict[str, Any]:
     """
     PrestaShop -> Postgres raw ingestion with incremental watermarks.
 
     Rule:
-    - Read watermark for entity
-    - Extract records since watermark (when supported)
-    - UPSERT to raw table
+    - Read watermarks of all entities (one query, WatermarkManager.get_many)
+    - Extract records since watermark (paged, date_upd >= watermark)
+    - UPSERT to raw table (COPY into temp table + one INSERT ... ON CONFLICT)
     - Advance watermark to max(source_updated_at) loaded successfully
+      (parsed timestamps, never moves backwards)
+
+    stream=True: one unpaginated request per entity, decoded item by item
+    from the socket (PrestaShopClient.stream_items).
+
+    Either way records flow lazily into one COPY-based load per entity
+    (copy_upsert_raw), so memory stays bounded for very large dumps.
+
+    Connections come from the shared pool (storage.pg_pool):
+    - default: the load and the watermark advance of an entity commit in
+      the same transaction (one entity failing keeps earlier ones)
+    - atomic=True: one transaction for the whole run; all watermarks
+      advance together (WatermarkManager.set_many) or not at all
     """
-    wm = WatermarkManager(dsn)
+    pool = pool or get_pool(dsn)
+    wm = WatermarkManager(dsn, pool=pool)
     client = PrestaShopClient(
         PrestaShopConfig(base_url=prestashop_base_url, api_key=prestashop_api_key)
     )
-    _ = client  # placeholder until extraction is wired
 
-    results: Dict[str, Any] = {"entities": {}}
+    try:
+        results: Dict[str, Any] = {"entities": {}}
+
+        entities: List[Tuple[str, str, str, str]] = [
+            # (entity_name, api_resource, id_key, updated_at_key)
+            ("prestashop_orders", "orders", "id", "date_upd"),
+            ("prestashop_customers", "customers", "id", "date_upd"),
+            ("prestashop_products", "products", "id", "date_upd"),
+        ]
+        for entity_name, *_ in entities:
+            if entity_name not in RAW_TABLES:
+                raise ValueError(f"Unknown entity: {entity_name}")
+
+        states = wm.get_many([e[0] for e in entities])
+        advanced: Dict[str, Optional[datetime]] = {}
+
+        with pool.transaction() if atomic else nullcontext() as shared:
+            for entity_name, resource, id_key, updated_at_key in entities:
+                state = states.get(entity_name)
+                since = state.iso() if state else "1970-01-01T00:00:00Z"
+
+                # Extracao incremental: so os items com date_upd >= watermark.
+                if stream:
+                    items: Iterable[Dict[str, Any]] = client.stream_items(
+                        resource, since=since
+                    )
+                else:
+                    items = (
+                        it
+                        for page in client.iter_pages(
+                            resource, since=since, page_size=page_size
+                        )
+                        for it in page
+                    )
+                seen = _Tally(items)
+                tally: Dict[str, Any] = {"loaded": 0, "max_ts": None}
 
-    entities: List[Tuple[str, str, str]] = [
-        # (entity_name, id_key, updated_at_key)
-        ("prestashop_orders", "id", "date_upd"),
-        ("prestashop_customers", "id", "date_upd"),
-        ("prestashop_products", "id", "date_upd"),
-    ]
+                # 1 COPY stream por entidade (buffers de COPY_BUFFER_ROWS) e o avanco
+                # do watermark na mesma transacao: falha a meio -> rollback de ambos.
+                with _entity_transaction(pool, shared) as conn:
+                    upserted = copy_upsert_raw(
+                        conn,
+                        RAW_TABLES[entity_name],
+                        _track(
+                            _iter_records(
+                                seen, id_key=id_key, updated_at_key=updated_at_key
+                            ),
+                            tally,
+                        ),
+                    )
+                    max_ts: Optional[datetime] = tally["max_ts"]
+                    if shared is None:
+                        wm.set(entity_name, max_ts, conn=conn)
+                advanced[entity_name] = max_ts
 
-    for entity_name, id_key, updated_at_key in entities:
-        state = wm.get(entity_name)
-        since = state.watermark_ts if state else "1970-01-01T00:00:00Z"
+                results["entities"][entity_name] = {
+                    "since": since,
+                    "extracted": seen.count,
+                    "loaded": tally["loaded"],
+                    "upserted": upserted,
+                    "max_source_updated_at": max_ts.isoformat() if max_ts else None,
+                }
 
-        # TODO: wire real incremental extraction in client based on `since`
-        # For now, keep placeholder to avoid guessing method names.
-        extracted: List[Dict[str, Any]] = []
+            if shared is not None:
+                wm.set_many(advanced, conn=shared)
 
-        records = _normalize_records(
-            extracted, id_key=id_key, updated_at_key=updated_at_key
+        return results
+    finally:
+        client.close()  # ligacoes keep-alive do pool HTTP
+
+
+def iter_changed_ids(
+    conn: Any,
+    entity_name: str,
+    since: Timestamp,
+    batch_size: int = COPY_BUFFER_ROWS,
+) -> Iterator[str]:
+    """
+    Ids of the raw table rows with source_updated_at >= since, i.e. what a
+    run extracted from that watermark (same >= rule as the extraction).
+
+    Typical use (incremental gold rebuild after run_prestashop_to_raw):
+        since = result["entities"]["prestashop_orders"]["since"]
+        ids = iter_changed_ids(conn, "prestashop_orders", since)
+
+    Server-side (named) cursor fetching batch_size rows at a time: the
+    client never holds the whole id list. Must run inside a transaction
+    (e.g. pool.transaction()).
+    """
+    table = RAW_TABLES.get(entity_name)
+    if table is None:
+        raise ValueError(f"Unknown entity: {entity_name}")
+    with conn.cursor(name=f"changed_ids_{entity_name}") as cur:
+        cur.itersize = batch_size
+        cur.execute(
+            f"SELECT {table.key_column} FROM {table.name} "
+            "WHERE source_updated_at >= %s ORDER BY source_updated_at",
+            (parse_ts(since),),
         )
-        max_ts = _max_source_updated_at(records)
-
-        if entity_name == "prestashop_orders":
-            upsert_raw_orders(dsn, records)
-        elif entity_name == "prestashop_customers":
-            upsert_raw_customers(dsn, records)
-        elif entity_name == "prestashop_products":
-            upsert_raw_products(dsn, records)
-        else:
-            raise ValueError(f"Unknown entity: {entity_name}")
-
-        if max_ts:
-            wm.set(entity_name, max_ts)
-
-        results["entities"][entity_name] = {
-            "since": since,
-            "extracted": len(extracted),
-            "loaded": len(records),
-            "max_source_updated_at": max_ts,
-        }
-
-    return results
+        for (record_id,) in cur:
+            yield record_id
@@ -1,14 +1,83 @@
 from __future__ import annotations
 
-from typing import Final
+from pathlib import Path
+from typing import Final, Iterator, Optional, Union
+import hashlib
+import os
 import runpy
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
 MOCK_PATH: Final[str] = "data/mock_documents.py"
 
+# Cache em disco dos documentos mock (Arrow IPC, lido com memory map).
+# Chave = sha256 do script + CACHE_VERSION: so se regenera quando o script
+# muda. Mudar a normalizacao abaixo -> incrementar CACHE_VERSION.
+CACHE_DIR_ENV: Final[str] = "PHC_ANALYTICS_CACHE_DIR"
+DEFAULT_CACHE_DIR: Final[str] = ".cache/phc_analytics"
+CACHE_VERSION: Final[int] = 1
 
-def load_documents_mock(path: str = MOCK_PATH) -> pd.DataFrame:
+PathLike = Union[str, Path]
+
+
+def _normalize_documents(df: pd.DataFrame) -> pd.DataFrame:
+    # Normalizar datas (garantir datetime)
+    df["doc_date"] = pd.to_datetime(df["doc_date"], errors="coerce")
+
+    # Validação mínima
+    if df["doc_date"].isna().any():
+        raise ValueError("Existem doc_date inválidas após parsing (NaT).")
+
+    return df
+
+
+def _run_mock_script(path: PathLike) -> pd.DataFrame:
+    g = runpy.run_path(str(path))
+
+    if "df_documents" not in g:
+        raise KeyError(
+            f"'{path}' não expôs 'df_documents'. "
+            "Garante que o mock_documents.py define df_documents."
+        )
+
+    return _normalize_documents(g["df_documents"].copy())
+
+
+def _cache_dir(cache_dir: Optional[PathLike]) -> Path:
+    return Path(cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+
+
+def cache_path_for(path: PathLike, cache_dir: Optional[PathLike] = None) -> Path:
+    """Ficheiro de cache (content-addressed) para o script em path."""
+    digest = hashlib.sha256(f"v{CACHE_VERSION}\n".encode())
+    digest.update(Path(path).read_bytes())
+    return _cache_dir(cache_dir) / f"{Path(path).stem}-{digest.hexdigest()[:16]}.arrow"
+
+
+def write_documents_arrow(df: pd.DataFrame, path: PathLike) -> Path:
+    """DataFrame -> Arrow IPC (sem compressao: mmap sem copia). Escrita atomica."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+def read_documents_arrow(path: PathLike) -> pd.DataFrame:
+    """Arrow IPC -> DataFrame, lido com memory map (o SO pagina o ficheiro)."""
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def load_documents_mock(
+    path: str = MOCK_PATH, cache_dir: Optional[PathLike] = None, use_cache: bool = True
+) -> pd.DataFrame:
     """
     Carrega dados mock de documentos a partir de um script Python.
 
@@ -18,22 +87,102 @@ def load_documents_mock(path: str = MOCK_PATH) -> pd.DataFrame:
     - Garante normalização mínima (tipos/datas) num único ponto.
 
     Espera que o script exporte uma variável 'df_documents' (pandas DataFrame).
+
+    Cache: o resultado fica em cache_dir (default: $PHC_ANALYTICS_CACHE_DIR ou
+    .cache/phc_analytics) num ficheiro Arrow com o hash do script no nome.
+    Chamadas seguintes (ex: cada rerun do Streamlit) so leem esse ficheiro;
+    o script so volta a correr quando o seu conteudo muda.
+    use_cache=False: corre sempre o script (sem ler/escrever cache).
     """
-    g = runpy.run_path(path)
+    if not use_cache:
+        return _run_mock_script(path)
 
-    if "df_documents" not in g:
-        raise KeyError(
-            f"'{path}' não expôs 'df_documents'. "
-            "Garante que o mock_documents.py define df_documents."
-        )
+    cached = cache_path_for(path, cache_dir)
+    if cached.exists():
+        return read_documents_arrow(cached)
 
-    df = g["df_documents"].copy()
+    df = _run_mock_script(path)
+    write_documents_arrow(df, cached)
+    # versoes antigas do mesmo script ja nao servem
+    for stale in cached.parent.glob(f"{Path(path).stem}-*.arrow"):
+        if stale != cached:
+            stale.unlink(missing_ok=True)
+    return df
 
-    # Normalizar datas (garantir datetime)
-    df["doc_date"] = pd.to_datetime(df["doc_date"], errors="coerce")
 
-    # Validação mínima
-    if df["doc_date"].isna().any():
-        raise ValueError("Existem doc_date inválidas após parsing (NaT).")
+def generate_documents(
+    n_documents: int,
+    *,
+    seed: int = 42,
+    chunk_size: int = 1_000_000,
+    n_clients: int = 5,
+    client_skew: float = 0.0,
+    start_date: str = "2023-01-01",
+    end_date: str = "2024-12-31",
+) -> Iterator[pd.DataFrame]:
+    """
+    Gerador sintetico escalavel (testes de carga): mesmas colunas que o mock,
+    n_documents documentos em chunks de chunk_size (memoria limitada ao chunk).
 
-    return df
+    Deterministico: cada chunk usa o seu proprio RNG (seed, indice do chunk),
+    por isso (n_documents, seed, chunk_size) -> sempre os mesmos dados.
+    Distribuicoes como data/mock_documents.py (tipos 60/30/10, total 50-5000).
+    client_skew > 0: clientes com peso Zipf 1/k^skew (poucos clientes com
+    muitos documentos); 0 = uniforme.
+    """
+    if n_documents < 0 or chunk_size < 1:
+        raise ValueError("n_documents must be >= 0 and chunk_size >= 1")
+
+    dates = pd.date_range(start=start_date, end=end_date, freq="D").to_numpy()
+    client_names = np.array(
+        [f"Cliente {i}" for i in range(1, n_clients + 1)], dtype=object
+    )
+    doc_types = np.array(["FATURA", "RECIBO", "GUIA"], dtype=object)
+    client_cdf = np.cumsum(np.arange(1, n_clients + 1, dtype="float64") ** -client_skew)
+    client_cdf /= client_cdf[-1]
+
+    for index, start in enumerate(range(0, n_documents, chunk_size)):
+        rng = np.random.default_rng([seed, index])
+        size = min(chunk_size, n_documents - start)
+        if client_skew > 0:
+            client_idx = np.minimum(
+                np.searchsorted(client_cdf, rng.random(size), side="right"),
+                n_clients - 1,
+            )
+        else:
+            client_idx = rng.integers(0, n_clients, size=size)
+        yield pd.DataFrame(
+            {
+                "doc_id": np.arange(start + 1, start + size + 1, dtype="int64"),
+                "doc_date": dates[rng.integers(0, len(dates), size=size)],
+                "client_id": client_idx + 1,
+                "client_name": client_names[client_idx],
+                "doc_type": doc_types[rng.choice(3, size=size, p=[0.6, 0.3, 0.1])],
+                "total": np.round(rng.uniform(50, 5000, size=size), 2),
+            }
+        )
+
+
+def write_synthetic_documents(
+    path: PathLike, n_documents: int, **kwargs: object
+) -> Path:
+    """
+    Escreve generate_documents(n_documents, **kwargs) num ficheiro Arrow IPC,
+    chunk a chunk (1 record batch por chunk); ler com read_documents_arrow.
+    """
+    if n_documents < 1:
+        raise ValueError("n_documents must be >= 1")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    writer: Optional[pa.ipc.RecordBatchFileWriter] = None
+    with pa.OSFile(str(path), "wb") as sink:
+        try:
+            for chunk in generate_documents(n_documents, **kwargs):  # type: ignore[arg-type]
+                batch = pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pa.ipc.new_file(sink, batch.schema)
+                writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+    return path
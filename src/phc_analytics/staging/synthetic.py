@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, Final, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .documents import generate_documents
+
+# Gerador sintetico (seeded) de PrestaShop customers/products/orders(+lines)
+# e documentos PHC, para testes de carga de todas as etapas.
+#
+# - Distribuicoes com skew: produtos por popularidade Zipf, clientes
+#   recorrentes (Zipf sobre clientes), nº de linhas ~ 1 + Poisson
+# - Linhas "sujas" (dirty_rate): nulos em campos opcionais, emails com
+#   maiusculas/espacos, orders duplicadas no chunk (reenvio da API)
+# - Linhas invalidas (invalid_rate): violam o Data Contract (email /
+#   created_at / quantity em falta) -> DataValidationError no normalize
+# - Tudo gerado por chunks (Arrow, numpy vetorizado) e escrito em streaming
+#   para JSON lines ou Parquet: memoria limitada ao chunk, seja qual for o N
+#
+# Deterministico: cada chunk tem o seu RNG (seed, entidade, indice), por
+# isso a mesma config (incluindo chunk_size) gera sempre os mesmos dados.
+# Os ficheiros servem de input a prestashop_normalize_df.read_table.
+
+ENTITIES: Final[Tuple[str, ...]] = ("customers", "products", "orders", "documents")
+FORMATS: Final[Tuple[str, ...]] = ("jsonl", "parquet")
+
+_FIRST_NAMES = ["Ana", "Rui", "Joana", "Pedro", "Marta", "Tiago", "Sofia", "Nuno"]
+_LAST_NAMES = ["Silva", "Santos", "Ferreira", "Pereira", "Costa", "Oliveira"]
+_STATUSES = ["paid", "shipped", "delivered", "cancelled", "refunded"]
+_STATUS_P = [0.35, 0.25, 0.3, 0.07, 0.03]
+
+LINE_TYPE: Final = pa.struct(
+    [
+        ("prestashop_product_id", pa.int64()),
+        ("quantity", pa.int64()),
+        ("unit_price", pa.float64()),
+        ("line_total", pa.float64()),
+    ]
+)
+
+SCHEMAS: Final[Dict[str, pa.Schema]] = {
+    "customers": pa.schema(
+        [
+            ("prestashop_customer_id", pa.int64()),
+            ("email", pa.string()),
+            ("firstname", pa.string()),
+            ("lastname", pa.string()),
+            ("active", pa.bool_()),
+            ("created_at", pa.string()),
+            ("updated_at", pa.string()),
+        ]
+    ),
+    "products": pa.schema(
+        [
+            ("prestashop_product_id", pa.int64()),
+            ("sku", pa.string()),
+            ("name", pa.string()),
+            ("active", pa.bool_()),
+            ("price", pa.float64()),
+            ("currency", pa.string()),
+            ("created_at", pa.string()),
+            ("updated_at", pa.string()),
+        ]
+    ),
+    "orders": pa.schema(
+        [
+            ("prestashop_order_id", pa.int64()),
+            ("prestashop_customer_id", pa.int64()),
+            ("status", pa.string()),
+            ("total_paid", pa.float64()),
+            ("currency", pa.string()),
+            ("created_at", pa.string()),
+            ("updated_at", pa.string()),
+            ("lines", pa.list_(LINE_TYPE)),
+        ]
+    ),
+}
+
+_ENTITY_CODE = {"customers": 1, "products": 2, "orders": 3, "documents": 4}
+# streams fora dos indices de chunk: precos e ordem Zipf (ranks -> ids)
+_PRICES_STREAM = 2**32 - 1
+_RANKS_STREAM = 2**32 - 2
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    """Parametros do dataset sintetico (volumes, skew, sujidade, seed)."""
+
+    n_customers: int = 1_000
+    n_products: int = 500
+    n_orders: int = 10_000
+    n_documents: int = 0
+    mean_lines_per_order: float = 3.0
+    max_lines_per_order: int = 20
+    product_skew: float = 1.1  # expoente Zipf: popularidade dos produtos
+    customer_skew: float = 0.8  # expoente Zipf: clientes recorrentes
+    dirty_rate: float = 0.0
+    invalid_rate: float = 0.0
+    start_date: str = "2022-01-01"
+    end_date: str = "2024-12-31"
+    seed: int = 42
+    chunk_size: int = 100_000
+
+    def __post_init__(self) -> None:
+        for name in ("n_customers", "n_products"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be >= 1")
+        if self.n_orders < 0 or self.n_documents < 0:
+            raise ValueError("n_orders and n_documents must be >= 0")
+        if self.chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        if not 1 <= self.mean_lines_per_order <= self.max_lines_per_order:
+            raise ValueError("need 1 <= mean_lines_per_order <= max_lines_per_order")
+        for name in ("dirty_rate", "invalid_rate"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+
+
+def _rng(cfg: SyntheticConfig, entity: str, index: int) -> np.random.Generator:
+    return np.random.default_rng([cfg.seed, _ENTITY_CODE[entity], index])
+
+
+def _zipf_sampler(
+    n: int, a: float, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(cdf, ids): rank k com peso 1/k^a; ranks baralhados -> ids 1..n."""
+    weights = np.arange(1, n + 1, dtype="float64") ** -a
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    return cdf, rng.permutation(n) + 1
+
+
+def _sample(
+    sampler: Tuple[np.ndarray, np.ndarray], rng: np.random.Generator, size: int
+) -> np.ndarray:
+    cdf, ids = sampler
+    ranks = np.searchsorted(cdf, rng.random(size), side="right")
+    return ids[np.minimum(ranks, len(ids) - 1)]
+
+
+def _timestamps(seconds: np.ndarray) -> np.ndarray:
+    """Segundos desde epoch -> 'YYYY-MM-DDTHH:MM:SS' (formato dos mocks)."""
+    return np.datetime_as_string(seconds.astype("datetime64[s]"), unit="s")
+
+
+def _span(cfg: SyntheticConfig) -> Tuple[int, int]:
+    start = np.datetime64(cfg.start_date, "s").astype("int64")
+    end = np.datetime64(cfg.end_date, "s").astype("int64") + 86_399
+    if end <= start:
+        raise ValueError("end_date must be after start_date")
+    return int(start), int(end)
+
+
+def _nullable(values: Any, null_mask: np.ndarray, type_: pa.DataType) -> pa.Array:
+    return pa.array(values, type=type_, mask=null_mask)
+
+
+def _chunk_bounds(total: int, chunk_size: int) -> Iterator[Tuple[int, int, int]]:
+    for index, start in enumerate(range(0, total, chunk_size)):
+        yield index, start, min(chunk_size, total - start)
+
+
+def product_prices(cfg: SyntheticConfig) -> np.ndarray:
+    """Preco de cada produto (indice = id - 1): lognormal ~30 EUR, 2 casas."""
+    rng = _rng(cfg, "products", _PRICES_STREAM)
+    return np.round(rng.lognormal(mean=3.0, sigma=0.8, size=cfg.n_products) + 0.99, 2)
+
+
+def _customers_chunk(
+    cfg: SyntheticConfig, index: int, start: int, size: int
+) -> pa.Table:
+    rng = _rng(cfg, "customers", index)
+    ids = np.arange(start + 1, start + size + 1, dtype="int64")
+    dirty = rng.random(size) < cfg.dirty_rate
+    invalid = rng.random(size) < cfg.invalid_rate
+
+    emails = np.array([f"cliente{i}@example.com" for i in ids], dtype=object)
+    emails[dirty] = [f"  {e.upper()} " for e in emails[dirty]]
+    begin, end = _span(cfg)
+    created = rng.integers(begin, end, size=size)
+
+    return pa.Table.from_arrays(
+        [
+            pa.array(ids),
+            _nullable(emails, invalid, pa.string()),
+            _nullable(
+                rng.choice(_FIRST_NAMES, size=size),
+                dirty & (rng.random(size) < 0.5),
+                pa.string(),
+            ),
+            pa.array(rng.choice(_LAST_NAMES, size=size)),
+            pa.array(rng.random(size) < 0.97),
+            pa.array(_timestamps(created)),
+            pa.array(_timestamps(created + rng.integers(0, 90 * 86_400, size=size))),
+        ],
+        schema=SCHEMAS["customers"],
+    )
+
+
+def _products_chunk(
+    cfg: SyntheticConfig, index: int, start: int, size: int, prices: np.ndarray
+) -> pa.Table:
+    rng = _rng(cfg, "products", index)
+    ids = np.arange(start + 1, start + size + 1, dtype="int64")
+    dirty = rng.random(size) < cfg.dirty_rate
+    begin, end = _span(cfg)
+    created = rng.integers(begin, end, size=size)
+
+    return pa.Table.from_arrays(
+        [
+            pa.array(ids),
+            _nullable(
+                [f"SKU-{i:07d}" for i in ids],
+                dirty & (rng.random(size) < 0.5),
+                pa.string(),
+            ),
+            pa.array([f"Produto {i}" for i in ids]),
+            pa.array(rng.random(size) < 0.95),
+            _nullable(prices[start : start + size], dirty, pa.float64()),
+            pa.array(np.full(size, "EUR", dtype=object)),
+            pa.array(_timestamps(created)),
+            pa.array(_timestamps(created + rng.integers(0, 30 * 86_400, size=size))),
+        ],
+        schema=SCHEMAS["products"],
+    )
+
+
+def _orders_chunk(
+    cfg: SyntheticConfig,
+    index: int,
+    start: int,
+    size: int,
+    prices: np.ndarray,
+    products: Tuple[np.ndarray, np.ndarray],
+    customers: Tuple[np.ndarray, np.ndarray],
+) -> pa.Table:
+    rng = _rng(cfg, "orders", index)
+    ids = np.arange(start + 1, start + size + 1, dtype="int64")
+
+    # order ids crescem com o tempo (como num e-commerce real) + jitter
+    begin, end = _span(cfg)
+    step = (end - begin) / max(cfg.n_orders, 1)
+    created = (begin + (ids - 1) * step + rng.random(size) * step).astype("int64")
+    updated = created + rng.integers(0, 3 * 86_400, size=size)
+
+    counts = np.minimum(
+        1 + rng.poisson(cfg.mean_lines_per_order - 1, size=size),
+        cfg.max_lines_per_order,
+    )
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype("int32")
+    n_lines = int(offsets[-1])
+
+    product_ids = _sample(products, rng, n_lines)
+    quantity = np.minimum(rng.geometric(0.55, size=n_lines), 50)
+    unit_price = prices[product_ids - 1]
+    line_total = np.round(quantity * unit_price, 2)
+    total_paid = np.round(np.add.reduceat(line_total, offsets[:-1]), 2)
+
+    line_dirty = rng.random(n_lines) < cfg.dirty_rate
+    line_invalid = rng.random(n_lines) < cfg.invalid_rate
+    lines = pa.StructArray.from_arrays(
+        [
+            pa.array(product_ids),
+            _nullable(quantity, line_invalid, pa.int64()),
+            _nullable(
+                unit_price, line_dirty & (rng.random(n_lines) < 0.5), pa.float64()
+            ),
+            _nullable(line_total, line_dirty, pa.float64()),
+        ],
+        fields=list(LINE_TYPE),
+    )
+
+    dirty = rng.random(size) < cfg.dirty_rate
+    invalid = rng.random(size) < cfg.invalid_rate
+    table = pa.Table.from_arrays(
+        [
+            pa.array(ids),
+            pa.array(_sample(customers, rng, size)),
+            pa.array(rng.choice(_STATUSES, size=size, p=_STATUS_P)),
+            pa.array(total_paid),
+            _nullable(np.full(size, "EUR", dtype=object), dirty, pa.string()),
+            _nullable(_timestamps(created), invalid, pa.string()),
+            pa.array(_timestamps(updated)),
+            pa.ListArray.from_arrays(pa.array(offsets), lines),
+        ],
+        schema=SCHEMAS["orders"],
+    )
+
+    # reenvios: algumas orders "sujas" aparecem 2x no mesmo chunk
+    duplicates = np.flatnonzero(dirty & (rng.random(size) < 0.5))
+    if len(duplicates):
+        table = pa.concat_tables([table, table.take(pa.array(duplicates))])
+    return table
+
+
+def iter_chunks(entity: str, cfg: SyntheticConfig) -> Iterator[pa.Table]:
+    """Chunks (pa.Table) de uma entidade: customers/products/orders/documents."""
+    if entity == "customers":
+        for index, start, size in _chunk_bounds(cfg.n_customers, cfg.chunk_size):
+            yield _customers_chunk(cfg, index, start, size)
+    elif entity == "products":
+        prices = product_prices(cfg)
+        for index, start, size in _chunk_bounds(cfg.n_products, cfg.chunk_size):
+            yield _products_chunk(cfg, index, start, size, prices)
+    elif entity == "orders":
+        prices = product_prices(cfg)
+        products = _zipf_sampler(
+            cfg.n_products, cfg.product_skew, _rng(cfg, "products", _RANKS_STREAM)
+        )
+        customers = _zipf_sampler(
+            cfg.n_customers, cfg.customer_skew, _rng(cfg, "customers", _RANKS_STREAM)
+        )
+        for index, start, size in _chunk_bounds(cfg.n_orders, cfg.chunk_size):
+            yield _orders_chunk(cfg, index, start, size, prices, products, customers)
+    elif entity == "documents":
+        for df in generate_documents(
+            cfg.n_documents,
+            seed=cfg.seed,
+            chunk_size=cfg.chunk_size,
+            n_clients=cfg.n_customers,
+            client_skew=cfg.customer_skew,
+            start_date=cfg.start_date,
+            end_date=cfg.end_date,
+        ):
+            yield pa.Table.from_pandas(df, preserve_index=False)
+    else:
+        raise ValueError(f"Unknown entity {entity!r} (expected one of {ENTITIES})")
+
+
+def _to_records(table: pa.Table) -> List[Dict[str, Any]]:
+    """
+    Table -> lista de dicts, coluna a coluna (Table.to_pylist e ~4x mais
+    lento com a coluna lines, list<struct>).
+    """
+    columns: Dict[str, List[Any]] = {}
+    for name in table.column_names:
+        col = table.column(name).combine_chunks()
+        if pa.types.is_list(col.type):
+            values = col.flatten()
+            keys = [f.name for f in col.type.value_type]
+            items = [
+                dict(zip(keys, row))
+                for row in zip(*(values.field(k).to_pylist() for k in keys))
+            ]
+            offsets = col.offsets.to_pylist()
+            base = offsets[0]
+            columns[name] = [
+                items[a - base : b - base] for a, b in zip(offsets, offsets[1:])
+            ]
+        else:
+            columns[name] = col.to_pylist()
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def iter_records(entity: str, cfg: SyntheticConfig) -> Iterator[List[Dict[str, Any]]]:
+    """Como iter_chunks, em listas de dicts (input dos normalize_* linha a linha)."""
+    for table in iter_chunks(entity, cfg):
+        yield _to_records(table)
+
+
+def raw_payloads(cfg: SyntheticConfig) -> Tuple[Dict[str, Any], ...]:
+    """(customers, products, orders) no formato dos get_*_mock (tudo em memoria)."""
+    return tuple(
+        {entity: [r for chunk in iter_records(entity, cfg) for r in chunk]}
+        for entity in ("customers", "products", "orders")
+    )
+
+
+def write_dataset(
+    out_dir: Path,
+    cfg: SyntheticConfig,
+    fmt: str = "jsonl",
+    entities: Sequence[str] = ENTITIES,
+) -> Dict[str, int]:
+    """
+    Escreve cada entidade em out_dir/<entidade>.<jsonl|parquet>, chunk a chunk.
+    Devolve o nº de linhas escritas por entidade (orders: + reenvios).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (expected one of {FORMATS})")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    written: Dict[str, int] = {}
+    for entity in entities:
+        path = out_dir / f"{entity}.{fmt}"
+        rows = 0
+        if fmt == "parquet":
+            writer = None
+            try:
+                for table in iter_chunks(entity, cfg):
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                    rows += table.num_rows
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with path.open("w", encoding="utf-8") as f:
+                for table in iter_chunks(entity, cfg):
+                    for record in _to_records(table):
+                        # default=str: datas dos documentos -> texto ISO
+                        f.write(json.dumps(record, separators=(",", ":"), default=str))
+                        f.write("\n")
+                    rows += table.num_rows
+        written[entity] = rows
+    return written
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        description="Synthetic PrestaShop / PHC dataset generator"
+    )
+    p.add_argument("--out-dir", type=Path, required=True)
+    p.add_argument("--format", choices=FORMATS, default="jsonl")
+    p.add_argument(
+        "--entities", default=",".join(ENTITIES), help="comma-separated subset"
+    )
+    for f in fields(SyntheticConfig):
+        flag = "--" + f.name.replace("_", "-")
+        kind = (
+            float
+            if f.type in ("float", float)
+            else str
+            if f.type in ("str", str)
+            else int
+        )
+        # 1e6 tambem aceite nos inteiros
+        p.add_argument(
+            flag,
+            type=(lambda v: int(float(v))) if kind is int else kind,
+            default=f.default,
+        )
+    return p
+
+
+if __name__ == "__main__":
+    args = _build_arg_parser().parse_args()
+    config = SyntheticConfig(
+        **{f.name: getattr(args, f.name) for f in fields(SyntheticConfig)}
+    )
+    counts = write_dataset(args.out_dir, config, args.format, args.entities.split(","))
+    for name, n in counts.items():
+        print(f"- {name}: {n} rows -> {args.out_dir / f'{name}.{args.format}'}")
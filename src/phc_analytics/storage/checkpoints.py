@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+import sqlite3
+
+# Ficheiro SQLite local por defeito (sobrevive a crashes, sem depender de Postgres)
+DEFAULT_CHECKPOINT_PATH = os.getenv(
+    "PHC_SYNC_CHECKPOINT_PATH", "state/sync_checkpoints.sqlite"
+)
+
+# Limite de parametros por query (SQLite antigo: 999)
+_IN_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_checkpoint (
+    entity       TEXT PRIMARY KEY,
+    fingerprint  TEXT NOT NULL,
+    last_chunk   INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    status       TEXT NOT NULL,
+    updated_at   TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS sync_record_hash (
+    entity       TEXT NOT NULL,
+    record_key   TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    pushed_at    TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (entity, record_key)
+);
+"""
+
+RUNNING = "running"
+DONE = "done"
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """
+    Hash do conteudo de um registo (JSON canonico: chaves ordenadas, sem espacos).
+    Igual entre runs enquanto o registo de origem nao mudar.
+    """
+    raw = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    entity: str
+    fingerprint: str
+    last_chunk: int  # ultimo chunk confirmado (-1 = nenhum)
+    total_chunks: int
+    status: str  # running | done
+    updated_at: str
+
+
+class CheckpointStore:
+    """
+    Estado duravel de um sync por chunks (SQLite).
+
+    Por entidade guarda:
+    - o ultimo chunk confirmado do run atual (+ fingerprint do input, para
+      so retomar quando o input e' o mesmo: mesmos registos, mesma ordem)
+    - o hash de conteudo de cada registo ja enviado com sucesso
+
+    Cada commit_chunk e' 1 transacao: hashes do chunk + avanco do checkpoint.
+
+    target: destino do sync (ex.: url/db do Odoo). O estado fica guardado por
+    destino, para o mesmo ficheiro nao saltar envios para outra instancia.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH, target: str = "") -> None:
+        self.path = path
+        self.target = target
+        self._prefix = f"{target}::" if target else ""
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "CheckpointStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _key(self, entity: str) -> str:
+        return self._prefix + entity
+
+    def get(self, entity: str) -> Optional[Checkpoint]:
+        row = self._conn.execute(
+            """
+            SELECT entity, fingerprint, last_chunk, total_chunks, status, updated_at
+            FROM sync_checkpoint
+            WHERE entity = ?
+            """,
+            (self._key(entity),),
+        ).fetchone()
+        return Checkpoint(entity, *row[1:]) if row else None
+
+    def start(self, entity: str, fingerprint: str, total_chunks: int) -> int:
+        """
+        Inicia (ou retoma) o sync de uma entidade; devolve o 1o chunk a processar.
+
+        - mesmo fingerprint e run interrompido -> last_chunk + 1
+        - mesmo fingerprint e run terminado    -> total_chunks (nada a fazer)
+        - input diferente                      -> 0 (os hashes por registo
+          continuam a evitar reenviar o que nao mudou)
+        """
+        cp = self.get(entity)
+        if cp is not None and cp.fingerprint == fingerprint:
+            return cp.total_chunks if cp.status == DONE else cp.last_chunk + 1
+
+        with self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO sync_checkpoint
+                    (entity, fingerprint, last_chunk, total_chunks, status, updated_at)
+                VALUES (?, ?, -1, ?, ?, datetime('now'))
+                ON CONFLICT (entity) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    last_chunk = -1,
+                    total_chunks = excluded.total_chunks,
+                    status = excluded.status,
+                    updated_at = excluded.updated_at
+                """,
+                (self._key(entity), fingerprint, total_chunks, RUNNING),
+            )
+        return 0
+
+    def commit_chunk(
+        self, entity: str, chunk_index: int, hashes: Dict[str, str]
+    ) -> None:
+        """Regista o chunk como enviado: hashes dos registos + checkpoint (atomico)."""
+        with self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO sync_record_hash (entity, record_key, content_hash, pushed_at)
+                VALUES (?, ?, ?, datetime('now'))
+                ON CONFLICT (entity, record_key) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    pushed_at = excluded.pushed_at
+                """,
+                [(self._key(entity), k, h) for k, h in hashes.items()],
+            )
+            self._conn.execute(
+                """
+                UPDATE sync_checkpoint
+                SET last_chunk = ?, updated_at = datetime('now')
+                WHERE entity = ?
+                """,
+                (chunk_index, self._key(entity)),
+            )
+
+    def finish(self, entity: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                """
+                UPDATE sync_checkpoint
+                SET status = ?, updated_at = datetime('now')
+                WHERE entity = ?
+                """,
+                (DONE, self._key(entity)),
+            )
+
+    def get_hashes(self, entity: str, keys: Iterable[str]) -> Dict[str, str]:
+        """Hashes ja enviados para estas chaves (chaves sem hash ficam de fora)."""
+        wanted: List[str] = list(keys)
+        out: Dict[str, str] = {}
+        for i in range(0, len(wanted), _IN_BATCH):
+            batch = wanted[i : i + _IN_BATCH]
+            marks = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"""
+                SELECT record_key, content_hash
+                FROM sync_record_hash
+                WHERE entity = ? AND record_key IN ({marks})
+                """,
+                [self._key(entity), *batch],
+            ).fetchall()
+            out.update(dict(rows))
+        return out
+
+    def reset(self, entity: Optional[str] = None) -> None:
+        """
+        Esquece checkpoints e hashes (de uma entidade ou de todas) deste
+        target: full resync. Sem target, entity=None limpa o ficheiro todo.
+        """
+        if entity is not None:
+            where, params = "entity = ?", [self._key(entity)]
+        elif self._prefix:
+            where, params = (
+                "substr(entity, 1, ?) = ?",
+                [len(self._prefix), self._prefix],
+            )
+        else:
+            where, params = "1 = 1", []
+        with self._conn:
+            self._conn.execute(f"DELETE FROM sync_checkpoint WHERE {where}", params)
+            self._conn.execute(f"DELETE FROM sync_record_hash WHERE {where}", params)
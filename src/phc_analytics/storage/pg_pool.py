@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import os
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+# Tamanho por defeito do pool partilhado (ENV sobrepoe)
+DEFAULT_MIN_SIZE = int(os.getenv("PHC_PG_POOL_MIN_SIZE", "1"))
+DEFAULT_MAX_SIZE = int(os.getenv("PHC_PG_POOL_MAX_SIZE", "5"))
+
+# Ligacoes paradas ha mais do que isto sao testadas (SELECT 1) antes de sair do pool
+DEFAULT_HEALTH_CHECK_AFTER_SECONDS = 30.0
+
+
+class PgPool:
+    """
+    Pool de ligacoes Postgres (psycopg2) thread-safe.
+
+    - min_size ligacoes abertas logo; ate max_size em simultaneo
+      (acima disso, connection() espera por uma livre ate `timeout_seconds`)
+    - health check: uma ligacao parada ha mais de
+      `health_check_after_seconds` faz SELECT 1 antes de ser entregue;
+      se falhar e' fechada e substituida por uma nova
+    - connection(): a ligacao volta ao pool com rollback do que nao foi
+      commitado (nunca fica uma transacao aberta no pool)
+    - transaction(): commit no fim do bloco, rollback se houver excecao;
+      permite juntar varios writes (ex: load + watermark) num so commit
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = DEFAULT_MIN_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+        health_check_after_seconds: float = DEFAULT_HEALTH_CHECK_AFTER_SECONDS,
+        timeout_seconds: Optional[float] = 30.0,
+        connect: Callable[[str], Any] = psycopg2.connect,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if min_size < 0:
+            raise ValueError("min_size must be >= 0")
+        if max_size <= 0 or max_size < min_size:
+            raise ValueError("max_size must be > 0 and >= min_size")
+        self.dsn = dsn
+        self.max_size = max_size
+        self._health_after = health_check_after_seconds
+        self._timeout = timeout_seconds
+        self._connect = connect
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle: List[Tuple[Any, float]] = []  # (conn, ultimo uso), LIFO
+        self._closed = False
+        self.connections_opened = 0
+        self.health_check_failures = 0
+        for _ in range(min_size):
+            self._idle.append((self._open(), self._clock()))
+
+    def _open(self) -> Any:
+        conn = self._connect(self.dsn)
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    @staticmethod
+    def _is_alive(conn: Any) -> bool:
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self) -> Any:
+        if self._closed:
+            raise RuntimeError("PgPool is closed")
+        if not self._slots.acquire(timeout=self._timeout):
+            raise RuntimeError(
+                f"Timed out waiting for a Postgres connection (max_size={self.max_size})"
+            )
+        try:
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+                if item is None:
+                    return self._open()
+                conn, last_used = item
+                idle_for = self._clock() - last_used
+                if not conn.closed and (
+                    idle_for < self._health_after or self._is_alive(conn)
+                ):
+                    return conn
+                with self._lock:
+                    self.health_check_failures += 1
+                _close_quietly(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn: Any) -> None:
+        try:
+            if conn.closed or self._closed:
+                _close_quietly(conn)
+                return
+            if (
+                conn.get_transaction_status()
+                != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+            ):
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    _close_quietly(conn)
+                    return
+            with self._lock:
+                self._idle.append((conn, self._clock()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Empresta uma ligacao; o que nao for commitado e' descartado (rollback)."""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Any]:
+        """Empresta uma ligacao numa transacao: commit no fim, rollback em erro."""
+        with self.connection() as conn:
+            try:
+                yield conn
+            except BaseException:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            conn.commit()
+
+    def healthcheck(self) -> bool:
+        """True se o Postgres responde (SELECT 1 numa ligacao do pool)."""
+        try:
+            with self.connection() as conn:
+                return self._is_alive(conn)
+        except psycopg2.Error:
+            return False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            idle = len(self._idle)
+        return {
+            "idle": idle,
+            "max_size": self.max_size,
+            "connections_opened": self.connections_opened,
+            "health_check_failures": self.health_check_failures,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+
+def _close_quietly(conn: Any) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+_POOLS: Dict[str, PgPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(dsn: str, **kwargs: Any) -> PgPool:
+    """
+    Pool partilhado pelo processo para este DSN (criado no 1o pedido).
+    kwargs (min_size, max_size, ...) so contam na criacao.
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(dsn)
+        if pool is None or pool._closed:
+            pool = PgPool(dsn, **kwargs)
+            _POOLS[dsn] = pool
+        return pool
+
+
+def close_all_pools() -> None:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
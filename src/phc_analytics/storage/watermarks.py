@@ -1,16 +1,58 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
 
-import psycopg2
 import psycopg2.extras
 
+from .pg_pool import PgPool, get_pool
+
+Timestamp = Union[str, datetime]
+
+# Datas "vazias" do PrestaShop/MySQL (date_upd nunca preenchido)
+_ZERO_DATES = frozenset({"0000-00-00 00:00:00", "0000-00-00"})
+
+
+def parse_ts(value: Optional[Timestamp]) -> Optional[datetime]:
+    """
+    Converte um timestamp (str ou datetime) num datetime com timezone (UTC).
+
+    Aceita:
+    - ISO 8601 com offset ou "Z"  ("2024-01-01T10:00:00+01:00", "...Z")
+    - formato PrestaShop/MySQL    ("2024-01-01 10:00:00"), sem timezone
+    - datetime (naive ou aware)
+
+    Sem timezone -> assume UTC (hora "de parede" da loja, como nos filtros
+    date_upd do PrestaShop). None / "" / data zero -> None.
+    Texto invalido -> ValueError.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        if not text or text in _ZERO_DATES:
+            return None
+        if text.endswith(("Z", "z")):
+            text = text[:-1] + "+00:00"
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            raise ValueError(f"Invalid timestamp: {value!r}") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
 
 @dataclass(frozen=True)
 class Watermark:
     entity_name: str
-    watermark_ts: str
+    watermark_ts: datetime  # timestamptz, sempre em UTC
+
+    def iso(self) -> str:
+        return self.watermark_ts.isoformat()
 
 
 class WatermarkManager:
@@ -20,40 +62,105 @@ class WatermarkManager:
     Regra:
     - watermark_ts representa o ultimo source_updated_at carregado com sucesso.
     - nunca usar now() como watermark; now() so serve para updated_at.
+    - so avanca: set/set_many nunca recuam um watermark (force=True para
+      backfills/replays deliberados).
+
+    Tabela: staging.etl_watermarks (sql/migrations/003_etl_watermarks.sql),
+    watermark_ts timestamptz; as escritas sao UPSERT (entidade nova -> insert).
+
+    Ligacoes: emprestadas do pool partilhado (storage.pg_pool). Passar `conn`
+    para correr na transacao de quem chama (ex: avancar o watermark no mesmo
+    commit do load); nesse caso nao ha commit aqui.
     """
 
-    def __init__(self, dsn: str):
+    def __init__(self, dsn: str, pool: Optional[PgPool] = None):
         self.dsn = dsn
+        self._pool = pool
+
+    @property
+    def pool(self) -> PgPool:
+        if self._pool is None:
+            self._pool = get_pool(self.dsn)
+        return self._pool
+
+    def get(self, entity_name: str, conn: Any = None) -> Optional[Watermark]:
+        return self.get_many([entity_name], conn=conn).get(entity_name)
+
+    def get_many(
+        self, entity_names: Iterable[str], conn: Any = None
+    ) -> Dict[str, Watermark]:
+        """Watermarks destas entidades numa so query (entidades sem linha ficam de fora)."""
+        names = list(entity_names)
+        if not names:
+            return {}
+        if conn is None:
+            with self.pool.connection() as own:
+                return self.get_many(names, conn=own)
+        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
+            cur.execute(
+                """
+                SELECT entity_name, watermark_ts
+                FROM staging.etl_watermarks
+                WHERE entity_name = ANY(%s)
+                """,
+                (names,),
+            )
+            rows = cur.fetchall()
+        return {
+            row["entity_name"]: Watermark(
+                entity_name=row["entity_name"],
+                watermark_ts=parse_ts(row["watermark_ts"]),
+            )
+            for row in rows
+        }
+
+    def set(
+        self,
+        entity_name: str,
+        new_ts: Timestamp,
+        conn: Any = None,
+        force: bool = False,
+    ) -> None:
+        self.set_many({entity_name: new_ts}, conn=conn, force=force)
+
+    def set_many(
+        self,
+        watermarks: Mapping[str, Optional[Timestamp]],
+        conn: Any = None,
+        force: bool = False,
+    ) -> None:
+        """
+        Avanca varias entidades num so statement (UPSERT via unnest).
+
+        - entidade sem linha -> criada
+        - valor None -> ignorado (nada carregado, watermark fica igual)
+        - valor mais antigo que o atual -> ignorado, salvo force=True
+        """
+        parsed = {
+            name: ts
+            for name, ts in ((n, parse_ts(v)) for n, v in watermarks.items())
+            if ts is not None
+        }
+        if not parsed:
+            return
+        if conn is None:
+            with self.pool.transaction() as own:
+                self.set_many(parsed, conn=own, force=force)
+            return
 
-    def get(self, entity_name: str) -> Optional[Watermark]:
-        with psycopg2.connect(self.dsn) as conn:
-            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-                cur.execute(
-                    """
-                    SELECT entity_name, watermark_ts
-                    FROM staging.etl_watermarks
-                    WHERE entity_name = %s
-                    """,
-                    (entity_name,),
-                )
-                row = cur.fetchone()
-                if not row:
-                    return None
-                return Watermark(
-                    entity_name=row["entity_name"],
-                    watermark_ts=str(row["watermark_ts"]),
-                )
-
-    def set(self, entity_name: str, new_ts: str) -> None:
-        with psycopg2.connect(self.dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    UPDATE staging.etl_watermarks
-                    SET watermark_ts = %s,
-                        updated_at = now()
-                    WHERE entity_name = %s
-                    """,
-                    (new_ts, entity_name),
-                )
-                conn.commit()
+        guard = "" if force else "WHERE EXCLUDED.watermark_ts > t.watermark_ts"
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                INSERT INTO staging.etl_watermarks AS t
+                    (entity_name, watermark_ts, updated_at)
+                SELECT v.entity_name, v.watermark_ts, now()
+                FROM unnest(%s::text[], %s::timestamptz[])
+                    AS v(entity_name, watermark_ts)
+                ON CONFLICT (entity_name) DO UPDATE SET
+                    watermark_ts = EXCLUDED.watermark_ts,
+                    updated_at = EXCLUDED.updated_at
+                {guard}
+                """,
+                (list(parsed), list(parsed.values())),
+            )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List
 
 
 def agg_sales_by_product(
@@ -22,7 +22,23 @@ def agg_sales_by_product(
     prod_by_key = {p["product_key"]: p for p in dim_product}
 
     agg: Dict[int, Dict[str, Any]] = {}
+    update_sales_by_product(agg, fact_order_lines, prod_by_key)
 
+    # return as list (optionally you can sort later)
+    return list(agg.values())
+
+
+def update_sales_by_product(
+    agg: Dict[int, Dict[str, Any]],
+    fact_order_lines: Iterable[Dict[str, Any]],
+    prod_by_key: Dict[int, Dict[str, Any]],
+) -> None:
+    """
+    Acumula fact_order_lines em agg (product_key -> linha do agregado).
+
+    Usado por agg_sales_by_product e pelo modo streaming do pipeline
+    (1 chamada por chunk, mesmo agg): as somas ficam iguais as do batch.
+    """
     for row in fact_order_lines:
         product_key = row["prestashop_product_id"]  # MVP: equals product_key in dim_product
 
@@ -39,6 +55,3 @@ def agg_sales_by_product(
 
         agg[product_key]["units_sold"] += float(row.get("quantity", 0) or 0)
         agg[product_key]["revenue"] += float(row.get("line_total", 0) or 0)
-
-    # return as list (optionally you can sort later)
-    return list(agg.values())
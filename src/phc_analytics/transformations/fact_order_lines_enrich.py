@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from typing import Dict, Any, List
-from datetime import datetime
+
+from ..utils.date_keys import to_date_key
 
 
 def enrich_order_lines(
@@ -32,9 +33,8 @@ def enrich_order_lines(
 
         order = orders_by_id[order_id]
 
-        # Build date key (YYYYMMDD)
-        created_at = order["created_at"]
-        date_key = int(datetime.fromisoformat(created_at).strftime("%Y%m%d"))
+        # Build date key (YYYYMMDD); cache por dia -> 1 parse por data distinta
+        date_key = to_date_key(order["created_at"])
 
         enriched.append(
             {
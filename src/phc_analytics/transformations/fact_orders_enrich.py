@@ -1,16 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime
 from typing import List, Dict, Any
 
-
-def to_date_key(dt: str) -> int:
-    """
-    Converte timestamp ISO (YYYY-MM-DDTHH:MM:SS)
-    para date_key no formato YYYYMMDD.
-    """
-    parsed = datetime.fromisoformat(dt)
-    return int(parsed.strftime("%Y%m%d"))
+from ..utils.date_keys import to_date_key  # cache por dia; mantido aqui (import antigo)
 
 
 def enrich_orders_with_date(orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import csv
+import os
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .agg_sales_by_product import update_sales_by_product
+from .dim_date import generate_dim_date
+from .fact_order_lines_enrich import enrich_order_lines
+from .fact_orders_enrich import enrich_orders_with_date
+from .prestashop_normalize import (
+    RawInput,
+    _raw_items,
+    normalize_order_lines,
+    normalize_orders,
+)
+from ..utils.date_keys import date_from_key
+
+# Rebuild incremental da gold layer (CSVs de run_pipeline.py) a partir das
+# orders alteradas (ex: ids carregados desde o ultimo watermark, lidos da
+# raw table com prestashop_to_raw.iter_changed_ids).
+#
+# - fact_orders / fact_order_lines: as linhas das orders alteradas saem, as
+#   novas versoes entram no fim; o resto do ficheiro e copiado tal como esta
+# - agg_sales_by_product: subtrai a contribuicao antiga e soma a nova
+# - dim_date: so alarga o intervalo se aparecerem datas novas
+#
+# Diferencas vs rebuild completo: as orders alteradas passam para o fim dos
+# facts, as somas podem diferir no ultimo digito (float) e dim_date nunca
+# encolhe. Um rebuild completo periodico volta a alinhar tudo.
+
+
+@dataclass
+class IncrementalResult:
+    """Resumo de um rebuild incremental."""
+
+    changed_orders: int
+    removed_orders: int
+    added_orders: int
+    removed_lines: int
+    added_lines: int
+    products_touched: int
+
+
+def _tmp(path: Path) -> Path:
+    return path.with_name(path.name + ".tmp")
+
+
+def _read_rows(path: Path) -> List[Dict[str, str]]:
+    if not path.exists():
+        return []
+    with path.open(newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _merge_fact_csv(
+    path: Path,
+    changed: Set[int],
+    new_rows: List[Dict[str, Any]],
+    count_key: Optional[str] = None,
+) -> Tuple[List[Dict[str, str]], Counter]:
+    """
+    Copia path -> path.tmp sem as linhas das orders em changed e acrescenta
+    new_rows (mesmas colunas e formato que write_csv).
+
+    Leitura/escrita linha a linha: memoria limitada as linhas alteradas.
+    Devolve as linhas removidas e, se count_key, quantas linhas mantidas
+    existem por valor dessa coluna.
+    """
+    ids = {str(i) for i in changed}  # como write_csv escreve os ids
+    removed: List[Dict[str, str]] = []
+    kept: Counter = Counter()
+    header: List[str] = []
+    tmp = _tmp(path)
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+
+    with tmp.open("w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        started = False  # header so com a 1a linha (sem linhas -> ficheiro vazio)
+
+        if path.exists():
+            with path.open(newline="", encoding="utf-8") as f:
+                # csv.reader/writer (listas): mesmo texto que o DictWriter
+                # original, bem mais rapido que DictReader em milhoes de linhas
+                reader = csv.reader(f)
+                header = next(reader, [])
+                id_col = header.index("prestashop_order_id") if header else 0
+                count_col = header.index(count_key) if header and count_key else None
+                for row in reader:
+                    if row[id_col] in ids:
+                        removed.append(dict(zip(header, row)))
+                        continue
+                    if not started:
+                        writer.writerow(header)
+                        started = True
+                    writer.writerow(row)
+                    if count_col is not None:
+                        kept[row[count_col]] += 1
+
+        if new_rows:
+            fieldnames = list(new_rows[0].keys())
+            if header and fieldnames != header:
+                raise ValueError(
+                    f"{path.name}: columns changed ({header} -> {fieldnames}), "
+                    "run a full build"
+                )
+            if not started:
+                writer.writerow(fieldnames)
+            csv.DictWriter(out, fieldnames=fieldnames).writerows(new_rows)
+
+    return removed, Counter({int(k): n for k, n in kept.items()})
+
+
+def _merge_agg(
+    path: Path,
+    removed_lines: List[Dict[str, str]],
+    new_lines: List[Dict[str, Any]],
+    kept_lines: Counter,
+    prod_by_key: Dict[int, Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], int]:
+    """agg_sales_by_product antigo - linhas removidas + linhas novas."""
+    agg: Dict[int, Dict[str, Any]] = {}
+    for row in _read_rows(path):
+        key = int(row["product_key"])
+        agg[key] = {
+            "product_key": key,
+            "product_name": row["product_name"],
+            "units_sold": float(row["units_sold"]),
+            "revenue": float(row["revenue"]),
+        }
+
+    # write_csv escreve None como "" -> conta como 0, como no += do agregado
+    for row in removed_lines:
+        entry = agg.get(int(row["prestashop_product_id"]))
+        if entry is not None:
+            entry["units_sold"] -= float(row["quantity"] or 0)
+            entry["revenue"] -= float(row["line_total"] or 0)
+
+    update_sales_by_product(agg, new_lines, prod_by_key)
+
+    touched = {int(r["prestashop_product_id"]) for r in removed_lines}
+    touched.update(r["prestashop_product_id"] for r in new_lines)
+    still_sold = kept_lines + Counter(r["prestashop_product_id"] for r in new_lines)
+    for key in touched:
+        if not still_sold[key]:
+            agg.pop(key, None)  # produto deixou de ter linhas (como no batch)
+
+    for key, entry in agg.items():
+        if key in prod_by_key:
+            entry["product_name"] = prod_by_key[key].get("name")
+
+    return list(agg.values()), len(touched)
+
+
+def _merge_dim_date(path: Path, new_keys: List[int]) -> Optional[List[Dict[str, Any]]]:
+    """dim_date alargada as novas datas, ou None se ja as cobre."""
+    if not new_keys:
+        return None
+    lo, hi = date_from_key(min(new_keys)), date_from_key(max(new_keys))
+
+    existing = _read_rows(path)
+    if existing:
+        first = date.fromisoformat(existing[0]["date"])
+        last = date.fromisoformat(existing[-1]["date"])
+        if first <= lo and hi <= last:
+            return None
+        lo, hi = min(lo, first), max(hi, last)
+    return generate_dim_date(lo, hi)
+
+
+def _write_rows(path: Path, rows: List[Dict[str, Any]]) -> None:
+    """write_csv para path.tmp (header da 1a linha; vazio se nao ha linhas)."""
+    tmp = _tmp(path)
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+    if not rows:
+        tmp.write_text("")
+        return
+    with tmp.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        w.writeheader()
+        w.writerows(rows)
+
+
+def rebuild_gold_incremental(
+    out_dir: Path,
+    changed_order_ids: Iterable[Any],
+    raw_orders: RawInput,
+    dim_product: List[Dict[str, Any]],
+) -> IncrementalResult:
+    """
+    Atualiza fact_orders, fact_order_lines, agg_sales_by_product e dim_date
+    em out_dir so para as orders em changed_order_ids.
+
+    raw_orders: payload/items com (pelo menos) a versao atual das orders
+    alteradas; as restantes sao ignoradas. Um id alterado que nao aparece em
+    raw_orders e tratado como order removida.
+    dim_product: dimensao atual (nomes no agregado, produtos validos).
+
+    Os ficheiros novos sao escritos em *.tmp e so substituem os antigos
+    (os.replace) depois de todos estarem prontos. So sao publicados os *.tmp
+    escritos nesta chamada; restos de um run interrompido sao apagados.
+    """
+    changed = {int(i) for i in changed_order_ids}
+
+    selected = [
+        o
+        for o in _raw_items(raw_orders, "orders")
+        if o.get("prestashop_order_id") is not None
+        and int(o["prestashop_order_id"]) in changed
+    ]
+    orders_silver = normalize_orders(selected)
+    fact_orders = enrich_orders_with_date(orders_silver)
+    fact_order_lines = enrich_order_lines(
+        normalize_order_lines(selected), orders_silver
+    )
+    prod_by_key = {p["product_key"]: p for p in dim_product}
+
+    out_dir = Path(out_dir)
+    orders_path = out_dir / "fact_orders.csv"
+    lines_path = out_dir / "fact_order_lines.csv"
+    agg_path = out_dir / "agg_sales_by_product.csv"
+    date_path = out_dir / "dim_date.csv"
+    if not orders_path.exists():
+        raise RuntimeError(f"{orders_path} not found: run a full build first")
+    for path in (orders_path, lines_path, agg_path, date_path):
+        _tmp(path).unlink(missing_ok=True)
+
+    written = [orders_path, lines_path, agg_path]
+    removed_orders, _ = _merge_fact_csv(orders_path, changed, fact_orders)
+    removed_lines, kept_lines = _merge_fact_csv(
+        lines_path, changed, fact_order_lines, count_key="prestashop_product_id"
+    )
+    agg, touched = _merge_agg(
+        agg_path, removed_lines, fact_order_lines, kept_lines, prod_by_key
+    )
+    _write_rows(agg_path, agg)
+    dim_date = _merge_dim_date(date_path, [o["order_date_key"] for o in fact_orders])
+    if dim_date is not None:
+        _write_rows(date_path, dim_date)
+        written.append(date_path)
+
+    for path in written:
+        os.replace(_tmp(path), path)
+
+    return IncrementalResult(
+        changed_orders=len(changed),
+        removed_orders=len(removed_orders),
+        added_orders=len(fact_orders),
+        removed_lines=len(removed_lines),
+        added_lines=len(fact_order_lines),
+        products_touched=touched,
+    )
@@ -1,16 +1,36 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Union
 
 
 class DataValidationError(Exception):
     """
     Erro levantado quando os dados nao cumprem o Data Contract.
+
+    rows: indices (posicao no input) de todas as linhas invalidas, quando
+    conhecidos (validacao vetorizada, prestashop_normalize_df); vazio no
+    caminho linha a linha, que para na primeira.
     """
-    pass
 
+    def __init__(self, message: str, rows: Sequence[int] = ()) -> None:
+        super().__init__(message)
+        self.rows: List[int] = list(rows)
+
+
+# Payload completo ({"orders": [...]}) ou os items ja extraidos
+# (ex: gerador PrestaShopClient.stream_items -> memoria limitada a 1 item)
+RawInput = Union[Mapping[str, Any], Iterable[Dict[str, Any]]]
+
+
+def _raw_items(raw: RawInput, key: str) -> Iterable[Dict[str, Any]]:
+    if isinstance(raw, Mapping):
+        if key not in raw:
+            raise DataValidationError(f"Missing '{key}' key in raw data")
+        return raw[key]
+    return raw
 
-def normalize_customers(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+
+def iter_normalized_customers(raw: RawInput) -> Iterator[Dict[str, Any]]:
     """
     Normaliza Customers vindos do PrestaShop.
 
@@ -19,15 +39,12 @@ def normalize_customers(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
         "customers": [ {...}, {...} ]
     }
 
+    ou os items diretamente (lista/gerador, ex: stream_items("customers")).
+
     Output:
-    Lista de customers normalizados (1 dict por customer).
+    Gera customers normalizados (1 dict por customer), sem materializar a lista.
     """
-    if "customers" not in raw:
-        raise DataValidationError("Missing 'customers' key in raw data")
-
-    normalized: List[Dict[str, Any]] = []
-
-    for c in raw["customers"]:
+    for c in _raw_items(raw, "customers"):
         prestashop_customer_id = c.get("prestashop_customer_id")
         email = c.get("email")
 
@@ -36,22 +53,18 @@ def normalize_customers(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
         if not email:
             raise DataValidationError("Customer missing email")
 
-        normalized.append(
-            {
-                "prestashop_customer_id": int(prestashop_customer_id),
-                "email": str(email).lower(),
-                "firstname": c.get("firstname"),
-                "lastname": c.get("lastname"),
-                "active": bool(c.get("active", True)),
-                "created_at": c.get("created_at"),
-                "updated_at": c.get("updated_at"),
-            }
-        )
-
-    return normalized
+        yield {
+            "prestashop_customer_id": int(prestashop_customer_id),
+            "email": str(email).lower(),
+            "firstname": c.get("firstname"),
+            "lastname": c.get("lastname"),
+            "active": bool(c.get("active", True)),
+            "created_at": c.get("created_at"),
+            "updated_at": c.get("updated_at"),
+        }
 
 
-def normalize_products(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def iter_normalized_products(raw: RawInput) -> Iterator[Dict[str, Any]]:
     """
     Normaliza Products vindos do PrestaShop.
 
@@ -60,15 +73,12 @@ def normalize_products(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
         "products": [ {...}, {...} ]
     }
 
+    ou os items diretamente (lista/gerador, ex: stream_items("products")).
+
     Output:
-    Lista de produtos normalizados (1 dict por produto).
+    Gera produtos normalizados (1 dict por produto), sem materializar a lista.
     """
-    if "products" not in raw:
-        raise DataValidationError("Missing 'products' key in raw data")
-
-    normalized: List[Dict[str, Any]] = []
-
-    for p in raw["products"]:
+    for p in _raw_items(raw, "products"):
         prestashop_product_id = p.get("prestashop_product_id")
         name = p.get("name")
 
@@ -77,23 +87,19 @@ def normalize_products(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
         if not name:
             raise DataValidationError("Product missing name")
 
-        normalized.append(
-            {
-                "prestashop_product_id": int(prestashop_product_id),
-                "sku": p.get("sku"),
-                "name": str(name),
-                "active": bool(p.get("active", True)),
-                "price": float(p.get("price")) if p.get("price") is not None else None,
-                "currency": p.get("currency"),
-                "created_at": p.get("created_at"),
-                "updated_at": p.get("updated_at"),
-            }
-        )
+        yield {
+            "prestashop_product_id": int(prestashop_product_id),
+            "sku": p.get("sku"),
+            "name": str(name),
+            "active": bool(p.get("active", True)),
+            "price": float(p.get("price")) if p.get("price") is not None else None,
+            "currency": p.get("currency"),
+            "created_at": p.get("created_at"),
+            "updated_at": p.get("updated_at"),
+        }
 
-    return normalized
 
-
-def normalize_orders(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def iter_normalized_orders(raw: RawInput) -> Iterator[Dict[str, Any]]:
     """
     Normaliza Order Headers vindos do PrestaShop.
 
@@ -102,15 +108,12 @@ def normalize_orders(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
         "orders": [ {...}, {...} ]
     }
 
+    ou os items diretamente (lista/gerador, ex: stream_items("orders")).
+
     Output:
-    Lista de orders normalizadas (1 dict por encomenda).
+    Gera orders normalizadas (1 dict por encomenda), sem materializar a lista.
     """
-    if "orders" not in raw:
-        raise DataValidationError("Missing 'orders' key in raw data")
-
-    normalized: List[Dict[str, Any]] = []
-
-    for o in raw["orders"]:
+    for o in _raw_items(raw, "orders"):
         prestashop_order_id = o.get("prestashop_order_id")
         prestashop_customer_id = o.get("prestashop_customer_id")
         status = o.get("status")
@@ -125,22 +128,18 @@ def normalize_orders(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
         if not created_at:
             raise DataValidationError("Order missing created_at")
 
-        normalized.append(
-            {
-                "prestashop_order_id": int(prestashop_order_id),
-                "prestashop_customer_id": int(prestashop_customer_id),
-                "status": str(status),
-                "total_paid": float(o.get("total_paid", 0)),
-                "currency": o.get("currency"),
-                "created_at": created_at,
-                "updated_at": o.get("updated_at"),
-            }
-        )
-
-    return normalized
+        yield {
+            "prestashop_order_id": int(prestashop_order_id),
+            "prestashop_customer_id": int(prestashop_customer_id),
+            "status": str(status),
+            "total_paid": float(o.get("total_paid", 0)),
+            "currency": o.get("currency"),
+            "created_at": created_at,
+            "updated_at": o.get("updated_at"),
+        }
 
 
-def normalize_order_lines(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+def iter_normalized_order_lines(raw: RawInput) -> Iterator[Dict[str, Any]]:
     """
     Normaliza Order Lines vindas do PrestaShop.
 
@@ -154,15 +153,12 @@ def normalize_order_lines(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
         ]
     }
 
+    ou as orders diretamente (lista/gerador).
+
     Output:
-    Lista de linhas normalizadas (1 dict por linha).
+    Gera linhas normalizadas (1 dict por linha), sem materializar a lista.
     """
-    if "orders" not in raw:
-        raise DataValidationError("Missing 'orders' key in raw data")
-
-    normalized: List[Dict[str, Any]] = []
-
-    for o in raw["orders"]:
+    for o in _raw_items(raw, "orders"):
         prestashop_order_id = o.get("prestashop_order_id")
         if prestashop_order_id is None:
             raise DataValidationError("Order missing prestashop_order_id (for lines)")
@@ -177,14 +173,30 @@ def normalize_order_lines(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
             if quantity is None:
                 raise DataValidationError("Order line missing quantity")
 
-            normalized.append(
-                {
-                    "prestashop_order_id": int(prestashop_order_id),
-                    "prestashop_product_id": int(prestashop_product_id),
-                    "quantity": float(quantity),
-                    "unit_price": float(line.get("unit_price")) if line.get("unit_price") is not None else None,
-                    "line_total": float(line.get("line_total")) if line.get("line_total") is not None else None,
-                }
-            )
-
-    return normalized
+            yield {
+                "prestashop_order_id": int(prestashop_order_id),
+                "prestashop_product_id": int(prestashop_product_id),
+                "quantity": float(quantity),
+                "unit_price": float(line.get("unit_price")) if line.get("unit_price") is not None else None,
+                "line_total": float(line.get("line_total")) if line.get("line_total") is not None else None,
+            }
+
+
+def normalize_customers(raw: RawInput) -> List[Dict[str, Any]]:
+    """Lista de customers normalizados (ver iter_normalized_customers)."""
+    return list(iter_normalized_customers(raw))
+
+
+def normalize_products(raw: RawInput) -> List[Dict[str, Any]]:
+    """Lista de produtos normalizados (ver iter_normalized_products)."""
+    return list(iter_normalized_products(raw))
+
+
+def normalize_orders(raw: RawInput) -> List[Dict[str, Any]]:
+    """Lista de orders normalizadas (ver iter_normalized_orders)."""
+    return list(iter_normalized_orders(raw))
+
+
+def normalize_order_lines(raw: RawInput) -> List[Dict[str, Any]]:
+    """Lista de linhas normalizadas (ver iter_normalized_order_lines)."""
+    return list(iter_normalized_order_lines(raw))
@@ -0,0 +1,456 @@
+from __future__ import annotations
+
+from itertools import chain
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+
+from .prestashop_normalize import DataValidationError, RawInput, _raw_items
+
+# Input: o mesmo dos normalize_* (payload / lista / gerador) ou uma tabela
+# ja colunar (pyarrow.Table, ex: Parquet / JSONL lido com pyarrow, ou
+# pandas.DataFrame), 1 linha por item; nas orders, "lines" e' uma coluna
+# de listas.
+FrameInput = Union[RawInput, pa.Table, pd.DataFrame]
+
+# Quantos indices mostrar na mensagem de erro (todos ficam em err.rows)
+_ROWS_IN_MESSAGE = 10
+
+STRING = pd.StringDtype()
+
+_CUSTOMER_FIELDS = (
+    "prestashop_customer_id",
+    "email",
+    "firstname",
+    "lastname",
+    "active",
+    "created_at",
+    "updated_at",
+)
+_PRODUCT_FIELDS = (
+    "prestashop_product_id",
+    "sku",
+    "name",
+    "active",
+    "price",
+    "currency",
+    "created_at",
+    "updated_at",
+)
+_ORDER_FIELDS = (
+    "prestashop_order_id",
+    "prestashop_customer_id",
+    "status",
+    "total_paid",
+    "currency",
+    "created_at",
+    "updated_at",
+)
+_LINE_FIELDS = ("prestashop_product_id", "quantity", "unit_price", "line_total")
+
+
+class _Columns:
+    """
+    Colunas (numpy) de um lote de items, carregadas 1 so vez.
+
+    - items Python: 1 array object por campo pedido (sem DataFrame
+      intermedio: o custo e' 1 dict.get por campo)
+    - Arrow / DataFrame: arrays ja tipados, sem passar por objetos Python;
+      com Arrow os nulos e os casts numericos correm em pyarrow.compute e
+      so as colunas copiadas tal como vem passam a numpy
+
+    Com items Python distingue-se chave ausente de valor None (absent());
+    com input colunar nao ha essa diferenca (nulo = ausente).
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, Union[np.ndarray, pa.ChunkedArray]],
+        n: int,
+        items: Optional[List[Any]],
+    ) -> None:
+        self._columns = columns
+        self.n = n
+        self._items = items
+
+    @classmethod
+    def from_items(cls, items: List[Any], fields: Sequence[str]) -> "_Columns":
+        """
+        1 passagem pelos items com itemgetter para os campos que o 1o item
+        tem (items do mesmo endpoint tem quase sempre as mesmas chaves);
+        .get por item so para os restantes ou se faltar alguma chave.
+        """
+        first = items[0] if items else {}
+        common = [name for name in fields if name in first]
+        columns: Dict[str, Union[np.ndarray, pa.ChunkedArray]] = {}
+        if len(common) == 1:
+            name = common[0]
+            col = np.empty(len(items), dtype=object)
+            col[:] = [it.get(name) for it in items]
+            columns[name] = col
+        elif common:
+            get = itemgetter(*common)
+            try:
+                rows = [get(it) for it in items]
+            except KeyError:
+                rows = [tuple(it.get(name) for name in common) for it in items]
+            table = np.empty((len(rows), len(common)), dtype=object)
+            try:
+                table[:] = rows
+            except ValueError:
+                # valores que sao listas: numpy tentaria criar mais 1 dimensao
+                for k in range(len(common)):
+                    table[:, k] = [row[k] for row in rows]
+            columns.update((name, table[:, k]) for k, name in enumerate(common))
+        for name in fields:
+            if name not in columns:
+                col = np.empty(len(items), dtype=object)
+                col[:] = [it.get(name) for it in items]
+                columns[name] = col
+        return cls(columns, len(items), items)
+
+    @classmethod
+    def from_table(
+        cls, table: Union[pa.Table, pd.DataFrame], fields: Iterable[str]
+    ) -> "_Columns":
+        """So os campos pedidos (ex: "lines" das orders nao e' convertido)."""
+        if isinstance(table, pa.Table):
+            columns: Dict[str, Union[np.ndarray, pa.ChunkedArray]] = {
+                name: table.column(name)
+                for name in fields
+                if name in table.column_names
+            }
+            return cls(columns, table.num_rows, None)
+        columns = {name: table[name].to_numpy() for name in fields if name in table}
+        return cls(columns, len(table), None)
+
+    def get(self, name: str) -> np.ndarray:
+        col = self._columns.get(name)
+        if col is None:
+            return np.full(self.n, None, dtype=object)
+        if isinstance(col, pa.ChunkedArray):
+            col = self._columns[name] = col.to_numpy(zero_copy_only=False)
+        return col
+
+    def arrow(self, name: str) -> Optional[pa.ChunkedArray]:
+        """A coluna Arrow original (None se o input nao for Arrow)."""
+        col = self._columns.get(name)
+        return col if isinstance(col, pa.ChunkedArray) else None
+
+    def isna(self, name: str) -> np.ndarray:
+        col = self._columns.get(name)
+        if isinstance(col, pa.ChunkedArray):
+            return col.is_null().to_numpy(zero_copy_only=False)
+        return pd.isna(self.get(name))
+
+    def falsy(self, name: str) -> np.ndarray:
+        """`not value` (None, "", 0) por linha."""
+        arrow = self.arrow(name)
+        if arrow is not None and pa.types.is_string(arrow.type):
+            empty = pc.or_kleene(arrow.is_null(), pc.equal(pc.utf8_length(arrow), 0))
+            return empty.to_numpy(zero_copy_only=False)
+        col = self.get(name)
+        na = pd.isna(col)
+        return na | ~np.where(na, True, col).astype(bool)
+
+    def as_float(self, name: str) -> Optional[np.ndarray]:
+        """Cast direto para float64 (nulo -> NaN); None se houver valores invalidos."""
+        col = self._columns.get(name)
+        try:
+            if isinstance(col, pa.ChunkedArray):
+                return pc.cast(col, pa.float64()).to_numpy(zero_copy_only=False)
+            return self.get(name).astype("float64")
+        except (TypeError, ValueError, pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return None
+
+    def absent(self, name: str) -> np.ndarray:
+        """Linhas sem a chave `name` (item.get(name, default) -> default)."""
+        na = self.isna(name)
+        if self._items is None or not na.any():
+            return na
+        out = na.copy()
+        for i in np.flatnonzero(na):
+            out[i] = name not in self._items[i]
+        return out
+
+
+def _load(raw: FrameInput, key: str, fields: Sequence[str]) -> _Columns:
+    if isinstance(raw, (pa.Table, pd.DataFrame)):
+        return _Columns.from_table(raw, fields)
+    return _Columns.from_items(list(_raw_items(raw, key)), fields)
+
+
+class _Problems:
+    """Junta todas as falhas do contrato (mensagem + indices) antes de levantar."""
+
+    def __init__(self) -> None:
+        self._found: List[Tuple[str, np.ndarray]] = []
+
+    def check(self, message: str, bad: np.ndarray) -> None:
+        rows = np.flatnonzero(bad)
+        if len(rows):
+            self._found.append((message, rows))
+
+    def required(self, cols: _Columns, name: str, message: str) -> None:
+        """`value is None` -> falha."""
+        self.check(message, cols.isna(name))
+
+    def truthy(self, cols: _Columns, name: str, message: str) -> None:
+        """`not value` (None, "", 0) -> falha."""
+        self.check(message, cols.falsy(name))
+
+    def raise_if_any(self) -> None:
+        if not self._found:
+            return
+        parts = []
+        for message, rows in self._found:
+            shown = ", ".join(str(i) for i in rows[:_ROWS_IN_MESSAGE])
+            more = len(rows) - _ROWS_IN_MESSAGE
+            suffix = f", ... +{more} more" if more > 0 else ""
+            parts.append(f"{message} (rows [{shown}{suffix}])")
+        all_rows = np.unique(np.concatenate([rows for _, rows in self._found]))
+        raise DataValidationError("; ".join(parts), rows=all_rows.tolist())
+
+
+def _numeric(problems: _Problems, cols: _Columns, name: str, label: str) -> np.ndarray:
+    """float(value) vetorizado (None -> NaN); texto nao numerico -> falha."""
+    num = cols.as_float(name)
+    if num is not None:
+        return num
+    col = cols.get(name)
+    num = pd.to_numeric(pd.Series(col), errors="coerce").to_numpy("float64")
+    problems.check(f"{label} has non-numeric {name}", ~pd.isna(col) & np.isnan(num))
+    return num
+
+
+def _as_int(num: np.ndarray) -> np.ndarray:
+    # int(value): trunca decimais como o caminho linha a linha
+    return np.nan_to_num(num).astype("int64")
+
+
+def _as_str(cols: _Columns, name: str) -> pd.Series:
+    """str(value) -> coluna string (Arrow: cast em pyarrow, sem objetos Python)."""
+    arrow = cols.arrow(name)
+    if arrow is not None:
+        return pd.Series(pd.arrays.ArrowStringArray(pc.cast(arrow, pa.string())))
+    return pd.Series(cols.get(name), dtype=object).astype(str).astype(STRING)
+
+
+def _passthrough(cols: _Columns, name: str) -> Union[np.ndarray, pd.Series]:
+    """Coluna tal como vem; ausente/NaN -> None (texto Arrow fica em Arrow)."""
+    arrow = cols.arrow(name)
+    if arrow is not None and pa.types.is_string(arrow.type):
+        return pd.Series(pd.arrays.ArrowStringArray(arrow))
+    col = cols.get(name).astype(object)
+    col[pd.isna(col)] = None
+    return col
+
+
+def _flag(cols: _Columns, name: str, default: bool) -> np.ndarray:
+    """bool(item.get(name, default)) vetorizado."""
+    col = cols.get(name)
+    na = pd.isna(col)
+    out = np.where(na, False, col).astype(bool)
+    out[cols.absent(name)] = default
+    return out
+
+
+def normalize_customers_df(raw: FrameInput) -> pd.DataFrame:
+    """
+    Versao colunar de normalize_customers (mesmo contrato, mesmo output).
+
+    Valida todas as linhas de uma vez: DataValidationError com todas as
+    falhas e os indices das linhas (err.rows), em vez de parar na 1a.
+
+    Colunas tipadas: prestashop_customer_id int64, email string,
+    active bool; as restantes passam tal como vem (object, None se faltar).
+    """
+    cols = _load(raw, "customers", _CUSTOMER_FIELDS)
+    problems = _Problems()
+    problems.required(
+        cols, "prestashop_customer_id", "Customer missing prestashop_customer_id"
+    )
+    problems.truthy(cols, "email", "Customer missing email")
+    ids = _numeric(problems, cols, "prestashop_customer_id", "Customer")
+    problems.raise_if_any()
+
+    return pd.DataFrame(
+        {
+            "prestashop_customer_id": _as_int(ids),
+            "email": _as_str(cols, "email").str.lower(),
+            "firstname": _passthrough(cols, "firstname"),
+            "lastname": _passthrough(cols, "lastname"),
+            "active": _flag(cols, "active", True),
+            "created_at": _passthrough(cols, "created_at"),
+            "updated_at": _passthrough(cols, "updated_at"),
+        }
+    )
+
+
+def normalize_products_df(raw: FrameInput) -> pd.DataFrame:
+    """
+    Versao colunar de normalize_products (ver normalize_customers_df).
+
+    Colunas tipadas: prestashop_product_id int64, name string, active bool,
+    price float64 (NaN quando nao vem preco).
+    """
+    cols = _load(raw, "products", _PRODUCT_FIELDS)
+    problems = _Problems()
+    problems.required(
+        cols, "prestashop_product_id", "Product missing prestashop_product_id"
+    )
+    problems.truthy(cols, "name", "Product missing name")
+    ids = _numeric(problems, cols, "prestashop_product_id", "Product")
+    price = _numeric(problems, cols, "price", "Product")
+    problems.raise_if_any()
+
+    return pd.DataFrame(
+        {
+            "prestashop_product_id": _as_int(ids),
+            "sku": _passthrough(cols, "sku"),
+            "name": _as_str(cols, "name"),
+            "active": _flag(cols, "active", True),
+            "price": price,
+            "currency": _passthrough(cols, "currency"),
+            "created_at": _passthrough(cols, "created_at"),
+            "updated_at": _passthrough(cols, "updated_at"),
+        }
+    )
+
+
+def normalize_orders_df(raw: FrameInput) -> pd.DataFrame:
+    """
+    Versao colunar de normalize_orders (ver normalize_customers_df).
+
+    Colunas tipadas: ids int64, status string, total_paid float64
+    (0.0 quando a chave nao vem, como no caminho linha a linha).
+    """
+    cols = _load(raw, "orders", _ORDER_FIELDS)
+    problems = _Problems()
+    problems.required(cols, "prestashop_order_id", "Order missing prestashop_order_id")
+    problems.required(
+        cols, "prestashop_customer_id", "Order missing prestashop_customer_id"
+    )
+    problems.truthy(cols, "status", "Order missing status")
+    problems.truthy(cols, "created_at", "Order missing created_at")
+    order_ids = _numeric(problems, cols, "prestashop_order_id", "Order")
+    customer_ids = _numeric(problems, cols, "prestashop_customer_id", "Order")
+    total_paid = _numeric(problems, cols, "total_paid", "Order")
+    problems.check(
+        "Order has null total_paid",
+        cols.isna("total_paid") & ~cols.absent("total_paid"),
+    )
+    problems.raise_if_any()
+
+    return pd.DataFrame(
+        {
+            "prestashop_order_id": _as_int(order_ids),
+            "prestashop_customer_id": _as_int(customer_ids),
+            "status": _as_str(cols, "status"),
+            "total_paid": np.nan_to_num(total_paid),
+            "currency": _passthrough(cols, "currency"),
+            "created_at": _passthrough(cols, "created_at"),
+            "updated_at": _passthrough(cols, "updated_at"),
+        }
+    )
+
+
+def _load_lines(raw: FrameInput) -> Tuple[_Columns, _Columns, np.ndarray]:
+    """
+    (colunas das orders, colunas das linhas achatadas, posicao da order de
+    cada linha). Arrow: list_flatten/list_parent_indices, sem objetos Python.
+    """
+    if isinstance(raw, pd.DataFrame):
+        raw = pa.Table.from_pandas(raw, preserve_index=False)
+    if isinstance(raw, pa.Table):
+        orders = _Columns.from_table(raw, ("prestashop_order_id",))
+        if "lines" not in raw.column_names:
+            return orders, _Columns({}, 0, None), np.empty(0, dtype="int64")
+        nested = raw.column("lines").combine_chunks()
+        flat = pc.list_flatten(nested)
+        parents = pc.list_parent_indices(nested).to_numpy()
+        lines = (
+            pa.Table.from_batches([pa.RecordBatch.from_struct_array(flat)])
+            if len(flat)
+            else pa.table({})
+        )
+        return orders, _Columns.from_table(lines, _LINE_FIELDS), parents
+
+    items = list(_raw_items(raw, "orders"))
+    orders = _Columns.from_items(items, ("prestashop_order_id",))
+    nested = [o.get("lines") or () for o in items]
+    flat = list(chain.from_iterable(nested))
+    parents = np.repeat(np.arange(len(items)), [len(ls) for ls in nested])
+    return orders, _Columns.from_items(flat, _LINE_FIELDS), parents
+
+
+def normalize_order_lines_df(raw: FrameInput) -> pd.DataFrame:
+    """
+    Versao colunar de normalize_order_lines (ver normalize_customers_df).
+
+    As linhas de todas as orders sao achatadas numa so tabela; os indices
+    em err.rows sao posicoes nessa tabela (ordem do input). Erros nas
+    orders (sem prestashop_order_id) referem indices de orders.
+
+    Colunas tipadas: ids int64, quantity/unit_price/line_total float64.
+    """
+    orders, lines, parents = _load_lines(raw)
+    problems = _Problems()
+    problems.required(
+        orders,
+        "prestashop_order_id",
+        "Order missing prestashop_order_id (for lines)",
+    )
+    order_ids = _numeric(problems, orders, "prestashop_order_id", "Order")
+    problems.raise_if_any()
+
+    problems.required(
+        lines, "prestashop_product_id", "Order line missing prestashop_product_id"
+    )
+    problems.required(lines, "quantity", "Order line missing quantity")
+    product_ids = _numeric(problems, lines, "prestashop_product_id", "Order line")
+    quantity = _numeric(problems, lines, "quantity", "Order line")
+    unit_price = _numeric(problems, lines, "unit_price", "Order line")
+    line_total = _numeric(problems, lines, "line_total", "Order line")
+    problems.raise_if_any()
+
+    return pd.DataFrame(
+        {
+            "prestashop_order_id": _as_int(order_ids)[parents],
+            "prestashop_product_id": _as_int(product_ids),
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "line_total": line_total,
+        }
+    )
+
+
+def read_table(path: Union[str, Path]) -> pa.Table:
+    """
+    Le items raw de um ficheiro direto para Arrow (sem dicts Python):
+    .parquet -> pyarrow.parquet; .jsonl / .ndjson / .json (1 item por linha)
+    -> pyarrow.json. O resultado serve de input aos normalize_*_df.
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pq.read_table(path)
+    if path.suffix in (".jsonl", ".ndjson", ".json"):
+        return pa_json.read_json(path)
+    raise ValueError(f"Unsupported raw file format: {path.suffix}")
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    DataFrame -> lista de dicts com tipos Python (NaN/NA -> None).
+
+    Mesmo formato que os normalize_* linha a linha devolvem.
+    """
+    obj = df.astype(object)
+    return obj.where(df.notna(), None).to_dict("records")
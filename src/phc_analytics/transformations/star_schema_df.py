@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from ..utils.date_keys import to_date_keys
+
+# Gold layer (star schema) em DataFrames: versao colunar de build_dim_customer,
+# build_dim_product, enrich_orders_with_date, enrich_order_lines e
+# agg_sales_by_product. Input: silver de prestashop_normalize_df. Output: as
+# mesmas linhas/colunas/valores que as funcoes linha a linha (CSV identico).
+
+
+def _as_text(s: pd.Series) -> pd.Series:
+    """str(value) como numa f-string: None/NA -> "None"."""
+    obj = s.astype(object)
+    return obj.where(s.notna(), None).astype(str)
+
+
+def _column(df: pd.DataFrame, name: str, default: object) -> pd.Series:
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def build_dim_customer_df(customers: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build dim_customer (analytics dimension).
+
+    1 row per customer.
+    customer_key = surrogate key (MVP: equals prestashop_customer_id)
+    """
+    ids = customers["prestashop_customer_id"]
+    full_name = (
+        _as_text(_column(customers, "firstname", ""))
+        + " "
+        + _as_text(_column(customers, "lastname", ""))
+    ).str.strip()
+    return pd.DataFrame(
+        {
+            "customer_key": ids,
+            "prestashop_customer_id": ids,
+            "email": _column(customers, "email", None),
+            "full_name": full_name,
+            "active": _column(customers, "active", True),
+        }
+    ).reset_index(drop=True)
+
+
+def build_dim_product_df(products: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build dim_product (analytics dimension).
+
+    1 row per product.
+    product_key = surrogate key (MVP: equals prestashop_product_id)
+    """
+    ids = products["prestashop_product_id"]
+    return pd.DataFrame(
+        {
+            "product_key": ids,
+            "prestashop_product_id": ids,
+            "sku": _column(products, "sku", None),
+            "name": _column(products, "name", None),
+            "active": _column(products, "active", True),
+        }
+    ).reset_index(drop=True)
+
+
+def enrich_orders_with_date_df(orders: pd.DataFrame) -> pd.DataFrame:
+    """
+    Enriquecimento da fact_orders:
+    - adiciona order_date_key
+    - mantém dados originais intactos
+    """
+    created_at = _column(orders, "created_at", None)
+    missing = created_at.isna() | (created_at.astype(object) == "")
+    if missing.any():
+        raise ValueError("Order missing created_at")
+
+    fact = orders.reset_index(drop=True).copy()
+    fact["order_date_key"] = to_date_keys(created_at)
+    return fact
+
+
+def enrich_order_lines_df(
+    order_lines: pd.DataFrame, orders: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Enrich order lines with:
+    - prestashop_customer_id (from order)
+    - order_date_key (YYYYMMDD from order.created_at, 1x por order)
+
+    Join many-to-one lines -> orders (merge); order em falta -> ValueError.
+    Result = fact_order_lines (analytics-ready).
+    """
+    # ids repetidos: a ultima order ganha (como o dict da versao linha a linha)
+    by_id = orders.drop_duplicates("prestashop_order_id", keep="last")
+    header = pd.DataFrame(
+        {
+            "prestashop_order_id": by_id["prestashop_order_id"].to_numpy(),
+            "prestashop_customer_id": by_id["prestashop_customer_id"].to_numpy(),
+            "order_date_key": to_date_keys(by_id["created_at"]),
+        }
+    )
+
+    fact = order_lines.reset_index(drop=True).merge(
+        header,
+        on="prestashop_order_id",
+        how="left",
+        validate="many_to_one",
+        indicator=True,
+    )
+    orphan = fact["_merge"] == "left_only"
+    if orphan.any():
+        order_id = fact.loc[orphan.idxmax(), "prestashop_order_id"]
+        raise ValueError(f"Order {order_id} not found for order line")
+
+    return fact[
+        [
+            "prestashop_order_id",
+            "prestashop_product_id",
+            "prestashop_customer_id",
+            "order_date_key",
+            "quantity",
+            "unit_price",
+            "line_total",
+        ]
+    ]
+
+
+def agg_sales_by_product_df(
+    fact_order_lines: pd.DataFrame, dim_product: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Aggregate sales by product.
+
+    Grain (granularidade):
+    - 1 row per product_key (ordem da 1a ocorrencia, como a versao dict)
+
+    Metrics:
+    - units_sold = sum(quantity)
+    - revenue = sum(line_total)
+
+    Somas com np.bincount: acumulam pela ordem das linhas, o mesmo float
+    que o += da versao linha a linha (groupby.sum usa soma compensada).
+    """
+    names = dim_product.drop_duplicates("product_key", keep="last").set_index(
+        "product_key"
+    )["name"]
+
+    keys = fact_order_lines["prestashop_product_id"]
+    codes, uniques = pd.factorize(keys)
+    known = pd.Index(uniques).isin(names.index)
+    if not known.all():
+        raise ValueError(
+            f"Product {uniques[np.argmin(known)]} not found in dim_product"
+        )
+
+    def total(column: str) -> np.ndarray:
+        values = pd.to_numeric(fact_order_lines[column]).fillna(0.0)
+        return np.bincount(
+            codes, weights=values.to_numpy("float64"), minlength=len(uniques)
+        )
+
+    return pd.DataFrame(
+        {
+            "product_key": uniques,
+            "product_name": names.reindex(uniques).to_numpy(),
+            "units_sold": total("quantity"),
+            "revenue": total("line_total"),
+        }
+    )
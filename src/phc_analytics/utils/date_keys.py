@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# Timestamp ISO -> date_key YYYYMMDD, partilhado pelas fact tables (rows e
+# DataFrame). O date_key so depende dos 10 primeiros caracteres
+# ("YYYY-MM-DD"), por isso o parse e feito 1 vez por dia distinto e fica em
+# cache (LRU limitada: ~27 anos de dias distintos antes de despejar).
+#
+# O resto do timestamp (hora/timezone) nao muda o dia mas continua a ser
+# validado como em datetime.fromisoformat: as formas habituais com um regex
+# estrito; o que o regex nao reconhece passa por datetime.fromisoformat
+# (aceita ou ValueError, exatamente como antes).
+
+DATE_KEY_CACHE_SIZE = 10_000
+
+# separador (1 caracter) + HH[:MM[:SS[.fff[fff]]]] + [+-]HH:MM[:SS[.ffffff]]
+_TIME_SUFFIX = re.compile(
+    r"(?:.(?:[01]\d|2[0-3])(?::[0-5]\d(?::[0-5]\d(?:\.\d{3}(?:\d{3})?)?)?)?"
+    r"(?:[+-](?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d{6})?)?)?)?",
+    re.DOTALL,
+)
+
+
+@lru_cache(maxsize=DATE_KEY_CACHE_SIZE)
+def _prefix_to_date_key(prefix: str) -> int:
+    d = date.fromisoformat(prefix)
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def to_date_key(ts: str) -> int:
+    """
+    Converte timestamp ISO (YYYY-MM-DD[THH:MM:SS...]) para date_key YYYYMMDD.
+
+    O timestamp inteiro e validado (ValueError se invalido, como
+    datetime.fromisoformat); so o parse da data fica em cache.
+    """
+    if len(ts) > 10 and not _TIME_SUFFIX.fullmatch(ts, 10):
+        datetime.fromisoformat(ts)  # forma invulgar: aceita ou ValueError
+    return _prefix_to_date_key(ts[:10])
+
+
+def to_date_keys(values: Any) -> np.ndarray:
+    """
+    Versao vetorizada de to_date_key: array-like de timestamps ISO -> int64.
+
+    Faz factorize dos timestamps e converte (e valida) cada valor distinto
+    1 vez com to_date_key; o parse da data continua 1 vez por dia.
+    """
+    codes, uniques = pd.factorize(
+        pd.Series(values, dtype=object), use_na_sentinel=False
+    )
+    keys = np.fromiter(
+        (to_date_key(ts) for ts in uniques), dtype="int64", count=len(uniques)
+    )
+    return keys[codes]
+
+
+def date_key_cache_info() -> Any:
+    """Estatisticas da cache (hits/misses/currsize) - util em benchmarks."""
+    return _prefix_to_date_key.cache_info()
+
+
+def date_from_key(key: int) -> date:
+    """date_key YYYYMMDD -> date (inverso de to_date_key)."""
+    return date(key // 10000, key // 100 % 100, key % 100)
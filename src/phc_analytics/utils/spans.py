@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+# Instrumentacao leve por etapa (span) de uma pipeline: tempo de parede,
+# tempo de CPU, linhas in/out e memoria. Sem dependencias externas.
+#
+# Memoria:
+# - rss_peak_delta_mb: quanto o pico de RSS do processo (ru_maxrss) subiu
+#   durante o span. Custo zero, mas o pico e monotono: 0 se a etapa nao
+#   ultrapassar o maximo de uma etapa anterior.
+# - traced_peak_mb (so com trace_memory=True): pico de alocacoes (tracemalloc,
+#   inclui buffers numpy/pandas) acima do inicio do span. Exato por etapa,
+#   mas torna a execucao mais lenta.
+
+SPAN_LOGGER = "phc_analytics.spans"
+
+logger = logging.getLogger(SPAN_LOGGER)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de RSS do processo (ru_maxrss); None onde nao ha modulo resource."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB; macOS: bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+@dataclass
+class Span:
+    """Metricas de uma etapa. rows_in/rows_out sao preenchidos por quem mede."""
+
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    rss_peak_delta_mb: Optional[float] = None
+    traced_peak_mb: Optional[float] = None
+    status: str = "ok"  # "ok" | "error"
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class SpanRecorder:
+    """
+    Regista spans pela ordem de execucao.
+
+        spans = SpanRecorder(pipeline="documents", log_json=True)
+        with spans.span("ingestion") as s:
+            raw = load()
+            s.rows_out = len(raw)
+
+    log_json=True: cada span fechado e emitido como 1 linha JSON no logger
+    "phc_analytics.spans" (nivel INFO; ERROR se a etapa falhou).
+    trace_memory=True: mede traced_peak_mb com tracemalloc (se ja estiver
+    ativo por outro motivo, e reutilizado e nao e parado no fim).
+    """
+
+    pipeline: str = "pipeline"
+    log_json: bool = False
+    trace_memory: bool = False
+    spans: List[Span] = field(default_factory=list)
+
+    @contextmanager
+    def span(self, name: str, rows_in: Optional[int] = None) -> Iterator[Span]:
+        s = Span(name=name, rows_in=rows_in)
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            traced_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        rss_start = peak_rss_mb()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield s
+        except BaseException as e:
+            s.status = "error"
+            s.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            s.wall_seconds = time.perf_counter() - wall_start
+            s.cpu_seconds = time.process_time() - cpu_start
+            rss_end = peak_rss_mb()
+            if rss_start is not None and rss_end is not None:
+                s.rss_peak_delta_mb = rss_end - rss_start
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                s.traced_peak_mb = max(0, peak - traced_start) / (1024 * 1024)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.spans.append(s)
+            if self.log_json:
+                self._emit(s)
+
+    def _emit(self, s: Span) -> None:
+        record = {"event": "span", "pipeline": self.pipeline, **s.as_dict()}
+        logger.log(
+            logging.ERROR if s.status == "error" else logging.INFO,
+            json.dumps(record, separators=(",", ":"), default=str),
+        )
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        return [s.as_dict() for s in self.spans]
+
+    def slowest(self) -> Optional[Span]:
+        """Span com mais tempo de parede (o bottleneck), ou None se vazio."""
+        return max(self.spans, key=lambda s: s.wall_seconds, default=None)
@@ -0,0 +1,319 @@
+"""
+In-memory Odoo stub for integration tests (no Docker, no network).
+
+- OdooStore: tiny model store that understands the execute_kw calls our
+  pipelines use (search_read, read, create, write, unlink).
+- StubOdooClient: real OdooClient whose execute_kw is routed to the store,
+  so every convenience helper is exercised as-is.
+- StubOdooServer: the same store behind a local XML-RPC HTTP server, to
+  exercise the real transport (keep-alive, timeouts, gzip) and the retry
+  layer (`failures`: one entry per request, HTTP status or DROP).
+"""
+
+from __future__ import annotations
+
+from socketserver import ThreadingMixIn
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+import threading
+import time
+
+from phc_analytics.integrations.odoo.client import OdooClient, OdooConfig
+
+# StubOdooServer.failures entry: close the connection without answering
+DROP = 0
+
+# model -> {field: comodel}
+MANY2ONE: Dict[str, Dict[str, str]] = {
+    "product.template": {"product_variant_id": "product.product"},
+    "product.product": {"product_tmpl_id": "product.template"},
+    "sale.order": {"partner_id": "res.partner"},
+    "sale.order.line": {"order_id": "sale.order", "product_id": "product.product"},
+}
+
+# model -> {field: (comodel, inverse_field)}
+ONE2MANY: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "sale.order": {"order_line": ("sale.order.line", "order_id")},
+}
+
+
+def _match(rec: Dict[str, Any], domain: Sequence[Any]) -> bool:
+    for term in domain:
+        if isinstance(term, str):  # '&' (implicit AND is all we need)
+            continue
+        field, op, value = term
+        v = rec.get(field, False)
+        if op == "=":
+            ok = v == value
+        elif op == "!=":
+            ok = v != value
+        elif op == "in":
+            ok = v in value
+        elif op == "not in":
+            ok = v not in value
+        elif op == ">":
+            ok = v is not False and v > value
+        elif op == ">=":
+            ok = v is not False and v >= value
+        elif op == "<":
+            ok = v is not False and v < value
+        elif op == "<=":
+            ok = v is not False and v <= value
+        else:
+            raise ValueError(f"Unsupported domain operator: {op}")
+        if not ok:
+            return False
+    return True
+
+
+class OdooStore:
+    def __init__(self) -> None:
+        self.tables: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self.calls: List[Tuple[str, str]] = []
+        self._next_id = 1
+        self._lock = threading.RLock()
+
+    # ---- helpers for tests ----
+
+    def table(self, model: str) -> Dict[int, Dict[str, Any]]:
+        return self.tables.setdefault(model, {})
+
+    def insert(self, model: str, values: Dict[str, Any]) -> int:
+        rec_id = self._next_id
+        self._next_id += 1
+        self.table(model)[rec_id] = {"id": rec_id, **values}
+        if model == "product.template" and not values.get("product_variant_id"):
+            variant_id = self.insert("product.product", {"product_tmpl_id": rec_id})
+            self.table(model)[rec_id]["product_variant_id"] = variant_id
+        return rec_id
+
+    def count(self, method: Optional[str] = None, model: Optional[str] = None) -> int:
+        return sum(
+            1
+            for m, meth in self.calls
+            if (method is None or meth == method) and (model is None or m == model)
+        )
+
+    # ---- XML-RPC surface ----
+
+    def execute_kw(
+        self,
+        model: str,
+        method: str,
+        args: Sequence[Any],
+        kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        handler = getattr(self, f"_{method}", None)
+        if handler is None:
+            raise ValueError(f"Unsupported method: {model}.{method}")
+        with self._lock:
+            self.calls.append((model, method))
+            return handler(model, *args, **(kwargs or {}))
+
+    def _render(
+        self, model: str, rec: Dict[str, Any], fields: List[str]
+    ) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"id": rec["id"]}
+        for f in fields or list(rec):
+            if f == "id":
+                continue
+            if f in ONE2MANY.get(model, {}):
+                comodel, inverse = ONE2MANY[model][f]
+                out[f] = sorted(
+                    i
+                    for i, r in self.table(comodel).items()
+                    if r.get(inverse) == rec["id"]
+                )
+            elif f in MANY2ONE.get(model, {}):
+                v = rec.get(f)
+                out[f] = [v, f"{MANY2ONE[model][f]},{v}"] if v else False
+            else:
+                out[f] = rec.get(f, False)
+        return out
+
+    def _search_read(
+        self,
+        model: str,
+        domain: Sequence[Any],
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        order: str = "id asc",
+    ) -> List[Dict[str, Any]]:
+        rows = [r for _, r in sorted(self.table(model).items()) if _match(r, domain)]
+        if order.strip().lower().endswith("desc"):
+            rows.reverse()
+        rows = rows[offset:]
+        if limit:
+            rows = rows[:limit]
+        return [self._render(model, r, fields or []) for r in rows]
+
+    def _read(
+        self, model: str, ids: Sequence[int], fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        t = self.table(model)
+        return [self._render(model, t[i], fields or []) for i in ids if i in t]
+
+    def _create(self, model: str, values: Any) -> Any:
+        if isinstance(values, list):
+            return [self._create_one(model, v) for v in values]
+        return self._create_one(model, values)
+
+    def _create_one(self, model: str, values: Dict[str, Any]) -> int:
+        plain, commands = self._split_o2m(model, values)
+        rec_id = self.insert(model, plain)
+        self._apply_o2m(model, rec_id, commands)
+        return rec_id
+
+    def _write(self, model: str, ids: Sequence[int], values: Dict[str, Any]) -> bool:
+        plain, commands = self._split_o2m(model, values)
+        for i in ids:
+            self.table(model)[i].update(plain)
+            self._apply_o2m(model, i, commands)
+        return True
+
+    def _unlink(self, model: str, ids: Sequence[int]) -> bool:
+        for i in ids:
+            self.table(model).pop(i, None)
+        return True
+
+    def _split_o2m(
+        self, model: str, values: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+        o2m = ONE2MANY.get(model, {})
+        plain = {k: v for k, v in values.items() if k not in o2m}
+        commands = {k: v for k, v in values.items() if k in o2m}
+        return plain, commands
+
+    def _apply_o2m(
+        self, model: str, rec_id: int, commands: Dict[str, List[Any]]
+    ) -> None:
+        for field, cmds in commands.items():
+            comodel, inverse = ONE2MANY[model][field]
+            for cmd in cmds:
+                code = cmd[0]
+                if code == 0:
+                    self.insert(comodel, {**cmd[2], inverse: rec_id})
+                elif code == 1:
+                    self.table(comodel)[cmd[1]].update(cmd[2])
+                elif code == 2:
+                    self.table(comodel).pop(cmd[1], None)
+                else:
+                    raise ValueError(f"Unsupported one2many command: {code}")
+
+
+class StubOdooClient(OdooClient):
+    def __init__(self, store: Optional[OdooStore] = None) -> None:
+        super().__init__(
+            OdooConfig(
+                url="http://odoo.stub", db="stub", login="api-sync@local", password="x"
+            )
+        )
+        self.store = store or OdooStore()
+        self._uid = 1
+
+    def execute_kw(
+        self,
+        model: str,
+        method: str,
+        args: Sequence[Any],
+        kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        return self.store.execute_kw(model, method, list(args), kwargs)
+
+
+class _KeepAliveHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive (stdlib default is HTTP/1.0)
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+    def do_POST(self) -> None:  # noqa: N802
+        failure = self.server.next_failure()  # type: ignore[attr-defined]
+        if failure is None:
+            super().do_POST()
+            return
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        if failure == DROP:
+            self.close_connection = True
+            return
+        self.send_response(failure)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class StubOdooServer(ThreadingMixIn, SimpleXMLRPCServer):
+    """
+    OdooStore served over real XML-RPC on 127.0.0.1 (random port).
+    Counts accepted TCP connections to assert keep-alive reuse.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, store: Optional[OdooStore] = None, delay_seconds: float = 0
+    ) -> None:
+        super().__init__(
+            ("127.0.0.1", 0),
+            requestHandler=_KeepAliveHandler,
+            allow_none=True,
+            logRequests=False,
+        )
+        self.store = store or OdooStore()
+        self.delay_seconds = delay_seconds
+        self.connections = 0
+        self.in_flight: Dict[str, int] = {}
+        self.max_in_flight: Dict[str, int] = {}
+        self.failures: List[int] = []
+        self._lock = threading.Lock()
+        self.register_function(
+            lambda: {"server_version": "17.0", "server_serie": "17.0"}, "version"
+        )
+        self.register_function(lambda db, login, password, ctx: 1, "authenticate")
+        self.register_function(self._execute_kw, "execute_kw")
+
+    def get_request(self) -> Any:
+        with self._lock:
+            self.connections += 1
+        return super().get_request()
+
+    def next_failure(self) -> Optional[int]:
+        with self._lock:
+            return self.failures.pop(0) if self.failures else None
+
+    def _execute_kw(
+        self,
+        db: str,
+        uid: int,
+        password: str,
+        model: str,
+        method: str,
+        args: Any,
+        kwargs: Any,
+    ) -> Any:
+        with self._lock:
+            self.in_flight[model] = self.in_flight.get(model, 0) + 1
+            self.max_in_flight[model] = max(
+                self.max_in_flight.get(model, 0), self.in_flight[model]
+            )
+        try:
+            if self.delay_seconds:
+                time.sleep(self.delay_seconds)
+            return self.store.execute_kw(model, method, args, kwargs)
+        finally:
+            with self._lock:
+                self.in_flight[model] -= 1
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubOdooServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+        self.server_close()
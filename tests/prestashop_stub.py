@@ -0,0 +1,139 @@
+"""
+Local PrestaShop webservice stub (http.server on 127.0.0.1, random port).
+
+Understands the subset of the API our client uses:
+  GET /api/<resource>?output_format=JSON&limit=offset,count&sort=[id_ASC]
+      &filter[date_upd]=[from,to]&date=1
+and records every request (path + query) for assertions.
+
+Also counts accepted TCP connections (keep-alive checks), can delay each
+response (`delay_seconds`), gzips bodies when the client asks for it and
+can fail on demand: each entry of `failures` is used by one request, an
+HTTP status (e.g. 503) or DROP to close the socket without answering.
+"""
+
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import gzip
+import json
+import threading
+import time
+
+
+# failures entry: close the connection without sending a response
+DROP = 0
+
+
+def _in_interval(value: str, interval: str) -> bool:
+    lo, hi = interval.strip("[]").split(",")
+    return lo <= value.replace("T", " ") <= hi
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubPrestaShopServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+    def do_GET(self) -> None:  # noqa: N802
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.server.record(parts.path, query)
+        failure = self.server.next_failure()
+        if failure == DROP:
+            self.close_connection = True
+            return
+        if failure is not None:
+            self.send_response(failure)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.server.delay_seconds:
+            time.sleep(self.server.delay_seconds)
+
+        resource = parts.path.rstrip("/").rsplit("/", 1)[-1]
+        items = list(self.server.data.get(resource, []))
+        if "filter[date_upd]" in query:
+            items = [
+                it
+                for it in items
+                if _in_interval(str(it["date_upd"]), query["filter[date_upd]"])
+            ]
+        items.sort(key=lambda it: int(it["id"]))
+        if "limit" in query:
+            offset, count = (int(x) for x in query["limit"].split(","))
+            items = items[offset : offset + count]
+
+        # PrestaShop devolve [] quando nao ha resultados
+        body = json.dumps({resource: items} if items else []).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubPrestaShopServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        data: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        delay_seconds: float = 0.0,
+    ) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.data: Dict[str, List[Dict[str, Any]]] = data or {}
+        self.delay_seconds = delay_seconds
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self.connections = 0
+        self.failures: List[int] = []
+        self._lock = threading.Lock()
+
+    def next_failure(self) -> Optional[int]:
+        with self._lock:
+            return self.failures.pop(0) if self.failures else None
+
+    def get_request(self) -> Tuple[Any, Any]:
+        conn = super().get_request()
+        with self._lock:
+            self.connections += 1
+        return conn
+
+    def record(self, path: str, query: Dict[str, str]) -> None:
+        with self._lock:
+            self.requests.append((path, query))
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubPrestaShopServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def make_orders(n: int, start_day: int = 1) -> List[Dict[str, Any]]:
+    """n orders PrestaShop-like (id, date_upd), 1 por dia a partir de 2024-01-<start_day>."""
+    return [
+        {
+            "id": i,
+            "id_customer": 1 + i % 7,
+            "total_paid": f"{10 + i}.00",
+            "date_add": f"2024-01-01 00:00:{i % 60:02d}",
+            "date_upd": f"2024-{1 + (start_day + i - 1) // 28:02d}-"
+            f"{1 + (start_day + i - 1) % 28:02d} 12:00:00",
+        }
+        for i in range(1, n + 1)
+    ]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+BENCH_PATH = Path(__file__).resolve().parents[1] / "benchmarks" / "bench.py"
+
+
+@pytest.fixture(scope="module")
+def bench() -> Any:
+    spec = importlib.util.spec_from_file_location("bench", BENCH_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["bench"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _report(stages: Dict[str, float], rss: float = 100.0) -> Dict[str, Any]:
+    return {
+        "results": {
+            "suite": {"1000": {"stages": stages, "peak_rss_mb": rss}},
+        }
+    }
+
+
+@pytest.mark.parametrize("suite", ["prestashop_gold", "phc_documents", "odoo_sync"])
+def test_suites_run_in_process(bench: Any, suite: str) -> None:
+    case = bench.run_case(suite, 300)
+
+    assert case["stages"]
+    assert all(seconds >= 0 for seconds in case["stages"].values())
+    assert case["total_seconds"] == pytest.approx(
+        sum(case["stages"].values()), abs=1e-5
+    )
+    json.dumps(case)  # o worker envia isto por stdout
+
+
+def test_suites_report_the_pipeline_spans(bench: Any) -> None:
+    gold = bench.run_case("prestashop_gold", 300)["stages"]
+    docs = bench.run_case("phc_documents", 300)["stages"]
+
+    for engine in ("rows", "pandas"):
+        assert {f"{engine}_silver", f"{engine}_write_csv"} <= set(gold)
+    assert list(docs) == [
+        "generate",
+        "ingestion",
+        "modeling",
+        "quality_gate",
+        "analytics",
+        "persistence",
+    ]
+
+
+def test_compare_flags_slow_stages_and_memory(bench: Any) -> None:
+    baseline = _report({"a": 1.0, "b": 0.01, "gone": 1.0}, rss=100.0)
+    current = _report({"a": 2.5, "b": 0.03, "new": 9.0}, rss=250.0)
+
+    regressions = bench.compare(current, baseline, tolerance=0.5, min_seconds=0.05)
+
+    # b: +200% mas so +0.02s (ruido); new/gone: sem par no outro lado
+    assert len(regressions) == 2
+    assert regressions[0].startswith("suite@1000 a:")
+    assert "peak_rss_mb" in regressions[1]
+
+
+def test_compare_within_tolerance_and_unknown_cases(bench: Any) -> None:
+    baseline = _report({"a": 1.0})
+
+    assert bench.compare(_report({"a": 1.4}), baseline, tolerance=0.5) == []
+    assert bench.compare(_report({"a": 0.2}), baseline, tolerance=0.5) == []
+    assert bench.compare(_report({"a": 99.0}), {"results": {}}) == []
+
+
+def test_best_of_takes_min_time_and_max_rss(bench: Any) -> None:
+    runs = [
+        {"stages": {"a": 1.0, "b": 0.5}, "peak_rss_mb": 100.0},
+        {"stages": {"a": 0.8, "b": 0.7}, "peak_rss_mb": 120.0},
+    ]
+
+    case = bench.best_of(runs)
+
+    assert case["stages"] == {"a": 0.8, "b": 0.5}
+    assert case["total_seconds"] == pytest.approx(1.3)
+    assert case["peak_rss_mb"] == 120.0
+    assert case["repeat"] == 2
+
+
+def test_committed_baseline_covers_all_suites(bench: Any) -> None:
+    baseline = json.loads(bench.BASELINE_PATH.read_text())
+
+    assert set(baseline["results"]) == set(bench.SUITES)
+    for scales in baseline["results"].values():
+        assert set(scales) == {str(s) for s in bench.DEFAULT_SCALES}
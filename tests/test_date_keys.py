@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from phc_analytics.transformations.fact_order_lines_enrich import enrich_order_lines
+from phc_analytics.utils.date_keys import (
+    date_key_cache_info,
+    to_date_key,
+    to_date_keys,
+)
+
+TIMESTAMPS = [
+    "2024-01-05T10:00:00",
+    "2024-01-05T23:59:59+01:00",
+    "2023-12-31 08:00:00",
+    "2024-02-29",
+    "2024-01-05T11:30:00.123456",
+]
+
+
+def test_same_key_as_fromisoformat() -> None:
+    for ts in TIMESTAMPS:
+        assert to_date_key(ts) == int(datetime.fromisoformat(ts).strftime("%Y%m%d"))
+    assert to_date_keys(TIMESTAMPS).tolist() == [to_date_key(ts) for ts in TIMESTAMPS]
+    assert to_date_keys(pd.Series(TIMESTAMPS, dtype="string")).dtype == "int64"
+
+
+def test_invalid_date_raises() -> None:
+    with pytest.raises(ValueError):
+        to_date_key("2024-13-01T00:00:00")
+    with pytest.raises(ValueError):
+        to_date_keys(["2024-01-01", "05/01/2024"])
+
+
+@pytest.mark.parametrize(
+    "ts", ["2024-03-05Tgarbage", "2024-03-05 99:99", "2024-03-05T10:00Z", "2024-03-05T"]
+)
+def test_malformed_time_part_raises(ts: str) -> None:
+    with pytest.raises(ValueError):
+        datetime.fromisoformat(ts)  # mesmo contrato que antes da cache
+    with pytest.raises(ValueError):
+        to_date_key(ts)
+    with pytest.raises(ValueError):
+        to_date_keys(["2024-03-05T10:00:00", ts])
+
+
+def test_unusual_but_valid_iso_forms_are_accepted() -> None:
+    for ts in [
+        "2024-03-05x10",
+        "2024-03-05T10:00:00+01:00:30",
+        "2024-03-05 23:59:59.123",
+    ]:
+        assert to_date_key(ts) == 20240305
+        assert to_date_keys([ts]).tolist() == [20240305]
+
+
+def test_parses_once_per_distinct_day() -> None:
+    orders = [
+        {
+            "prestashop_order_id": i,
+            "prestashop_customer_id": 1,
+            "created_at": f"1999-03-0{1 + i % 2}T{i:02d}:00:00",
+        }
+        for i in range(10)
+    ]
+    lines = [
+        {
+            "prestashop_order_id": i % 10,
+            "prestashop_product_id": 1,
+            "quantity": 1.0,
+            "unit_price": 1.0,
+            "line_total": 1.0,
+        }
+        for i in range(100)
+    ]
+    before = date_key_cache_info()
+
+    fact = enrich_order_lines(lines, orders)
+
+    after = date_key_cache_info()
+    assert {row["order_date_key"] for row in fact} == {19990301, 19990302}
+    assert after.misses - before.misses == 2
+    assert after.hits - before.hits == 98
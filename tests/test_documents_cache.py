@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import runpy
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from phc_analytics.staging import documents
+from phc_analytics.staging.documents import (
+    MOCK_PATH,
+    cache_path_for,
+    generate_documents,
+    load_documents_mock,
+    read_documents_arrow,
+    write_synthetic_documents,
+)
+
+
+def test_cached_load_matches_script_and_skips_it(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    expected = load_documents_mock(use_cache=False)
+
+    first = load_documents_mock(cache_dir=tmp_path)
+    assert cache_path_for(MOCK_PATH, tmp_path).exists()
+
+    def fail(*args: object, **kwargs: object) -> None:
+        raise AssertionError("script should not run on a cache hit")
+
+    monkeypatch.setattr(runpy, "run_path", fail)
+    second = load_documents_mock(cache_dir=tmp_path)
+
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+
+
+def test_script_change_regenerates_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    script = tmp_path / "mock_documents.py"
+    script.write_text(Path(MOCK_PATH).read_text())
+    monkeypatch.setenv(documents.CACHE_DIR_ENV, str(tmp_path / "cache"))
+
+    assert len(load_documents_mock(str(script))) == 500
+    old = cache_path_for(script)
+
+    script.write_text(
+        script.read_text().replace("N_DOCUMENTS = 500", "N_DOCUMENTS = 20")
+    )
+    assert len(load_documents_mock(str(script))) == 20
+    assert not old.exists()
+    assert list((tmp_path / "cache").glob("*.arrow")) == [cache_path_for(script)]
+
+
+def test_generator_is_deterministic_and_chunked(tmp_path: Path) -> None:
+    chunks = list(generate_documents(25, seed=7, chunk_size=10))
+    again = pd.concat(generate_documents(25, seed=7, chunk_size=10))
+
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    df = pd.concat(chunks)
+    pd.testing.assert_frame_equal(df, again)
+    assert df["doc_id"].tolist() == list(range(1, 26))
+    assert list(df.columns) == list(load_documents_mock(use_cache=False).columns)
+    assert not df.equals(pd.concat(generate_documents(25, seed=8, chunk_size=10)))
+
+    path = write_synthetic_documents(tmp_path / "docs.arrow", 25, seed=7, chunk_size=10)
+    pd.testing.assert_frame_equal(read_documents_arrow(path), df.reset_index(drop=True))
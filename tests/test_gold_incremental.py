@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import copy
+import csv
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+import run_pipeline
+from phc_analytics.transformations.gold_incremental import rebuild_gold_incremental
+
+
+def _orders() -> List[Dict[str, Any]]:
+    return [
+        {
+            "prestashop_order_id": i,
+            "prestashop_customer_id": 1,
+            "status": "paid",
+            "total_paid": 10.0,
+            "created_at": f"2024-03-{i:02d}T10:00:00",
+            "lines": [
+                {
+                    "prestashop_product_id": 1 + (i + j) % 3,
+                    "quantity": j + 1,
+                    "unit_price": 19.99,
+                    "line_total": 19.99 * (j + 1),
+                }
+                for j in range(2)
+            ],
+        }
+        for i in range(1, 11)
+    ]
+
+
+CUSTOMERS = {"customers": [{"prestashop_customer_id": 1, "email": "a@x.pt"}]}
+PRODUCTS = {
+    "products": [{"prestashop_product_id": i, "name": f"P{i}"} for i in range(1, 5)]
+}
+
+
+def _build(out_dir: Path, orders: List[Dict[str, Any]]) -> None:
+    tables = run_pipeline._gold_rows(CUSTOMERS, PRODUCTS, {"orders": orders})
+    for name, rows in tables.items():
+        run_pipeline.write_csv(out_dir / f"{name}.csv", rows)
+
+
+def _read(path: Path) -> List[Dict[str, str]]:
+    with path.open(newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _by_key(rows: List[Dict[str, str]], *keys: str) -> Dict[Any, Dict[str, str]]:
+    return {tuple(r[k] for k in keys): r for r in rows}
+
+
+def test_incremental_matches_full_rebuild(tmp_path: Path) -> None:
+    before = _orders()
+    after = copy.deepcopy(before)
+    after[2]["lines"][0]["quantity"] = 7  # order 3 alterada
+    after[3]["lines"] = [  # order 4 passa a vender so o produto 4
+        {
+            "prestashop_product_id": 4,
+            "quantity": 1,
+            "unit_price": 2.5,
+            "line_total": 2.5,
+        }
+    ]
+    del after[4]  # order 5 removida
+    after.append({**after[0], "prestashop_order_id": 11, "created_at": "2024-04-02"})
+
+    _build(tmp_path / "inc", before)
+    _build(tmp_path / "full", after)
+    dim_product = run_pipeline.build_dim_product(
+        run_pipeline.normalize_products(PRODUCTS)
+    )
+
+    result = rebuild_gold_incremental(
+        tmp_path / "inc", [3, 4, 5, 11], after, dim_product
+    )
+
+    assert (result.removed_orders, result.added_orders) == (3, 3)
+    assert (result.removed_lines, result.added_lines) == (6, 5)
+    inc, full = tmp_path / "inc", tmp_path / "full"
+    for name, keys in [
+        ("fact_orders", ["prestashop_order_id"]),
+        ("fact_order_lines", ["prestashop_order_id", "prestashop_product_id"]),
+        ("dim_date", ["date"]),
+    ]:
+        assert _by_key(_read(inc / f"{name}.csv"), *keys) == _by_key(
+            _read(full / f"{name}.csv"), *keys
+        ), name
+    # linhas nao alteradas ficam no sitio; as alteradas vao para o fim
+    assert [r["prestashop_order_id"] for r in _read(inc / "fact_orders.csv")] == [
+        "1", "2", "6", "7", "8", "9", "10", "3", "4", "11"
+    ]  # fmt: skip
+
+    inc_agg = _by_key(_read(inc / "agg_sales_by_product.csv"), "product_key")
+    full_agg = _by_key(_read(full / "agg_sales_by_product.csv"), "product_key")
+    assert inc_agg.keys() == full_agg.keys()
+    for key, row in full_agg.items():
+        assert inc_agg[key]["product_name"] == row["product_name"]
+        for metric in ("units_sold", "revenue"):
+            assert float(inc_agg[key][metric]) == pytest.approx(float(row[metric]))
+
+
+def test_removing_every_sale_of_a_product_drops_it(tmp_path: Path) -> None:
+    orders = _orders()[:1]
+    orders.append({**orders[0], "prestashop_order_id": 2, "lines": []})
+    orders[1]["lines"] = [
+        {
+            "prestashop_product_id": 4,
+            "quantity": 1,
+            "unit_price": 1.0,
+            "line_total": 1.0,
+        }
+    ]
+    _build(tmp_path, orders)
+    dim_product = run_pipeline.build_dim_product(
+        run_pipeline.normalize_products(PRODUCTS)
+    )
+
+    rebuild_gold_incremental(tmp_path, [2], orders[:1], dim_product)
+
+    agg_keys = [r["product_key"] for r in _read(tmp_path / "agg_sales_by_product.csv")]
+    assert "4" not in agg_keys
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_requires_a_previous_full_build(tmp_path: Path) -> None:
+    with pytest.raises(RuntimeError, match="run a full build first"):
+        rebuild_gold_incremental(tmp_path, [1], _orders(), [])
+
+
+def test_stale_tmp_from_a_crashed_run_is_not_published(tmp_path: Path) -> None:
+    orders = _orders()
+    _build(tmp_path, orders)
+    dim_date = (tmp_path / "dim_date.csv").read_text()
+    (tmp_path / "dim_date.csv.tmp").write_text("date_key\n19000101\n")
+    dim_product = run_pipeline.build_dim_product(
+        run_pipeline.normalize_products(PRODUCTS)
+    )
+
+    # datas ja cobertas: dim_date nao e reescrita nesta chamada
+    rebuild_gold_incremental(tmp_path, [3], orders, dim_product)
+
+    assert (tmp_path / "dim_date.csv").read_text() == dim_date
+    assert not list(tmp_path.glob("*.tmp"))
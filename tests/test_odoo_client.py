@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import socket
+import time
+
+import pytest
+
+from odoo_stub import OdooStore, StubOdooClient, StubOdooServer
+from phc_analytics.integrations.odoo.client import (
+    ExecuteCall,
+    OdooClient,
+    OdooConfig,
+)
+
+
+def _client(url: str, **kwargs: object) -> OdooClient:
+    return OdooClient(
+        OdooConfig(url=url, db="stub", login="api-sync@local", password="x", **kwargs)
+    )
+
+
+def test_transport_reuses_keep_alive_connection() -> None:
+    with StubOdooServer() as server:
+        odoo = _client(server.url)
+        for i in range(30):
+            odoo.create("res.partner", {"name": f"P{i}"})
+        rows = odoo.search_read("res.partner", fields=["name"], limit=100)
+        odoo.close()
+
+    assert len(rows) == 30
+    assert server.connections == 1
+    assert odoo._transport.connections_opened == 1
+
+
+def test_transport_enforces_timeout() -> None:
+    with StubOdooServer(delay_seconds=3) as server:
+        odoo = _client(server.url, timeout_seconds=1, max_retries=0)
+        odoo.authenticate()
+        started = time.monotonic()
+        with pytest.raises((socket.timeout, TimeoutError)):
+            odoo.search_read("res.partner")
+        elapsed = time.monotonic() - started
+        odoo.close()
+
+    assert elapsed < 2.5
+
+
+def test_transport_gzip_roundtrip() -> None:
+    big_name = "x" * 5000  # above the gzip request threshold
+    with StubOdooServer() as server:
+        odoo = _client(server.url, gzip=True)
+        pid = odoo.create("res.partner", {"name": big_name})
+        rows = odoo.search_read(
+            "res.partner", domain=[("id", "=", pid)], fields=["name"]
+        )
+        odoo.close()
+
+    assert rows[0]["name"] == big_name
+
+
+def test_map_execute_keeps_input_order_and_surfaces_errors() -> None:
+    with StubOdooServer() as server:
+        odoo = _client(server.url, pool_size=4)
+        calls = [
+            ExecuteCall("res.partner", "create", [{"name": f"P{i}"}]) for i in range(8)
+        ]
+        calls.insert(3, ExecuteCall("res.partner", "no_such_method", []))
+        results = odoo.map_execute(calls)
+        odoo.close()
+
+    assert [r.ok for r in results] == [True] * 3 + [False] + [True] * 5
+    names = {r["id"]: r["name"] for r in server.store.table("res.partner").values()}
+    assert [names[r.value] for r in results if r.ok] == [f"P{i}" for i in range(8)]
+    with pytest.raises(Exception, match="no_such_method"):
+        results[3].unwrap()
+
+
+def test_map_execute_scales_with_workers_and_respects_model_limit() -> None:
+    calls = [("res.partner", "search_read", [[]], {"fields": ["id"]})] * 12
+    calls += [("product.template", "search_read", [[]], {"fields": ["id"]})] * 12
+
+    with StubOdooServer(delay_seconds=0.05) as server:
+        odoo = _client(server.url, pool_size=8)
+        odoo.authenticate()
+
+        started = time.monotonic()
+        odoo.map_execute(calls, max_workers=1)
+        serial = time.monotonic() - started
+
+        started = time.monotonic()
+        results = odoo.map_execute(calls, max_workers=8, per_model_limit=3)
+        parallel = time.monotonic() - started
+        odoo.close()
+
+    assert all(r.ok for r in results)
+    assert parallel < serial / 2.5
+    assert server.max_in_flight["res.partner"] <= 3
+    assert server.max_in_flight["product.template"] <= 3
+
+
+def test_search_read_iter_pages_by_id_keyset() -> None:
+    store = OdooStore()
+    for i in range(2500):
+        store.insert("sale.order.line", {"price_unit": float(i % 2)})
+    odoo = StubOdooClient(store)
+
+    chunks = list(
+        odoo.search_read_iter(
+            "sale.order.line",
+            domain=[("price_unit", "=", 1.0)],
+            fields=["price_unit"],
+            chunk_size=400,
+        )
+    )
+
+    assert [len(c) for c in chunks] == [400, 400, 400, 50]
+    ids = [r["id"] for c in chunks for r in c]
+    assert ids == sorted(ids) and len(set(ids)) == 1250
+    assert store.count("search_read") == 4
+
+
+def test_list_installed_modules_is_not_truncated() -> None:
+    store = OdooStore()
+    for i in range(1200):
+        store.insert("ir.module.module", {"name": f"mod_{i:04d}", "state": "installed"})
+    store.insert("ir.module.module", {"name": "not_installed", "state": "uninstalled"})
+
+    mods = StubOdooClient(store).list_installed_modules()
+
+    assert len(mods) == 1200 and "not_installed" not in mods
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+
+import orchestration.run_pipeline as orch
+from orchestration.steps.contracts import StepResult
+
+RUN_ID = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+
+class _Step:
+    def __init__(self, name: str, out: object = 0, error: str = "") -> None:
+        self.name = name
+        self.out = out
+        self.error = error
+        self.calls = 0
+
+    def run(self, ctx: orch.RunContext) -> object:
+        self.calls += 1
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.out
+
+
+@pytest.fixture
+def sql_calls(monkeypatch: pytest.MonkeyPatch) -> List[Tuple[str, Dict[str, str]]]:
+    calls: List[Tuple[str, Dict[str, str]]] = []
+
+    def fake_run_sql_file(
+        database_url: str, sql_file: Path, *, vars: Dict[str, str], quiet: bool = False
+    ) -> str:
+        calls.append((sql_file.name, dict(vars)))
+        return RUN_ID if sql_file == orch.SQL_RUN_START else ""
+
+    monkeypatch.setattr(orch, "run_sql_file", fake_run_sql_file)
+    return calls
+
+
+def _ctx() -> orch.RunContext:
+    return orch.RunContext("postgresql://fake", "phc_analytics", "ci")
+
+
+def test_run_writes_one_step_row_per_step(
+    monkeypatch: pytest.MonkeyPatch, sql_calls: List[Tuple[str, Dict[str, str]]]
+) -> None:
+    steps = [
+        _Step("extract", out=StepResult("extract", 10, bytes_read=2048)),
+        _Step("load", out=5),
+    ]
+    monkeypatch.setattr(orch, "get_steps", lambda: steps)
+
+    assert orch.cmd_run(_ctx(), rows_processed=None, dry_run=False) == 0
+
+    names = [name for name, _ in sql_calls]
+    assert names == [
+        "02_run_start.sql",
+        "06_step_finish.sql",
+        "06_step_finish.sql",
+        "03_run_finish.sql",
+    ]
+    extract, load = sql_calls[1][1], sql_calls[2][1]
+    assert extract["run_id"] == RUN_ID and extract["step_order"] == "1"
+    assert (extract["rows_processed"], extract["bytes_read"]) == ("10", "2048")
+    assert extract["bytes_written"] == ""  # nao reportado -> NULL
+    assert (load["step_name"], load["status"], load["rows_processed"]) == (
+        "load",
+        "success",
+        "5",
+    )
+    assert float(load["duration_seconds"]) >= 0
+    assert load["started_at"] <= load["finished_at"]
+    assert sql_calls[3][1]["rows_processed"] == "15"
+
+
+def test_failed_step_is_logged_and_stops_the_run(
+    monkeypatch: pytest.MonkeyPatch, sql_calls: List[Tuple[str, Dict[str, str]]]
+) -> None:
+    after = _Step("after")
+    steps = [_Step("ok", out=3), _Step("boom", error="source unavailable"), after]
+    monkeypatch.setattr(orch, "get_steps", lambda: steps)
+
+    assert orch.cmd_run(_ctx(), rows_processed=None, dry_run=False) == 1
+
+    step_rows = [v for name, v in sql_calls if name == "06_step_finish.sql"]
+    assert [(r["step_name"], r["status"]) for r in step_rows] == [
+        ("ok", "success"),
+        ("boom", "failed"),
+    ]
+    assert step_rows[1]["error_message"] == "source unavailable"
+    assert step_rows[1]["rows_processed"] == ""
+    assert after.calls == 0
+    assert sql_calls[-1][1]["status"] == "failed"
+
+
+def test_step_log_failure_does_not_mask_the_step_error(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    calls: List[Tuple[str, Dict[str, str]]] = []
+
+    def fake_run_sql_file(
+        database_url: str, sql_file: Path, *, vars: Dict[str, str], quiet: bool = False
+    ) -> str:
+        calls.append((sql_file.name, dict(vars)))
+        if sql_file == orch.SQL_STEP_FINISH:
+            raise RuntimeError('relation "analytics.pipeline_step_log" does not exist')
+        return RUN_ID if sql_file == orch.SQL_RUN_START else ""
+
+    monkeypatch.setattr(orch, "run_sql_file", fake_run_sql_file)
+    monkeypatch.setattr(
+        orch, "get_steps", lambda: [_Step("boom", error="source unavailable")]
+    )
+
+    assert orch.cmd_run(_ctx(), rows_processed=None, dry_run=False) == 1
+
+    finish = calls[-1][1]
+    assert finish["status"] == "failed"
+    assert finish["error_message"] == "source unavailable"
+    assert "pipeline_step_log" in capsys.readouterr().err
+
+
+def test_negative_rows_fail_the_step(
+    monkeypatch: pytest.MonkeyPatch, sql_calls: List[Tuple[str, Dict[str, str]]]
+) -> None:
+    monkeypatch.setattr(orch, "get_steps", lambda: [_Step("bad", out=-1)])
+
+    assert orch.cmd_run(_ctx(), rows_processed=None, dry_run=False) == 1
+    assert "negative rows" in sql_calls[1][1]["error_message"]
+
+
+def test_health_check_steps_reports_regressions(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    def fake_run_sql_file(
+        database_url: str, sql_file: Path, *, vars: Dict[str, str], quiet: bool = False
+    ) -> str:
+        if sql_file == orch.SQL_HEALTH_STEP_REGRESSION:
+            assert vars["window_runs"] == "10" and vars["tolerance_pct"] == ""
+            return "STEP_DURATION_REGRESSION|...|load"
+        return ""
+
+    monkeypatch.setattr(orch, "run_sql_file", fake_run_sql_file)
+
+    assert orch.cmd_health(_ctx(), 60) == 0
+    assert orch.cmd_health(_ctx(), 60, check_steps=True, step_window_runs=10) == 2
+    assert "STEP_DURATION_REGRESSION" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "sql_file, expected_vars",
+    [
+        (
+            orch.SQL_STEP_FINISH,
+            {
+                "run_id",
+                "step_order",
+                "step_name",
+                "status",
+                "started_at",
+                "finished_at",
+                "duration_seconds",
+                "rows_processed",
+                "bytes_read",
+                "bytes_written",
+                "error_message",
+            },
+        ),
+        (
+            orch.SQL_HEALTH_STEP_REGRESSION,
+            {
+                "pipeline_name",
+                "environment",
+                "window_runs",
+                "min_history",
+                "tolerance_pct",
+                "min_delta_seconds",
+            },
+        ),
+    ],
+)
+def test_step_sql_contracts_bind_expected_vars(
+    sql_file: Path, expected_vars: set
+) -> None:
+    text = sql_file.read_text(encoding="utf-8")
+
+    assert set(orch._PSQL_VAR_RE.findall(text)) == expected_vars
+    assert ":'" not in orch._psql_to_pyformat(text)
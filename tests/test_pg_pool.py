@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from phc_analytics.storage.pg_pool import PgPool
+from phc_analytics.storage.watermarks import WatermarkManager
+
+
+class _FakeCursor:
+    def __init__(self, conn: "_FakeConn") -> None:
+        self.conn = conn
+        self.description = None
+
+    def __enter__(self) -> "_FakeCursor":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def execute(self, sql: str, params: object = None) -> None:
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed the connection")
+        self.conn.executed.append((sql, params))
+        self.conn.in_tx = True
+
+    def fetchone(self) -> tuple:
+        return (None,)
+
+
+class _FakeConn:
+    def __init__(self) -> None:
+        self.closed = 0
+        self.dead = False
+        self.in_tx = False
+        self.executed: list = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+        self.in_tx = False
+
+    def rollback(self) -> None:
+        if self.dead:
+            raise psycopg2.InterfaceError("connection already closed")
+        self.rollbacks += 1
+        self.in_tx = False
+
+    def get_transaction_status(self) -> int:
+        if self.in_tx:
+            return psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self) -> None:
+        self.closed = 1
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _pool(**kwargs: object) -> tuple[PgPool, list]:
+    conns: list = []
+
+    def connect(dsn: str) -> _FakeConn:
+        conn = _FakeConn()
+        conns.append(conn)
+        return conn
+
+    return PgPool("postgresql://fake", connect=connect, **kwargs), conns
+
+
+def test_connections_are_reused_across_borrows() -> None:
+    pool, conns = _pool(min_size=1, max_size=2)
+    for _ in range(20):
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+    assert pool.connections_opened == 1
+    # o que nao foi commitado e' desfeito antes de voltar ao pool
+    assert conns[0].rollbacks == 20
+
+
+def test_max_size_bounds_concurrent_connections() -> None:
+    pool, _ = _pool(min_size=0, max_size=1, timeout_seconds=0.05)
+    with pool.connection():
+        with pytest.raises(RuntimeError, match="Timed out"):
+            with pool.connection():
+                pass
+    # a ligacao libertada serve o pedido seguinte
+    with pool.connection():
+        pass
+    assert pool.connections_opened == 1
+
+
+def test_waiter_gets_connection_when_released() -> None:
+    pool, _ = _pool(min_size=1, max_size=1, timeout_seconds=5)
+    got = []
+    with pool.connection() as first:
+        t = threading.Thread(target=lambda: got.append(pool.connection().__enter__()))
+        t.start()
+        t.join(0.05)
+        assert not got
+    t.join(5)
+    assert got == [first]
+
+
+def test_stale_dead_connection_is_replaced_after_health_check() -> None:
+    clock = _Clock()
+    pool, conns = _pool(
+        min_size=1, max_size=1, health_check_after_seconds=30, clock=clock
+    )
+    conns[0].dead = True
+
+    # parada ha pouco tempo: entregue sem SELECT 1
+    with pool.connection() as conn:
+        assert conn is conns[0]
+        conns[0].dead = False
+    conns[0].dead = True
+
+    clock.now = 31
+    with pool.connection() as conn:
+        assert conn is conns[1]
+    assert conns[0].closed
+    assert pool.stats()["health_check_failures"] == 1
+
+
+def test_transaction_commits_or_rolls_back() -> None:
+    pool, conns = _pool(min_size=1, max_size=1)
+    with pool.transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("INSERT 1")
+    assert conns[0].commits == 1
+
+    with pytest.raises(ValueError):
+        with pool.transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute("INSERT 2")
+            raise ValueError("boom")
+    assert conns[0].commits == 1
+    assert conns[0].rollbacks == 1
+    assert pool.connections_opened == 1
+
+
+def test_watermark_set_joins_caller_transaction() -> None:
+    pool, conns = _pool(min_size=1, max_size=1)
+    wm = WatermarkManager("postgresql://fake", pool=pool)
+
+    with pool.transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO raw.prestashop_orders ...")
+        wm.set("orders", "2026-01-01 10:00:00", conn=conn)
+        # nada commitado ainda: load + watermark vao no mesmo commit
+        assert conns[0].commits == 0
+    assert conns[0].commits == 1
+    assert len(conns[0].executed) == 2
+
+
+def test_psql_script_is_translated_for_psycopg2() -> None:
+    from orchestration.run_pipeline import _psql_to_pyformat
+
+    sql = Path("orchestration/sql/health_last_success.sql").read_text()
+    out = _psql_to_pyformat(sql)
+    assert "%(pipeline_name)s" in out
+    assert "%(max_age_minutes)s::int" in out
+    assert ":'" not in out
+
+    script = "\\if :{?run_id}\n\\else\n\\quit\n\\endif\nselect '100%';\n"
+    assert _psql_to_pyformat(script).strip() == "select '100%%';"
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import pytest
+
+import run_pipeline
+
+
+def _orders(n: int) -> Iterator[Dict[str, Any]]:
+    for i in range(1, n + 1):
+        yield {
+            "prestashop_order_id": i,
+            "prestashop_customer_id": i % 7 + 1,
+            "status": "paid",
+            "total_paid": 10.1 * i,
+            "created_at": f"20{10 + i % 12}-0{i % 9 + 1}-1{i % 10}T10:00:00",
+            "lines": [
+                {
+                    "prestashop_product_id": (i + j) % 5 + 1,
+                    "quantity": j + 1,
+                    "unit_price": 19.99,
+                    "line_total": 19.99 * (j + 1),
+                }
+                for j in range(i % 4)  # inclui orders sem linhas
+            ],
+        }
+
+
+def _customers() -> Dict[str, Any]:
+    return {
+        "customers": [
+            {"prestashop_customer_id": i, "email": f"C{i}@X.PT", "firstname": "Ana"}
+            for i in range(1, 8)
+        ]
+    }
+
+
+def _products() -> Dict[str, Any]:
+    return {
+        "products": [
+            {"prestashop_product_id": i, "name": f"P{i}", "sku": f"S{i}"}
+            for i in range(1, 6)
+        ]
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 50, 1000])
+def test_chunked_csvs_match_batch(chunk_size: int, tmp_path: Path) -> None:
+    batch = run_pipeline._gold_rows(
+        _customers(), _products(), {"orders": list(_orders(120))}
+    )
+    for name, rows in batch.items():
+        run_pipeline.write_csv(tmp_path / "batch" / f"{name}.csv", rows)
+
+    written = run_pipeline.run_gold_rows_chunked(
+        _customers(), _products(), _orders(120), tmp_path / "stream", chunk_size
+    )
+
+    assert written == {name: len(rows) for name, rows in batch.items()}
+    for name in batch:
+        expected = (tmp_path / "batch" / f"{name}.csv").read_bytes()
+        assert (tmp_path / "stream" / f"{name}.csv").read_bytes() == expected, name
+
+
+def test_chunked_memory_does_not_grow_with_history(tmp_path: Path) -> None:
+    def peak(n_orders: int) -> int:
+        tracemalloc.start()
+        try:
+            run_pipeline.run_gold_rows_chunked(
+                _customers(), _products(), _orders(n_orders), tmp_path, 100
+            )
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small, large = peak(1_000), peak(10_000)
+    assert large < small * 1.5
+
+
+def test_main_streaming_mode(tmp_path: Path) -> None:
+    report = run_pipeline.main(
+        out_dir=tmp_path / "stream", chunk_size=1, trace_memory=True
+    )
+    run_pipeline.main(out_dir=tmp_path / "batch")
+
+    assert report.chunk_size == 1
+    assert report.peak_traced_mb is not None and report.peak_traced_mb > 0
+    for path in sorted((tmp_path / "batch").glob("*.csv")):
+        assert (tmp_path / "stream" / path.name).read_bytes() == path.read_bytes()
+
+    with pytest.raises(ValueError, match="requires engine='rows'"):
+        run_pipeline.main(engine="pandas", out_dir=tmp_path, chunk_size=10)
+    with pytest.raises(ValueError, match="chunk_size must be >= 1"):
+        run_pipeline.main(out_dir=tmp_path, chunk_size=0)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import time
+
+from prestashop_stub import StubPrestaShopServer, make_orders
+from phc_analytics.integrations.prestashop.client import (
+    PrestaShopClient,
+    PrestaShopConfig,
+)
+
+
+def _client(url: str, **kwargs: object) -> PrestaShopClient:
+    return PrestaShopClient(
+        PrestaShopConfig(base_url=url, api_key="test-key", **kwargs)
+    )
+
+
+def test_iter_pages_full_extraction_pages_by_limit_offset() -> None:
+    with StubPrestaShopServer({"orders": make_orders(250)}) as server:
+        pages = list(_client(server.url).iter_orders(page_size=100))
+
+    assert [len(p) for p in pages] == [100, 100, 50]
+    assert [it["id"] for p in pages for it in p] == list(range(1, 251))
+    assert [q["limit"] for _, q in server.requests] == ["0,100", "100,100", "200,100"]
+    assert all("filter[date_upd]" not in q for _, q in server.requests)
+
+
+def test_iter_pages_since_only_moves_changed_rows() -> None:
+    orders = make_orders(60)  # date_upd: 1 order por dia desde 2024-01-01
+    with StubPrestaShopServer({"orders": orders}) as server:
+        pages = list(
+            _client(server.url).iter_orders(since="2024-02-20T12:00:00Z", page_size=5)
+        )
+
+    got = [it for p in pages for it in p]
+    expected = [o for o in orders if o["date_upd"] >= "2024-02-20 12:00:00"]
+    assert got == expected and 0 < len(got) < len(orders)
+
+    _, q = server.requests[0]
+    assert q["filter[date_upd]"].startswith("[2024-02-20 12:00:00,")
+    assert q["date"] == "1"
+
+
+def test_iter_pages_stops_on_empty_collection() -> None:
+    with StubPrestaShopServer({"orders": []}) as server:
+        pages = list(_client(server.url).iter_orders())
+
+    assert pages == []
+    assert len(server.requests) == 1
+
+
+def test_requests_reuse_keep_alive_connection_and_gzip() -> None:
+    with StubPrestaShopServer({"orders": make_orders(250)}) as server:
+        client = _client(server.url, gzip=True)
+        pages = list(client.iter_orders(page_size=25))
+        client.close()
+
+    assert sum(len(p) for p in pages) == 250
+    assert len(server.requests) == 11  # 10 paginas cheias + 1 vazia
+    assert server.connections == 1
+    assert client.connections_opened == 1
+
+
+def test_parallel_pages_are_faster_and_in_order() -> None:
+    with StubPrestaShopServer(
+        {"orders": make_orders(400)}, delay_seconds=0.05
+    ) as server:
+        client = _client(server.url, pool_size=8)
+
+        started = time.monotonic()
+        serial = list(client.iter_orders(page_size=25))
+        serial_s = time.monotonic() - started
+
+        started = time.monotonic()
+        parallel = list(client.iter_orders(page_size=25, max_workers=8))
+        parallel_s = time.monotonic() - started
+        client.close()
+
+    assert parallel == serial
+    assert parallel_s < serial_s / 2.5
+
+
+def test_rate_limit_caps_requests_per_second() -> None:
+    with StubPrestaShopServer({"orders": make_orders(100)}) as server:
+        client = _client(server.url, rate_limit_per_second=20, rate_limit_burst=1)
+        started = time.monotonic()
+        pages = list(client.iter_orders(page_size=10, max_workers=4))
+        elapsed = time.monotonic() - started
+        client.close()
+
+    # 11 pedidos (10 paginas + 1 vazia) a 20/s -> >= 0.5s
+    assert sum(len(p) for p in pages) == 100
+    assert len(server.requests) >= 11
+    assert elapsed >= (len(server.requests) - 1) / 20 - 0.05
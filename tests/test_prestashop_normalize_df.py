@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from phc_analytics.integrations.prestashop.client import (
+    PrestaShopClient,
+    PrestaShopConfig,
+)
+from phc_analytics.transformations.prestashop_normalize import (
+    DataValidationError,
+    normalize_customers,
+    normalize_order_lines,
+    normalize_orders,
+    normalize_products,
+)
+from phc_analytics.transformations.prestashop_normalize_df import (
+    frame_to_records,
+    normalize_customers_df,
+    normalize_order_lines_df,
+    normalize_orders_df,
+    normalize_products_df,
+    read_table,
+)
+
+_MOCK = PrestaShopClient(PrestaShopConfig(base_url="https://mock"))
+
+PAIRS = [
+    (_MOCK.get_customers_mock, normalize_customers, normalize_customers_df),
+    (_MOCK.get_products_mock, normalize_products, normalize_products_df),
+    (_MOCK.get_orders_mock, normalize_orders, normalize_orders_df),
+    (_MOCK.get_orders_mock, normalize_order_lines, normalize_order_lines_df),
+]
+
+
+@pytest.mark.parametrize("mock, by_row, by_column", PAIRS)
+def test_same_output_as_row_path(mock: Any, by_row: Any, by_column: Any) -> None:
+    raw = mock()
+    assert frame_to_records(by_column(raw)) == by_row(raw)
+
+
+def _orders() -> List[Dict[str, Any]]:
+    return [
+        {
+            "prestashop_order_id": "10",  # texto numerico -> int
+            "prestashop_customer_id": 1,
+            "status": "paid",
+            "total_paid": "12.50",
+            "created_at": "2024-01-01T10:00:00",
+            "lines": [
+                {"prestashop_product_id": 1, "quantity": 2, "unit_price": "1.5"},
+                {"prestashop_product_id": "2", "quantity": 1.0, "line_total": 3},
+            ],
+        },
+        {
+            # sem total_paid (-> 0.0), sem currency/updated_at, sem linhas
+            "prestashop_order_id": 11,
+            "prestashop_customer_id": 2,
+            "status": "new",
+            "created_at": "2024-01-02T10:00:00",
+        },
+    ]
+
+
+def _typed_orders() -> List[Dict[str, Any]]:
+    """_orders com 1 tipo por campo (Arrow nao aceita colunas mistas)."""
+    orders = _orders()
+    orders[0]["prestashop_order_id"] = 10
+    orders[0]["lines"][1].update(prestashop_product_id=2, quantity=1)
+    return orders
+
+
+def test_edge_cases_match_row_path_for_every_input_kind() -> None:
+    orders = _orders()
+    customers = [
+        {"prestashop_customer_id": 1, "email": "A@X.PT", "active": None},
+        {"prestashop_customer_id": "2", "email": "b@x.pt", "active": 0},
+        {"prestashop_customer_id": 3, "email": "c@x.pt"},  # active -> True
+    ]
+    assert frame_to_records(normalize_orders_df(orders)) == normalize_orders(orders)
+    assert frame_to_records(normalize_order_lines_df(orders)) == normalize_order_lines(
+        orders
+    )
+    assert frame_to_records(normalize_customers_df(customers)) == normalize_customers(
+        customers
+    )
+
+    # input colunar (Arrow / DataFrame): mesmo resultado
+    orders = _typed_orders()
+    table = pa.Table.from_pylist(orders)
+    assert frame_to_records(normalize_order_lines_df(table)) == normalize_order_lines(
+        orders
+    )
+    assert frame_to_records(
+        normalize_order_lines_df(table.to_pandas())
+    ) == normalize_order_lines(orders)
+
+
+def test_typed_columns() -> None:
+    df = normalize_order_lines_df(_orders())
+    assert df["prestashop_order_id"].dtype == "int64"
+    assert df["quantity"].dtype == "float64"
+    assert normalize_orders_df(_orders())["status"].dtype == "string"
+
+
+def test_collects_every_offending_row() -> None:
+    orders = _orders() * 3
+    orders[1] = {**orders[1], "status": ""}
+    orders[4] = {**orders[4], "status": None, "created_at": None}
+    orders[5] = {**orders[5], "prestashop_customer_id": None}
+
+    with pytest.raises(DataValidationError) as err:
+        normalize_orders_df(orders)
+
+    assert err.value.rows == [1, 4, 5]
+    message = str(err.value)
+    assert "Order missing prestashop_customer_id (rows [5])" in message
+    assert "Order missing status (rows [1, 4])" in message
+    assert "Order missing created_at (rows [4])" in message
+    # o caminho linha a linha para na 1a falha, com a mesma mensagem
+    with pytest.raises(DataValidationError, match="Order missing status"):
+        normalize_orders(orders)
+
+
+def test_line_errors_index_the_flattened_lines() -> None:
+    orders = _orders()
+    orders[0]["lines"][1]["quantity"] = None
+    orders.append(
+        {**orders[1], "lines": [{"prestashop_product_id": "abc", "quantity": 1}]}
+    )
+
+    with pytest.raises(DataValidationError) as err:
+        normalize_order_lines_df(orders)
+
+    assert err.value.rows == [1, 2]
+    assert "Order line missing quantity (rows [1])" in str(err.value)
+    assert "non-numeric prestashop_product_id (rows [2])" in str(err.value)
+
+
+def test_missing_key_and_empty_input() -> None:
+    with pytest.raises(DataValidationError, match="Missing 'orders'"):
+        normalize_orders_df({})
+    assert normalize_order_lines_df({"orders": []}).empty
+    assert list(normalize_customers_df([]).columns) == list(
+        pd.DataFrame(normalize_customers([{"prestashop_customer_id": 1, "email": "x"}]))
+    )
+
+
+def test_read_table_jsonl(tmp_path: Path) -> None:
+    path = tmp_path / "orders.jsonl"
+    orders = _typed_orders()
+    path.write_text("\n".join(json.dumps(o) for o in orders) + "\n")
+
+    df = normalize_order_lines_df(read_table(path))
+
+    assert frame_to_records(df) == normalize_order_lines(orders)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import tracemalloc
+from typing import Iterator
+
+import pytest
+
+from prestashop_stub import StubPrestaShopServer, make_orders
+from phc_analytics.integrations.prestashop.client import (
+    PrestaShopClient,
+    PrestaShopConfig,
+)
+from phc_analytics.integrations.prestashop.streaming import iter_json_items
+from phc_analytics.pipelines.prestashop_to_raw import _normalize_records
+from phc_analytics.transformations.prestashop_normalize import (
+    DataValidationError,
+    iter_normalized_orders,
+    normalize_orders,
+)
+
+
+def _bytewise(data: bytes) -> Iterator[bytes]:
+    for i in range(len(data)):
+        yield data[i : i + 1]
+
+
+def test_iter_json_items_survives_any_chunk_boundary() -> None:
+    payload = {
+        "meta": {"total": [1, 2, 3]},
+        "orders": [{"id": 1, "note": "ação € ok"}, {"id": 22, "total": 1234.5}],
+        "tail": 7,
+    }
+    data = json.dumps(payload, ensure_ascii=False, indent=1).encode("utf-8")
+
+    assert list(iter_json_items(_bytewise(data), "orders")) == payload["orders"]
+    assert list(iter_json_items([b"[]"], "orders")) == []
+    assert list(iter_json_items([b'{"customers": [{"id": 1}]}'], "orders")) == []
+    with pytest.raises(ValueError):
+        list(iter_json_items([b'{"orders": [{"id": 1}, {"id": '], "orders"))
+
+
+def test_iter_json_items_memory_is_bounded_by_item_not_payload() -> None:
+    n = 50_000
+    item = {
+        "prestashop_order_id": 0,
+        "prestashop_customer_id": 1,
+        "status": "paid",
+        "created_at": "2024-01-01",
+        "reference": "X" * 40,
+    }
+    payload_bytes = len(json.dumps(item)) * n
+
+    def chunks() -> Iterator[bytes]:
+        # gera o payload on-the-fly (nunca existe inteiro em memoria)
+        yield b'{"orders": ['
+        for i in range(n):
+            row = {**item, "prestashop_order_id": i}
+            yield (b"," if i else b"") + json.dumps(row).encode()
+        yield b"]}"
+
+    tracemalloc.start()
+    count = sum(1 for _ in iter_normalized_orders(iter_json_items(chunks(), "orders")))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert count == n
+    assert peak < payload_bytes / 20
+
+
+def test_large_item_split_in_many_chunks_is_parsed_linearly(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    item = {"id": 1, "notes": ["n" * 100] * 2_000}  # ~200 KB
+    data = json.dumps({"orders": [item]}).encode()
+    calls = []
+    raw_decode = json.JSONDecoder.raw_decode
+
+    def counting(self: json.JSONDecoder, s: str, idx: int = 0) -> object:
+        calls.append(idx)
+        return raw_decode(self, s, idx)
+
+    monkeypatch.setattr(json.JSONDecoder, "raw_decode", counting)
+    chunks = (data[i : i + 100] for i in range(0, len(data), 100))
+
+    assert list(iter_json_items(chunks, "orders")) == [item]
+    # sem o limite de re-parse seriam ~2000 tentativas (1 por chunk)
+    assert len(calls) < 40
+
+
+def test_malformed_payload_stops_at_value_limit() -> None:
+    consumed = []
+
+    def chunks() -> Iterator[bytes]:
+        yield b'{"orders": [{"note": "'  # string nunca fechada
+        for i in range(10_000):
+            consumed.append(i)
+            yield b"x" * 100
+
+    with pytest.raises(ValueError, match="exceeds 5000 chars"):
+        list(iter_json_items(chunks(), "orders", max_value_chars=5_000))
+    assert len(consumed) < 200  # nao leu o stream ate ao fim
+
+
+@pytest.mark.parametrize("use_gzip", [False, True])
+def test_stream_items_decodes_from_socket(use_gzip: bool) -> None:
+    orders = make_orders(300)
+    with StubPrestaShopServer({"orders": orders}) as server:
+        client = PrestaShopClient(
+            PrestaShopConfig(base_url=server.url, api_key="k", gzip=use_gzip)
+        )
+        streamed = list(client.stream_items("orders"))
+        # ligacao volta ao pool depois de o body ser lido ate ao fim
+        again = list(client.stream_items("orders", since="2024-06-01T00:00:00Z"))
+        client.close()
+
+    assert streamed == orders
+    assert again == [o for o in orders if o["date_upd"] >= "2024-06-01 00:00:00"]
+    assert "limit" not in server.requests[0][1]
+    assert server.connections == 1
+
+
+def test_normalizers_consume_generators_directly() -> None:
+    raw = [
+        {
+            "prestashop_order_id": i,
+            "prestashop_customer_id": 1,
+            "status": "paid",
+            "created_at": "2024-01-01",
+            "total_paid": "1.5",
+        }
+        for i in range(3)
+    ]
+    assert normalize_orders(iter(raw)) == normalize_orders({"orders": raw})
+    with pytest.raises(DataValidationError, match="Missing 'orders'"):
+        normalize_orders({})
+
+    records = _normalize_records(
+        iter_json_items(
+            [b'{"orders":[{"id":5,"date_upd":"2024-01-01 10:00:00"}]}'],
+            "orders",
+        ),
+        id_key="id",
+        updated_at_key="date_upd",
+    )
+    assert [(r.record_id, r.source_updated_at.isoformat()) for r in records] == [
+        ("5", "2024-01-01T10:00:00+00:00")
+    ]
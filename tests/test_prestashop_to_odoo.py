@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pytest
+
+import phc_analytics.pipelines.prestashop_to_odoo as p2o
+from odoo_stub import OdooStore, StubOdooClient
+from phc_analytics.pipelines.prestashop_to_odoo import (
+    product_variant_resolver,
+    sync,
+    upsert_customers,
+    upsert_orders,
+    upsert_products,
+)
+from phc_analytics.storage.checkpoints import CheckpointStore
+
+
+def _customers(n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "prestashop_customer_id": i,
+            "email": f"C{i}@Example.com",
+            "firstname": "Cliente",
+            "lastname": str(i),
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _seed_partners(store: OdooStore) -> None:
+    # 1 partner ja ligado ao PrestaShop + 1 partner so com email
+    store.insert(
+        "res.partner",
+        {"name": "Old 1", "email": "c1@example.com", "x_prestashop_customer_id": 1},
+    )
+    store.insert("res.partner", {"name": "Email only", "email": "c2@example.com"})
+
+
+def _partners(store: OdooStore) -> Dict[int, Any]:
+    return {
+        r["x_prestashop_customer_id"]: (r["name"], r["email"])
+        for r in store.table("res.partner").values()
+        if r.get("x_prestashop_customer_id")
+    }
+
+
+def test_upsert_customers_batched_matches_serial_result() -> None:
+    customers = _customers(25)
+
+    serial, batched = OdooStore(), OdooStore()
+    _seed_partners(serial)
+    _seed_partners(batched)
+
+    r_serial = upsert_customers(StubOdooClient(serial), customers)
+    r_batched = upsert_customers(
+        StubOdooClient(batched), customers, batched=True, chunk_size=10
+    )
+
+    assert r_serial == r_batched == {"created": 23, "updated": 2, "skipped": 0}
+    assert _partners(serial) == _partners(batched)
+    assert len(batched.table("res.partner")) == 25
+
+    # creates vao em chunks (3 x create multi-record), nao 1 por customer
+    assert batched.count("create") == 3
+    assert batched.count() < serial.count() / 5
+
+
+def test_upsert_customers_batched_is_idempotent() -> None:
+    store = OdooStore()
+    odoo = StubOdooClient(store)
+    upsert_customers(odoo, _customers(5), batched=True)
+    store.calls.clear()
+    r = upsert_customers(odoo, _customers(5), batched=True)
+
+    assert r == {"created": 0, "updated": 0, "skipped": 5}
+    assert len(store.table("res.partner")) == 5
+    assert store.count("write") == 0
+
+
+def test_unchanged_records_are_not_written() -> None:
+    store = OdooStore()
+    odoo = StubOdooClient(store)
+    products = [
+        {"prestashop_product_id": i, "name": f"P{i}", "sku": "", "price": 10 + i}
+        for i in range(1, 5)
+    ]
+    upsert_customers(odoo, _customers(4))
+    upsert_products(odoo, products)
+
+    customers = _customers(4)
+    customers[1]["email"] = "  c2@EXAMPLE.com "  # so muda a forma: normalizado = igual
+    customers[2]["firstname"] = "Outro"
+    products[0]["price"] = 11.000000001  # ruido de float
+    products[3]["name"] = "P4 novo"
+
+    store.calls.clear()
+    rc = upsert_customers(odoo, customers)
+    rp = upsert_products(odoo, products)
+
+    assert rc == {"created": 0, "updated": 1, "skipped": 3}
+    assert rp == {"created": 0, "updated": 1, "skipped": 3}
+    assert store.count("write") == 2
+
+
+def _seed_catalog(store: OdooStore, n_customers: int = 3, n_products: int = 4) -> None:
+    for i in range(1, n_customers + 1):
+        store.insert("res.partner", {"name": f"C{i}", "x_prestashop_customer_id": i})
+    for i in range(1, n_products + 1):
+        store.insert(
+            "product.template", {"name": f"P{i}", "x_prestashop_product_id": 100 + i}
+        )
+
+
+def _orders(n: int, n_customers: int = 3, n_products: int = 4) -> List[Dict[str, Any]]:
+    return [
+        {
+            "prestashop_order_id": 5000 + o,
+            "prestashop_customer_id": 1 + o % n_customers,
+            "lines": [
+                {
+                    "prestashop_product_id": 101 + (o + k) % n_products,
+                    "quantity": 1 + k,
+                    "unit_price": 10.0 + k,
+                }
+                for k in range(3)
+            ],
+        }
+        for o in range(n)
+    ]
+
+
+def test_upsert_orders_resolves_refs_from_cache() -> None:
+    store = OdooStore()
+    _seed_catalog(store)
+
+    r = upsert_orders(StubOdooClient(store), _orders(20))
+
+    assert r["orders_created"] == 20 and r["lines_created"] == 60
+    # 1 prefetch em batch por modelo, o resto servido da memoria
+    assert store.count("search_read", "product.template") == 1
+    assert store.count("search_read", "res.partner") == 1
+    assert r["product_cache"]["hits"] == 60 and r["product_cache"]["misses"] == 0
+    assert r["partner_cache"]["hits"] == 20
+
+    variants = {
+        r["product_variant_id"] for r in store.table("product.template").values()
+    }
+    assert {
+        ln["product_id"] for ln in store.table("sale.order.line").values()
+    } <= variants
+
+
+def test_resolver_caches_missing_ids() -> None:
+    store = OdooStore()
+    _seed_catalog(store)
+    resolver = product_variant_resolver(StubOdooClient(store))
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="x_prestashop_product_id=999"):
+            resolver.get(999)
+
+    assert resolver.stats()["misses"] == 1
+    assert store.count("search_read") == 1
+
+
+def _lines(store: OdooStore) -> List[Any]:
+    return sorted(
+        (r["order_id"], r["product_id"], r["product_uom_qty"], r["price_unit"])
+        for r in store.table("sale.order.line").values()
+    )
+
+
+def test_reconcile_lines_unchanged_orders_cost_no_writes() -> None:
+    store = OdooStore()
+    _seed_catalog(store)
+    odoo = StubOdooClient(store)
+    upsert_orders(odoo, _orders(5), reconcile_lines=True)
+    before = _lines(store)
+
+    store.calls.clear()
+    r = upsert_orders(odoo, _orders(5), reconcile_lines=True)
+
+    assert r["orders_updated"] == 5 and r["lines_kept"] == 15
+    assert r["lines_changed"] == r["lines_created"] == r["lines_deleted"] == 0
+    assert store.count("write") == store.count("create") == store.count("unlink") == 0
+    assert store.count("search_read", "sale.order.line") == 5
+    assert _lines(store) == before
+
+
+def test_reconcile_lines_matches_replace_strategy() -> None:
+    orders = _orders(4)
+    changed = _orders(4)
+    changed[0]["lines"][0]["quantity"] = 9  # changed
+    changed[1]["lines"].pop()  # removed
+    changed[2]["lines"].append(
+        {"prestashop_product_id": 104, "quantity": 2, "unit_price": 5.0}
+    )  # added
+
+    replace, reconcile = OdooStore(), OdooStore()
+    for store, flag in ((replace, False), (reconcile, True)):
+        _seed_catalog(store)
+        odoo = StubOdooClient(store)
+        upsert_orders(odoo, orders, reconcile_lines=flag)
+        r = upsert_orders(odoo, changed, reconcile_lines=flag)
+
+    assert (r["lines_kept"], r["lines_changed"]) == (10, 1)
+    assert (r["lines_created"], r["lines_deleted"]) == (1, 1)
+    assert reconcile.count("write", "sale.order") == 3
+    assert _lines(replace) == _lines(reconcile)
+
+
+def test_concurrent_upserts_match_serial() -> None:
+    serial, parallel = OdooStore(), OdooStore()
+    for store, workers in ((serial, 1), (parallel, 4)):
+        _seed_catalog(store)
+        odoo = StubOdooClient(store)
+        upsert_customers(
+            odoo, _customers(30), batched=True, chunk_size=7, max_workers=workers
+        )
+        upsert_orders(odoo, _orders(12), reconcile_lines=True, max_workers=workers)
+        changed = _orders(12)
+        changed[5]["lines"][1]["unit_price"] = 99.0
+        r = upsert_orders(odoo, changed, reconcile_lines=True, max_workers=workers)
+
+    assert r["lines_changed"] == 1 and r["orders_updated"] == 12
+    assert _partners(serial) == _partners(parallel)
+    assert _lines(serial) == _lines(parallel)
+
+
+class _CrashingClient(StubOdooClient):
+    """Simula um crash do processo na N-esima criacao de sale.order."""
+
+    def __init__(self, store: OdooStore, crash_at: int) -> None:
+        super().__init__(store)
+        self.crash_at = crash_at
+
+    def execute_kw(
+        self,
+        model: str,
+        method: str,
+        args: Sequence[Any],
+        kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        if (model, method) == ("sale.order", "create"):
+            if self.store.count("create", "sale.order") + 1 == self.crash_at:
+                raise KeyboardInterrupt("crash")
+        return super().execute_kw(model, method, args, kwargs)
+
+
+def test_sync_resumes_after_crash_from_last_committed_chunk(tmp_path: Path) -> None:
+    store = OdooStore()
+    _seed_catalog(store)
+    orders = _orders(40)
+    db = str(tmp_path / "checkpoints.sqlite")
+
+    with CheckpointStore(db) as cp, pytest.raises(KeyboardInterrupt):
+        sync(_CrashingClient(store, crash_at=25), [], [], orders, cp, chunk_size=10)
+    assert store.count("create", "sale.order") == 24
+
+    store.calls.clear()
+    with CheckpointStore(db) as cp:
+        r = sync(StubOdooClient(store), [], [], orders, cp, chunk_size=10)
+        assert cp.get("orders").status == "done"
+
+    # chunks 0-1 confirmados; o chunk 2 (interrompido) e' repetido
+    assert r["orders"]["chunks_resumed"] == 2
+    assert r["orders"]["orders_created"] == 16 and r["orders"]["orders_updated"] == 4
+    assert len(store.table("sale.order")) == 40
+    assert len(store.table("sale.order.line")) == 120
+
+
+def test_sync_skips_records_unchanged_since_last_push(tmp_path: Path) -> None:
+    store = OdooStore()
+    _seed_catalog(store)
+    odoo = StubOdooClient(store)
+    customers = _customers(3)
+
+    with CheckpointStore(str(tmp_path / "cp.sqlite")) as cp:
+        sync(odoo, customers, [], _orders(12), cp, chunk_size=5)
+
+        store.calls.clear()
+        again = sync(odoo, customers, [], _orders(12), cp, chunk_size=5)
+        assert store.count() == 0
+        assert again["orders"]["chunks_resumed"] == 3
+
+        changed = _orders(12)
+        changed[7]["lines"][0]["quantity"] = 9
+        customers[0]["lastname"] = "Novo"
+        r = sync(odoo, customers, [], changed, cp, chunk_size=5)
+
+    assert r["orders"]["chunks_resumed"] == 0
+    assert r["orders"]["skipped_unchanged"] == 11 and r["orders"]["orders_updated"] == 1
+    assert r["customers"]["skipped_unchanged"] == 2 and r["customers"]["updated"] == 1
+    assert store.count("create", "sale.order") == 0
+
+
+def test_checkpoint_state_is_kept_per_odoo_target(tmp_path: Path) -> None:
+    db = str(tmp_path / "cp.sqlite")
+    local, other = OdooStore(), OdooStore()
+    for store in (local, other):
+        _seed_catalog(store)
+    odoo = StubOdooClient(local)
+
+    with CheckpointStore(db, target=odoo.target) as cp:
+        sync(odoo, [], [], _orders(6), cp)
+    with CheckpointStore(db, target="http://odoo.other/prod") as cp:
+        r = sync(StubOdooClient(other), [], [], _orders(6), cp)
+        cp.reset()
+
+    assert r["orders"]["chunks_resumed"] == 0 and r["orders"]["skipped_unchanged"] == 0
+    assert len(other.table("sale.order")) == 6
+    with CheckpointStore(db, target=odoo.target) as cp:
+        assert cp.get("orders").status == "done"  # reset so do outro target
+
+
+class _MockPrestaShop:
+    def __init__(self, orders: List[Dict[str, Any]]) -> None:
+        self.orders = orders
+
+    def get_customers_mock(self) -> Dict[str, Any]:
+        return {"customers": []}
+
+    def get_products_mock(self) -> Dict[str, Any]:
+        return {"products": []}
+
+    def get_orders_mock(self) -> Dict[str, Any]:
+        return {"orders": self.orders}
+
+    def close(self) -> None:
+        pass
+
+
+def test_run_checkpoints_are_opt_in_and_resettable(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = OdooStore()
+    _seed_catalog(store)
+    monkeypatch.setattr(p2o, "build_local_client", lambda: StubOdooClient(store))
+    monkeypatch.setattr(
+        p2o, "_build_prestashop_client", lambda: _MockPrestaShop(_orders(6))
+    )
+    db = str(tmp_path / "cp.sqlite")
+
+    def odoo_calls(**kwargs: Any) -> int:
+        store.calls.clear()
+        p2o.run(**kwargs)
+        return store.count()
+
+    assert odoo_calls() > 0
+    assert odoo_calls() > 0  # sem checkpoint_path nao ha estado entre runs
+    assert not Path(db).exists()
+
+    assert odoo_calls(checkpoint_path=db) > 0
+    assert odoo_calls(checkpoint_path=db) == 0
+    assert odoo_calls(checkpoint_path=db, reset_checkpoints=True) > 0
+    with pytest.raises(ValueError):
+        p2o.run(reset_checkpoints=True)
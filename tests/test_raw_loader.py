@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, List, Tuple
+
+from phc_analytics.pipelines.prestashop_to_raw import (
+    RAW_TABLES,
+    RawRecord,
+    _csv_buffers,
+    copy_upsert_raw,
+)
+
+
+class _RecordingCursor:
+    def __init__(self, rowcount: int) -> None:
+        self.statements: List[str] = []
+        self.copied: List[Tuple[str, str]] = []
+        self.rowcount = rowcount
+
+    def __enter__(self) -> "_RecordingCursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        self.statements.append(" ".join(sql.split()))
+
+    def copy_expert(self, sql: str, f: io.StringIO) -> None:
+        self.copied.append((sql, f.read()))
+
+
+class _RecordingConn:
+    def __init__(self, rowcount: int = 0) -> None:
+        self.cur = _RecordingCursor(rowcount)
+
+    def cursor(self) -> _RecordingCursor:
+        return self.cur
+
+
+def _records(n: int) -> List[RawRecord]:
+    return [
+        RawRecord(
+            record_id=str(i),
+            payload={"id": i, "note": 'virgula, "aspas"\nlinha ação'},
+            source_updated_at=(
+                None if i % 2 else datetime(2024, 1, 1 + i, 10, tzinfo=timezone.utc)
+            ),
+        )
+        for i in range(5)
+    ]
+
+
+def test_csv_buffers_roundtrip_and_bounded_size() -> None:
+    buffers = list(_csv_buffers(_records(5), rows_per_buffer=2))
+
+    assert [n for _, n in buffers] == [2, 2, 1]
+    rows = [row for buf, _ in buffers for row in csv.reader(buf)]
+    assert [json.loads(r[1]) for r in rows] == [r.payload for r in _records(5)]
+    # None -> campo vazio sem aspas (NULL em COPY csv)
+    assert [r[2] for r in rows] == [
+        r.source_updated_at.isoformat() if r.source_updated_at else ""
+        for r in _records(5)
+    ]
+
+
+def test_copy_upsert_raw_streams_then_upserts_once() -> None:
+    conn = _RecordingConn(rowcount=3)
+
+    affected = copy_upsert_raw(
+        conn, RAW_TABLES["prestashop_customers"], iter(_records(5)), rows_per_buffer=2
+    )
+
+    assert affected == 3
+    assert len(conn.cur.copied) == 3
+    assert all("FROM STDIN WITH (FORMAT csv)" in sql for sql, _ in conn.cur.copied)
+    inserts = [s for s in conn.cur.statements if s.startswith("INSERT")]
+    assert len(inserts) == 1
+    assert "INSERT INTO raw.prestashop_customers AS t (customer_id," in inserts[0]
+    assert "DISTINCT ON (record_id)" in inserts[0]
+    assert "WHERE t.payload IS DISTINCT FROM EXCLUDED.payload" in inserts[0]
+
+
+def test_copy_upsert_raw_without_records_skips_insert() -> None:
+    conn = _RecordingConn()
+
+    assert copy_upsert_raw(conn, RAW_TABLES["prestashop_orders"], []) == 0
+    assert not conn.cur.copied
+    assert not any(s.startswith("INSERT") for s in conn.cur.statements)
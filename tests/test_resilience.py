@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import random
+import socket
+import time
+import xmlrpc.client
+
+import pytest
+
+import odoo_stub
+import prestashop_stub
+from odoo_stub import StubOdooServer
+from prestashop_stub import StubPrestaShopServer, make_orders
+from phc_analytics.integrations.odoo.client import (
+    OdooClient,
+    OdooConfig,
+    is_retryable_error,
+)
+from phc_analytics.integrations.prestashop.client import (
+    PrestaShopClient,
+    PrestaShopConfig,
+)
+from phc_analytics.integrations.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    call_with_retry,
+)
+
+FAST = {"retry_backoff_seconds": 0.01, "retry_max_backoff_seconds": 0.05}
+
+
+def _ps(url: str, **kwargs: object) -> PrestaShopClient:
+    return PrestaShopClient(
+        PrestaShopConfig(base_url=url, api_key="k", **{**FAST, **kwargs})
+    )
+
+
+def _odoo(url: str, **kwargs: object) -> OdooClient:
+    return OdooClient(
+        OdooConfig(url=url, db="stub", login="l", password="x", **{**FAST, **kwargs})
+    )
+
+
+def _closed_port_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_backoff_is_exponential_with_full_jitter() -> None:
+    policy = RetryPolicy(max_attempts=10, base_delay_seconds=1, max_delay_seconds=8)
+    rng = random.Random(7)
+    for retry, cap in [(1, 1), (2, 2), (3, 4), (4, 8), (9, 8)]:
+        waits = [policy.backoff(retry, rng) for _ in range(200)]
+        assert all(0 <= w <= cap for w in waits)
+        assert max(waits) > cap * 0.8  # espalhado por todo o intervalo
+
+
+def test_breaker_opens_fails_fast_and_recovers_after_trial() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(
+        failure_threshold=2, reset_timeout_seconds=10, clock=lambda: now[0]
+    )
+    policy = RetryPolicy(max_attempts=5, base_delay_seconds=0)
+    calls = []
+
+    def down() -> None:
+        calls.append(1)
+        raise ConnectionRefusedError()
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(
+            down, policy=policy, is_retryable=lambda e: True, breaker=breaker
+        )
+    assert len(calls) == 2 and breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 11.0  # half-open: 1 tentativa; sucesso fecha o circuito
+    assert (
+        call_with_retry(
+            lambda: "ok", policy=policy, is_retryable=lambda e: True, breaker=breaker
+        )
+        == "ok"
+    )
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_prestashop_retries_transient_failures_until_success() -> None:
+    DROP = prestashop_stub.DROP
+    with StubPrestaShopServer({"orders": make_orders(30)}) as server:
+        server.failures = [503, DROP, 429]
+        client = _ps(server.url)
+        pages = list(client.iter_orders(page_size=10))
+        client.close()
+
+    assert [it["id"] for p in pages for it in p] == list(range(1, 31))
+    assert [q["limit"] for _, q in server.requests[:4]] == ["0,10"] * 4
+
+
+def test_prestashop_client_errors_are_not_retried() -> None:
+    with StubPrestaShopServer({"orders": make_orders(3)}) as server:
+        server.failures = [404]
+        with pytest.raises(RuntimeError, match="HTTP error 404"):
+            list(_ps(server.url).iter_orders())
+
+    assert len(server.requests) == 1
+
+
+def test_prestashop_circuit_fails_fast_when_shop_is_down() -> None:
+    client = _ps(_closed_port_url(), max_retries=10, circuit_failure_threshold=3)
+
+    with pytest.raises(CircuitOpenError):
+        list(client.iter_orders())
+    started = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        list(client.iter_orders())
+    assert time.monotonic() - started < 0.05
+    assert client.connections_opened == 3
+
+
+def test_odoo_retries_reads_but_never_resends_ambiguous_creates() -> None:
+    DROP = odoo_stub.DROP
+    with StubOdooServer() as server:
+        odoo = _odoo(server.url, timeout_seconds=1)
+        odoo.authenticate()
+
+        server.failures = [503, DROP, 502]
+        assert odoo.search_read("res.partner") == []
+
+        # create: 503 do proxy e' seguro (nao chegou ao Odoo) -> repete
+        server.failures = [503]
+        odoo.create("res.partner", {"name": "A"})
+
+        # timeout: o Odoo pode ter aplicado o create -> nao repete
+        server.delay_seconds = 1.5
+        with pytest.raises(socket.timeout):
+            odoo.create("res.partner", {"name": "B"})
+        time.sleep(0.8)  # deixa o servidor acabar o pedido em curso
+        odoo.close()
+
+    names = [r["name"] for r in server.store.table("res.partner").values()]
+    assert names == ["A", "B"]
+    assert server.store.count("create", "res.partner") == 2
+
+
+def test_odoo_error_classification() -> None:
+    serialization = xmlrpc.client.Fault(
+        1, "psycopg2.errors.SerializationFailure: could not serialize access"
+    )
+    validation = xmlrpc.client.Fault(2, "ValidationError: missing required field")
+    gateway = xmlrpc.client.ProtocolError("h", 504, "Gateway Timeout", {})
+
+    assert is_retryable_error(serialization, "create")
+    assert not is_retryable_error(validation, "search_read")
+    assert is_retryable_error(socket.timeout(), "search_read")
+    assert not is_retryable_error(socket.timeout(), "create")
+    assert is_retryable_error(gateway, "read") and not is_retryable_error(
+        gateway, "write"
+    )
+    assert is_retryable_error(ConnectionRefusedError(), "unlink")
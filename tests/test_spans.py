@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import logging
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from phc_analytics.pipeline.run import run_pipeline
+from phc_analytics.staging.documents import generate_documents
+from phc_analytics.utils.spans import SPAN_LOGGER, SpanRecorder
+
+
+def test_span_records_time_rows_and_memory() -> None:
+    spans = SpanRecorder(trace_memory=True)
+
+    with spans.span("build", rows_in=3) as s:
+        data = [bytearray(1024) for _ in range(2048)]  # ~2 MB
+        s.rows_out = len(data)
+    with spans.span("noop"):
+        pass
+
+    build, noop = spans.spans
+    assert (build.name, build.rows_in, build.rows_out) == ("build", 3, 2048)
+    assert build.wall_seconds > 0 and build.cpu_seconds >= 0
+    assert build.traced_peak_mb is not None and build.traced_peak_mb > 1.5
+    assert noop.traced_peak_mb is not None and noop.traced_peak_mb < 0.5
+    assert spans.slowest() is build
+    assert not tracemalloc.is_tracing()  # parado por quem o iniciou
+
+
+def test_span_error_is_recorded_and_logged(caplog: pytest.LogCaptureFixture) -> None:
+    spans = SpanRecorder(pipeline="p", log_json=True)
+
+    with caplog.at_level(logging.INFO, logger=SPAN_LOGGER):
+        with spans.span("ok") as s:
+            s.rows_out = 1
+        with pytest.raises(ValueError):
+            with spans.span("boom"):
+                raise ValueError("bad input")
+
+    records = [json.loads(r.getMessage()) for r in caplog.records]
+    assert [r["name"] for r in records] == ["ok", "boom"]
+    assert records[0] == {
+        **records[0],
+        "event": "span",
+        "pipeline": "p",
+        "status": "ok",
+    }
+    assert records[1]["status"] == "error"
+    assert records[1]["error"] == "ValueError: bad input"
+    assert caplog.records[1].levelno == logging.ERROR
+    assert spans.as_dicts()[1]["status"] == "error"
+
+
+def test_pipeline_returns_one_span_per_stage(tmp_path: Path) -> None:
+    out = run_pipeline(out_dir=str(tmp_path / "out"))
+
+    spans = {s["name"]: s for s in out["spans"]}
+    assert list(spans) == [
+        "ingestion",
+        "modeling",
+        "quality_gate",
+        "analytics",
+        "persistence",
+    ]
+    assert spans["ingestion"]["rows_out"] == len(out["fact_documents"])
+    assert spans["modeling"]["rows_in"] == len(out["fact_documents"])
+    assert spans["persistence"]["rows_out"] == sum(w.rows for w in out["written"])
+    assert all(s["status"] == "ok" and s["wall_seconds"] > 0 for s in spans.values())
+
+
+def test_pipeline_runs_on_given_documents(tmp_path: Path) -> None:
+    raw = pd.concat(generate_documents(200, n_clients=5))
+
+    out = run_pipeline(out_dir=str(tmp_path / "out"), raw=raw)
+
+    assert out["spans"][0]["rows_out"] == 200
+    assert len(out["fact_documents"]) == 200
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import pandas as pd
+import pytest
+
+import run_pipeline
+from phc_analytics.transformations.star_schema_df import (
+    agg_sales_by_product_df,
+    build_dim_product_df,
+    enrich_order_lines_df,
+    enrich_orders_with_date_df,
+)
+
+
+def _raw(seed: int) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    rng = random.Random(seed)
+    customers = [
+        {
+            "prestashop_customer_id": i,
+            "email": f"C{i}@X.PT",
+            "firstname": rng.choice(["Ana", "Rui", None]),
+            "lastname": rng.choice(["Silva", None]),
+            "active": rng.choice([True, False, 0, None]),
+        }
+        for i in range(1, 8)
+    ]
+    products = [
+        {
+            "prestashop_product_id": i,
+            "sku": f"SKU-{i}" if i % 3 else None,
+            "name": f"Produto {i}",
+            "price": 19.99,
+        }
+        for i in range(1, 6)
+    ]
+    orders = [
+        {
+            "prestashop_order_id": i,
+            "prestashop_customer_id": rng.randint(1, 7),
+            "status": "paid",
+            "total_paid": str(rng.uniform(1, 100)),
+            "created_at": f"2024-0{rng.randint(1, 3)}-1{rng.randint(0, 9)}T10:00:00",
+            "lines": [
+                {
+                    "prestashop_product_id": rng.randint(1, 5),
+                    "quantity": rng.randint(1, 4),
+                    "unit_price": 19.99,
+                    "line_total": round(rng.uniform(0, 50), 2),
+                }
+                for _ in range(rng.randint(0, 4))
+            ],
+        }
+        for i in range(1, 30)
+    ]
+    return {"customers": customers}, {"products": products}, {"orders": orders}
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_pandas_engine_writes_identical_csvs(seed: int, tmp_path: Path) -> None:
+    raw = _raw(seed)
+    rows = run_pipeline._gold_rows(*raw)
+    frames = run_pipeline._gold_pandas(*raw)
+
+    assert rows.keys() == frames.keys()
+    for name in rows:
+        run_pipeline.write_csv(tmp_path / "rows" / f"{name}.csv", rows[name])
+        run_pipeline.write_csv_df(tmp_path / "pd" / f"{name}.csv", frames[name])
+        expected = (tmp_path / "rows" / f"{name}.csv").read_bytes()
+        assert (tmp_path / "pd" / f"{name}.csv").read_bytes() == expected, name
+
+
+def test_main_engines_match(tmp_path: Path) -> None:
+    run_pipeline.main(engine="rows", out_dir=tmp_path / "rows")
+    run_pipeline.main(engine="pandas", out_dir=tmp_path / "pd")
+
+    for path in sorted((tmp_path / "rows").glob("*.csv")):
+        assert (tmp_path / "pd" / path.name).read_bytes() == path.read_bytes()
+
+    with pytest.raises(ValueError, match="Unknown engine"):
+        run_pipeline.main(engine="spark", out_dir=tmp_path)
+
+
+def test_errors_match_row_path() -> None:
+    orders = pd.DataFrame(
+        [{"prestashop_order_id": 1, "prestashop_customer_id": 1, "created_at": ""}]
+    )
+    with pytest.raises(ValueError, match="Order missing created_at"):
+        enrich_orders_with_date_df(orders)
+
+    orders["created_at"] = "2024-01-01T00:00:00"
+    lines = pd.DataFrame(
+        [
+            {"prestashop_order_id": 1, "prestashop_product_id": 1, "quantity": 1.0},
+            {"prestashop_order_id": 2, "prestashop_product_id": 1, "quantity": 1.0},
+        ]
+    ).assign(unit_price=1.0, line_total=1.0)
+    with pytest.raises(ValueError, match="Order 2 not found for order line"):
+        enrich_order_lines_df(lines, orders)
+
+    fact = enrich_order_lines_df(lines.iloc[:1], orders)
+    dim_product = build_dim_product_df(
+        pd.DataFrame([{"prestashop_product_id": 9, "name": "x"}])
+    )
+    with pytest.raises(ValueError, match="Product 1 not found in dim_product"):
+        agg_sales_by_product_df(fact, dim_product)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+import run_pipeline
+from phc_analytics.staging.synthetic import (
+    SyntheticConfig,
+    iter_chunks,
+    raw_payloads,
+    write_dataset,
+)
+from phc_analytics.transformations.prestashop_normalize import (
+    DataValidationError,
+    normalize_order_lines,
+    normalize_orders,
+)
+from phc_analytics.transformations.prestashop_normalize_df import (
+    frame_to_records,
+    normalize_order_lines_df,
+    read_table,
+)
+
+SMALL = SyntheticConfig(
+    n_customers=50, n_products=40, n_orders=300, n_documents=30, chunk_size=64
+)
+
+
+def test_same_config_same_data() -> None:
+    for entity in ("customers", "products", "orders", "documents"):
+        first = list(iter_chunks(entity, SMALL))
+        assert [t.equals(u) for t, u in zip(first, iter_chunks(entity, SMALL))] == [
+            True
+        ] * len(first)
+
+    other = SyntheticConfig(**{**SMALL.__dict__, "seed": 7})
+    assert not next(iter_chunks("orders", other)).equals(
+        next(iter_chunks("orders", SMALL))
+    )
+
+
+def test_skewed_products_and_repeat_customers() -> None:
+    _, _, orders = raw_payloads(SMALL)
+    sold = Counter(
+        line["prestashop_product_id"] for o in orders["orders"] for line in o["lines"]
+    )
+    buyers = Counter(o["prestashop_customer_id"] for o in orders["orders"])
+
+    total = sum(sold.values())
+    assert sold.most_common(1)[0][1] > 5 * total / SMALL.n_products
+    assert buyers.most_common(1)[0][1] >= 10
+    assert [o["prestashop_order_id"] for o in orders["orders"]] == list(range(1, 301))
+
+
+def test_clean_and_dirty_data_run_through_the_gold_layer() -> None:
+    for cfg in (SMALL, SyntheticConfig(**{**SMALL.__dict__, "dirty_rate": 0.2})):
+        gold = run_pipeline._gold_rows(*raw_payloads(cfg))
+        frames = run_pipeline._gold_pandas(*raw_payloads(cfg))
+        assert (
+            frames["agg_sales_by_product"].to_dict("records")
+            == (gold["agg_sales_by_product"])
+        )
+
+    dirty = SyntheticConfig(**{**SMALL.__dict__, "dirty_rate": 0.2})
+    _, _, orders = raw_payloads(dirty)
+    assert len(orders["orders"]) > dirty.n_orders  # reenvios duplicados
+
+
+def test_invalid_rows_break_the_contract() -> None:
+    cfg = SyntheticConfig(**{**SMALL.__dict__, "invalid_rate": 0.05})
+    _, _, orders = raw_payloads(cfg)
+    with pytest.raises(DataValidationError):
+        normalize_orders(orders)
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "parquet"])
+def test_written_files_feed_the_columnar_normalize(fmt: str, tmp_path: Path) -> None:
+    counts = write_dataset(tmp_path, SMALL, fmt)
+
+    assert counts == {"customers": 50, "products": 40, "orders": 300, "documents": 30}
+    _, _, orders = raw_payloads(SMALL)
+    table = read_table(tmp_path / f"orders.{fmt}")
+    assert frame_to_records(normalize_order_lines_df(table)) == normalize_order_lines(
+        orders
+    )
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from phc_analytics.pipelines.prestashop_to_raw import (
+    iter_changed_ids,
+    run_prestashop_to_raw,
+)
+from phc_analytics.storage.pg_pool import PgPool
+from phc_analytics.storage.watermarks import WatermarkManager, parse_ts
+from prestashop_stub import StubPrestaShopServer, make_orders
+
+UTC = timezone.utc
+
+
+class _Cursor:
+    def __init__(self, conn: "_Conn") -> None:
+        self.conn = conn
+        self.rowcount = 0
+
+    def __enter__(self) -> "_Cursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        self.conn.executed.append((" ".join(sql.split()), params))
+        self.conn.in_tx = True
+        self.rowcount = self.conn.copied
+
+    def copy_expert(self, sql: str, f: Any) -> None:
+        self.conn.copied += sum(1 for _ in f)
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        return self.conn.watermark_rows
+
+
+class _Conn:
+    """Ligacao falsa: regista SQL/params; SELECT de watermarks devolve `watermark_rows`."""
+
+    closed = 0
+
+    def __init__(self) -> None:
+        self.executed: List[Tuple[str, Any]] = []
+        self.watermark_rows: List[Dict[str, Any]] = []
+        self.copied = 0
+        self.commits = 0
+        self.in_tx = False
+
+    def cursor(self, cursor_factory: Any = None) -> _Cursor:
+        return _Cursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+        self.in_tx = False
+
+    def rollback(self) -> None:
+        self.in_tx = False
+
+    def get_transaction_status(self) -> int:
+        return 2 if self.in_tx else 0
+
+    def close(self) -> None:
+        self.closed = 1
+
+    def watermark_writes(self) -> List[Any]:
+        return [p for sql, p in self.executed if "etl_watermarks AS t" in sql]
+
+
+def _pool() -> Tuple[PgPool, _Conn]:
+    conn = _Conn()
+    return PgPool(
+        "postgresql://fake", min_size=1, max_size=1, connect=lambda _: conn
+    ), conn
+
+
+def test_parse_ts_handles_offsets_and_prestashop_format() -> None:
+    assert parse_ts("2024-01-01 10:00:00") == datetime(2024, 1, 1, 10, tzinfo=UTC)
+    assert parse_ts("2024-01-01T10:00:00Z") == datetime(2024, 1, 1, 10, tzinfo=UTC)
+    assert parse_ts("2024-01-01T12:00:00+02:00") == datetime(2024, 1, 1, 10, tzinfo=UTC)
+    assert parse_ts(datetime(2024, 1, 1, 10)) == datetime(2024, 1, 1, 10, tzinfo=UTC)
+    assert parse_ts(None) is None
+    assert parse_ts("") is None
+    assert parse_ts("0000-00-00 00:00:00") is None
+    with pytest.raises(ValueError, match="Invalid timestamp"):
+        parse_ts("ontem")
+
+    # Como texto "2024-01-01T11:00:00+02:00" > "2024-01-01 10:00:00";
+    # no tempo e' ao contrario (09:00 UTC < 10:00 UTC).
+    assert parse_ts("2024-01-01T11:00:00+02:00") < parse_ts("2024-01-01 10:00:00")
+
+
+def test_set_many_is_one_upsert_that_only_advances() -> None:
+    pool, conn = _pool()
+    wm = WatermarkManager("postgresql://fake", pool=pool)
+
+    wm.set_many(
+        {
+            "prestashop_orders": "2024-01-02T10:00:00+01:00",
+            "prestashop_customers": datetime(2024, 1, 3, tzinfo=UTC),
+            "prestashop_products": None,  # nada carregado: nao mexe
+        }
+    )
+
+    (write,) = conn.watermark_writes()
+    assert write == (
+        ["prestashop_orders", "prestashop_customers"],
+        [datetime(2024, 1, 2, 9, tzinfo=UTC), datetime(2024, 1, 3, tzinfo=UTC)],
+    )
+    sql = conn.executed[-1][0]
+    assert "ON CONFLICT (entity_name) DO UPDATE" in sql
+    assert "WHERE EXCLUDED.watermark_ts > t.watermark_ts" in sql
+    assert conn.commits == 1
+
+    wm.set("prestashop_orders", "2023-01-01 00:00:00", force=True)
+    assert "WHERE EXCLUDED" not in conn.executed[-1][0]
+
+    wm.set_many({"prestashop_orders": None})
+    assert len(conn.watermark_writes()) == 2
+
+
+def test_get_many_reads_all_entities_in_one_query() -> None:
+    pool, conn = _pool()
+    conn.watermark_rows = [
+        {"entity_name": "prestashop_orders", "watermark_ts": "2024-01-01 10:00:00"}
+    ]
+    got = WatermarkManager("postgresql://fake", pool=pool).get_many(
+        ["prestashop_orders", "prestashop_customers"]
+    )
+
+    assert len(conn.executed) == 1
+    assert got["prestashop_orders"].watermark_ts == datetime(2024, 1, 1, 10, tzinfo=UTC)
+    assert "prestashop_customers" not in got
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_raw_run_advances_to_parsed_max_with_the_load(atomic: bool) -> None:
+    orders = make_orders(3)
+    # offset explicito: como texto e' o maior, no tempo e' o mais antigo
+    orders[0]["date_upd"] = "2024-01-04T14:00:00+05:00"
+    pool, conn = _pool()
+
+    with StubPrestaShopServer({"orders": orders}) as server:
+        result = run_prestashop_to_raw(
+            dsn="postgresql://fake",
+            prestashop_base_url=server.url,
+            prestashop_api_key="KEY",
+            pool=pool,
+            atomic=atomic,
+        )
+
+    orders_result = result["entities"]["prestashop_orders"]
+    assert orders_result["loaded"] == 3
+    assert orders_result["max_source_updated_at"] == "2024-01-04T12:00:00+00:00"
+    assert "changed_ids" not in orders_result  # ids lidos da raw table
+
+    writes = conn.watermark_writes()
+    assert [w[0] for w in writes] == [["prestashop_orders"]]
+    assert writes[0][1] == [datetime(2024, 1, 4, 12, tzinfo=UTC)]
+    # atomic: 1 commit para tudo; senao 1 por entidade (load + watermark)
+    assert conn.commits == (1 if atomic else 3)
+
+
+class _NamedCursor:
+    """Cursor server-side falso: entrega as linhas 1 a 1 (como o psycopg2)."""
+
+    def __init__(self, name: str, rows: List[Tuple[str]]) -> None:
+        self.name = name
+        self.rows = rows
+        self.itersize = 2000
+        self.executed: List[Tuple[str, Any]] = []
+
+    def __enter__(self) -> "_NamedCursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        self.executed.append((" ".join(sql.split()), params))
+
+    def __iter__(self) -> Any:
+        return iter(self.rows)
+
+
+def test_iter_changed_ids_reads_raw_table_from_watermark() -> None:
+    cursors: List[_NamedCursor] = []
+
+    class _IdsConn:
+        def cursor(self, name: str) -> _NamedCursor:
+            cursors.append(_NamedCursor(name, [("7",), ("9",)]))
+            return cursors[-1]
+
+    ids = iter_changed_ids(
+        _IdsConn(), "prestashop_orders", "2024-01-01T10:00:00+01:00", batch_size=500
+    )
+
+    assert not cursors  # gerador: nada corre antes de ser consumido
+    assert list(ids) == ["7", "9"]
+    (cur,) = cursors
+    assert cur.itersize == 500
+    assert cur.executed == [
+        (
+            "SELECT order_id FROM raw.prestashop_orders "
+            "WHERE source_updated_at >= %s ORDER BY source_updated_at",
+            (datetime(2024, 1, 1, 9, tzinfo=UTC),),
+        )
+    ]
+    with pytest.raises(ValueError, match="Unknown entity"):
+        list(iter_changed_ids(_IdsConn(), "prestashop_carts", "2024-01-01"))
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_raw_run_closes_the_prestashop_client(
+    monkeypatch: pytest.MonkeyPatch, fail: bool
+) -> None:
+    from phc_analytics.integrations.prestashop.client import PrestaShopClient
+
+    closed: List[int] = []
+    monkeypatch.setattr(
+        PrestaShopClient, "close", lambda self: closed.append(self.connections_opened)
+    )
+    pool, conn = _pool()
+    if fail:
+        monkeypatch.setattr(
+            "phc_analytics.pipelines.prestashop_to_raw.copy_upsert_raw",
+            lambda *a, **k: (_ for _ in ()).throw(RuntimeError("COPY failed")),
+        )
+
+    with StubPrestaShopServer({"orders": make_orders(2)}) as server:
+        kwargs = dict(
+            dsn="postgresql://fake",
+            prestashop_base_url=server.url,
+            prestashop_api_key="KEY",
+            pool=pool,
+        )
+        if fail:
+            with pytest.raises(RuntimeError, match="COPY failed"):
+                run_prestashop_to_raw(**kwargs)
+        else:
+            run_prestashop_to_raw(**kwargs)
+
+    assert len(closed) == 1